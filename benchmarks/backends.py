@@ -0,0 +1,61 @@
+"""
+Benchmarks comparing the dataset backends
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from compliance_checker.backends import BACKENDS, hdf5
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests.synthetic import write_feature_type
+
+from .common import CHECKERS, load_suite
+
+
+# number of datasets checked at once from threads
+THREADS = 4
+
+
+class BackendRun(object):
+    """
+    Times loading and checking synthetic netCDF-4 datasets opened with each
+    dataset backend, one at a time and from threads
+    """
+
+    params = [list(BACKENDS), [10, 200]]
+    param_names = ["backend", "n_variables"]
+    timeout = 600
+
+    def setup_cache(self):
+        return {
+            n: [
+                write_feature_type(
+                    "backend_{}_{}.nc".format(n, index),
+                    "2d-regular-grid",
+                    n,
+                    sizes={"time": 10, "lat": 20, "lon": 30},
+                    seed=index,
+                )
+                for index in range(THREADS)
+            ]
+            for n in self.params[1]
+        }
+
+    def setup(self, paths, backend, n_variables):
+        if backend == "h5netcdf" and hdf5.h5netcdf is None:
+            raise NotImplementedError("h5netcdf isn't installed")
+        load_suite()
+        self.cs = CheckSuite(backend=backend)
+
+    def _check(self, path):
+        cs = CheckSuite(backend=self.cs.backend)
+        with cs.load_dataset(path) as ds:
+            cs.run(ds, [], *CHECKERS)
+
+    def time_load_dataset(self, paths, backend, n_variables):
+        self.cs.load_dataset(paths[n_variables][0]).close()
+
+    def time_run(self, paths, backend, n_variables):
+        self._check(paths[n_variables][0])
+
+    def time_run_threads(self, paths, backend, n_variables):
+        with ThreadPoolExecutor(THREADS) as executor:
+            list(executor.map(self._check, paths[n_variables]))
@@ -0,0 +1,96 @@
+"""
+Benchmarks for running each checker against the example datasets
+"""
+from compliance_checker.tests.synthetic import FEATURE_TYPES, write_feature_type
+
+from .common import CHECKERS, EXAMPLES, compile_examples, load_suite
+
+
+class CheckerRun(object):
+    """
+    Times CheckSuite.run for each checker over the CDL examples
+    """
+
+    params = [CHECKERS, EXAMPLES]
+    param_names = ["checker", "example"]
+    timeout = 300
+
+    def setup_cache(self):
+        return compile_examples("examples")
+
+    def setup(self, paths, checker, example):
+        self.cs = load_suite()
+        self.ds = self.cs.load_dataset(paths[example])
+
+    def teardown(self, paths, checker, example):
+        self.ds.close()
+
+    def time_run(self, paths, checker, example):
+        self.cs.run(self.ds, [], checker)
+
+    def peakmem_run(self, paths, checker, example):
+        self.cs.run(self.ds, [], checker)
+
+
+class SyntheticCheckerRun(object):
+    """
+    Times CheckSuite.run for each checker over synthetic gridded datasets
+    with increasing numbers of data variables
+    """
+
+    params = [CHECKERS, [10, 50, 200]]
+    param_names = ["checker", "n_variables"]
+    timeout = 600
+
+    def setup_cache(self):
+        return {
+            n: write_feature_type(
+                "synthetic_{}.nc".format(n),
+                "2d-regular-grid",
+                n,
+                sizes={"time": 10, "lat": 20, "lon": 30},
+            )
+            for n in self.params[1]
+        }
+
+    def setup(self, paths, checker, n_variables):
+        self.cs = load_suite()
+        self.ds = self.cs.load_dataset(paths[n_variables])
+
+    def teardown(self, paths, checker, n_variables):
+        self.ds.close()
+
+    def time_run(self, paths, checker, n_variables):
+        self.cs.run(self.ds, [], checker)
+
+    def peakmem_run(self, paths, checker, n_variables):
+        self.cs.run(self.ds, [], checker)
+
+
+class FeatureTypeCheckerRun(object):
+    """
+    Times CheckSuite.run for each checker over synthetic datasets of every
+    feature type recognized by cfutil.guess_feature_type
+    """
+
+    params = [CHECKERS, list(FEATURE_TYPES)]
+    param_names = ["checker", "feature_type"]
+    timeout = 600
+
+    def setup_cache(self):
+        return {
+            feature_type: write_feature_type(
+                "{}.nc".format(feature_type), feature_type, 10
+            )
+            for feature_type in FEATURE_TYPES
+        }
+
+    def setup(self, paths, checker, feature_type):
+        self.cs = load_suite()
+        self.ds = self.cs.load_dataset(paths[feature_type])
+
+    def teardown(self, paths, checker, feature_type):
+        self.ds.close()
+
+    def time_run(self, paths, checker, feature_type):
+        self.cs.run(self.ds, [], checker)
@@ -0,0 +1,42 @@
+"""
+Benchmarks for command line startup
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+
+def cli_command():
+    """
+    Returns the command used to invoke the compliance checker CLI, preferring
+    the installed console script over the script in the source tree
+    """
+    script = shutil.which("compliance-checker")
+    if script is not None:
+        return [script]
+    return [
+        sys.executable,
+        os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "cchecker.py",
+        ),
+    ]
+
+
+class CLIStartup(object):
+    """
+    Times starting the CLI, which imports and loads every installed checker
+    """
+
+    def setup(self):
+        self.command = cli_command()
+
+    def time_version(self):
+        subprocess.run(self.command + ["--version"], stdout=subprocess.DEVNULL)
+
+    def time_list_tests(self):
+        subprocess.run(self.command + ["--list-tests"], stdout=subprocess.DEVNULL)
+
+    def time_import_runner(self):
+        subprocess.run([sys.executable, "-c", "import compliance_checker.runner"])
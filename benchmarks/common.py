@@ -0,0 +1,64 @@
+"""
+Shared helpers for the compliance checker benchmarks
+"""
+import glob
+import os
+import subprocess
+
+from compliance_checker.suite import CheckSuite
+
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "compliance_checker",
+    "tests",
+    "data",
+    "examples",
+)
+
+# every versioned checker which operates on netCDF datasets
+CHECKERS = [
+    "cf:1.6",
+    "cf:1.7",
+    "acdd:1.1",
+    "acdd:1.3",
+    "ioos:0.1",
+    "ioos:1.1",
+    "ioos:1.2",
+]
+
+EXAMPLES = sorted(
+    os.path.splitext(os.path.basename(p))[0]
+    for p in glob.glob(os.path.join(EXAMPLES_DIR, "*.cdl"))
+)
+
+
+def generate_dataset(cdl_path, nc_path):
+    """
+    Generates a netCDF file from a CDL file with ncgen
+    """
+    subprocess.run(["ncgen", "-o", nc_path, cdl_path], check=True)
+
+
+def compile_examples(out_dir):
+    """
+    Generates netCDF files from the example CDL files into out_dir, leaving
+    the source tree untouched.  Returns a dict of example name to path.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for name in EXAMPLES:
+        nc_path = os.path.join(out_dir, name + ".nc")
+        if not os.path.exists(nc_path):
+            generate_dataset(os.path.join(EXAMPLES_DIR, name + ".cdl"), nc_path)
+        paths[name] = os.path.abspath(nc_path)
+    return paths
+
+
+def load_suite():
+    """
+    Returns a CheckSuite with all the installed checkers loaded
+    """
+    cs = CheckSuite()
+    cs.load_all_available_checkers()
+    return cs
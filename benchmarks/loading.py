@@ -0,0 +1,49 @@
+"""
+Benchmarks for loading datasets
+"""
+import os
+import tempfile
+
+from compliance_checker import ncgen
+
+from .common import (
+    EXAMPLES,
+    EXAMPLES_DIR,
+    compile_examples,
+    generate_dataset,
+    load_suite,
+)
+
+
+class DatasetLoading(object):
+    """
+    Times opening each example dataset, and compiling it from CDL
+    """
+
+    params = [EXAMPLES]
+    param_names = ["example"]
+
+    def setup_cache(self):
+        return compile_examples("examples")
+
+    def setup(self, paths, example):
+        self.cs = load_suite()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def time_load_dataset(self, paths, example):
+        self.cs.load_dataset(paths[example]).close()
+
+    def time_generate_dataset(self, paths, example):
+        generate_dataset(
+            os.path.join(EXAMPLES_DIR, example + ".cdl"),
+            os.path.join(self.tmpdir, example + ".nc"),
+        )
+
+    def time_compile_cdl(self, paths, example):
+        with open(os.path.join(EXAMPLES_DIR, example + ".cdl")) as f:
+            ncgen.compile_cdl_bytes(f.read())
+
+    def teardown(self, paths, example):
+        for name in os.listdir(self.tmpdir):
+            os.remove(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
@@ -0,0 +1,66 @@
+"""
+Benchmarks for rendering reports in each output format
+"""
+import os
+
+from collections import OrderedDict
+
+from compliance_checker.runner import ComplianceChecker
+from compliance_checker.tests.synthetic import write_feature_type
+
+from .common import compile_examples, load_suite
+
+
+class ReportRendering(object):
+    """
+    Times rendering CF and ACDD results for a batch of datasets in each of
+    the output formats
+    """
+
+    params = [["text", "html", "json", "json_new", "jsonl"], [1, 10]]
+    param_names = ["output_format", "n_datasets"]
+    limit = 1
+
+    def setup_cache(self):
+        paths = list(compile_examples("examples").values())
+        paths.append(write_feature_type("synthetic_100.nc", "2d-regular-grid", 100))
+        return paths
+
+    def setup(self, paths, output_format, n_datasets):
+        if output_format == "json" and n_datasets > 1:
+            # the json format only supports a single dataset
+            raise NotImplementedError
+        self.cs = load_suite()
+        self.score_dict = OrderedDict()
+        for i in range(n_datasets):
+            loc = paths[i % len(paths)]
+            ds = self.cs.load_dataset(loc)
+            self.score_dict["{}#{}".format(loc, i)] = self.cs.run(ds, [], "cf", "acdd")
+            ds.close()
+
+    def render(self, output_format):
+        if output_format == "text":
+            with open(os.devnull, "w") as f:
+                ComplianceChecker.stdout_output(
+                    self.cs, self.score_dict, 0, self.limit, stream=f
+                )
+        elif output_format == "html":
+            ComplianceChecker.html_output(
+                self.cs, self.score_dict, os.devnull, None, self.limit
+            )
+        elif output_format == "jsonl":
+            with open(os.devnull, "w") as f:
+                for loc, score_groups in self.score_dict.items():
+                    ComplianceChecker.jsonl_output(
+                        self.cs, loc, score_groups, f, self.limit
+                    )
+        else:
+            ComplianceChecker.json_output(
+                self.cs, self.score_dict, os.devnull, None, self.limit, output_format
+            )
+
+    def time_render(self, paths, output_format, n_datasets):
+        self.render(output_format)
+
+    def peakmem_render(self, paths, output_format, n_datasets):
+        self.render(output_format)
@@ -0,0 +1,88 @@
+"""
+Benchmarks for converting check results into JSON output
+"""
+from compliance_checker.base import BaseCheck, Result
+from compliance_checker.suite import CheckSuite
+from compliance_checker.util import json_dumps
+
+
+def make_results(n_results, n_children=5, n_msgs=3):
+    """
+    Builds a synthetic list of grouped Results resembling those produced by
+    CheckSuite.scores, with one level of children per result
+    """
+    weights = [BaseCheck.HIGH, BaseCheck.MEDIUM, BaseCheck.LOW]
+    results = []
+    for i in range(n_results):
+        children = [
+            Result(
+                weights[j % 3],
+                (j % 2, 1),
+                "§{}.{} child check {}".format(i, j, j),
+                ["message {} for child {}".format(k, j) for k in range(n_msgs)],
+            )
+            for j in range(n_children)
+        ]
+        results.append(
+            Result(
+                weights[i % 3],
+                (sum(c.value[0] for c in children), n_children),
+                "§{} check {}".format(i % 10, i),
+                children=children,
+            )
+        )
+    return results
+
+
+def legacy_serialize(o):
+    """
+    The generic serialization path prior to Result.to_primitive, which
+    re-walks the output of Result.serialize() node by node
+    """
+    if isinstance(o, (list, tuple)):
+        return [legacy_serialize(i) for i in o]
+    if isinstance(o, dict):
+        return {k: legacy_serialize(v) for k, v in o.items()}
+    if isinstance(o, Result):
+        return legacy_serialize(o.serialize())
+    return o
+
+
+class ResultSerialization(object):
+    """
+    Compares the legacy and direct serialization of large result trees
+    """
+
+    params = [100, 1000, 10000]
+    param_names = ["n_results"]
+
+    def setup(self, n_results):
+        self.cs = CheckSuite()
+        self.results = make_results(n_results)
+        self.primitives = self.cs.serialize(self.results)
+
+    def time_legacy_serialize(self, n_results):
+        legacy_serialize(self.results)
+
+    def time_serialize(self, n_results):
+        self.cs.serialize(self.results)
+
+    def time_json_dumps(self, n_results):
+        json_dumps(self.primitives, indent=2)
+
+    def peakmem_serialize(self, n_results):
+        json_dumps(self.cs.serialize(self.results), indent=2)
+
+
+if __name__ == "__main__":
+    # allow a quick comparison without asv installed
+    import timeit
+
+    for n in ResultSerialization.params:
+        bench = ResultSerialization()
+        bench.setup(n)
+        for name in ("time_legacy_serialize", "time_serialize", "time_json_dumps"):
+            seconds = min(
+                timeit.repeat(lambda: getattr(bench, name)(n), number=1, repeat=5)
+            )
+            print("{:>6} results {:<24}{:.4f}s".format(n, name, seconds))
@@ -7,9 +7,16 @@ import warnings
 from collections import defaultdict
 from textwrap import dedent
 
-from compliance_checker import __version__
+from compliance_checker import __version__, metrics
+from compliance_checker.backends import BACKENDS, DEFAULT_BACKEND
 from compliance_checker.cf.util import download_cf_standard_name_table
+from compliance_checker.fingerprint import (
+    DEFAULT_VOLATILE_ATTRIBUTES,
+    MetadataResultCache,
+)
+from compliance_checker.prefetch import DEFAULT_DISK_BUDGET, DEFAULT_MAX_IN_FLIGHT
 from compliance_checker.runner import CheckSuite, ComplianceChecker
+from compliance_checker.tracing import tracing
 
 
 def _print_checker_name_header(checker_str):
@@ -121,15 +128,17 @@ def main():
         default=[],
         action="append",
         help=(
-            "Output format(s). Options are 'text', 'html', 'json', 'json_new'."
-            " The difference between the 'json' and the 'json_new'"
+            "Output format(s). Options are 'text', 'html', 'json', 'json_new',"
+            " 'jsonl'. The difference between the 'json' and the 'json_new'"
             " formats is that the 'json' format has the check as the top level"
             " key, whereas the 'json_new' format has the dataset name(s) as the"
             " main key in the output follow by any checks as subkeys.  Also, "
             "'json' format can be only be run against one input file, whereas "
-            "'json_new' can be run against multiple files."
+            "'json_new' can be run against multiple files.  The 'jsonl' "
+            "format writes one compact JSON record per dataset and checker "
+            "as soon as each dataset has been checked."
         ),
-        choices=["text", "html", "json", "json_new"],
+        choices=["text", "html", "json", "json_new", "jsonl"],
     )
 
     parser.add_argument(
@@ -170,6 +179,156 @@ def main():
         ),
     )
 
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help=(
+            "Report the wall time, CPU time, read calls, bytes read and peak "
+            "memory allocation of the dataset load, checker setup and each "
+            "check.  Adds a summary table to 'text' output and a 'timings' "
+            "key to each checker in the JSON formats.  Measuring memory "
+            "slows down the checks."
+        ),
+    )
+
+    parser.add_argument(
+        "--header-only",
+        action="store_true",
+        help=(
+            "Load ERDDAP tabledap datasets from the header of their .ncCF "
+            "file instead of downloading all of their data.  The data read "
+            "by the checks is limited to the first rows of the dataset, and "
+            "checkers other than acdd and cf are skipped."
+        ),
+    )
+
+    parser.add_argument(
+        "--dedup-metadata",
+        action="store_true",
+        help=(
+            "Run the checks which only read metadata once for datasets with "
+            "the same dimensions, variables and attributes, apart from the "
+            "volatile global attributes, and reuse their results.  Checks "
+            "which read data or volatile attributes run for every dataset."
+        ),
+    )
+
+    parser.add_argument(
+        "--volatile-attribute",
+        metavar="NAME",
+        action="append",
+        help=(
+            "Global attribute whose value is ignored when comparing headers "
+            "for --dedup-metadata.  May be specified multiple times.  "
+            "Defaults to {}.".format(", ".join(DEFAULT_VOLATILE_ATTRIBUTES))
+        ),
+    )
+
+    parser.add_argument(
+        "--prefetch",
+        metavar="N",
+        type=int,
+        default=0,
+        help=(
+            "When checking more than one dataset, download up to N remote "
+            "netCDF files at once ahead of the dataset being checked, such as "
+            "{}.  Defaults to 0, which disables downloading ahead.".format(
+                DEFAULT_MAX_IN_FLIGHT
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "--prefetch-budget",
+        metavar="MB",
+        type=int,
+        default=DEFAULT_DISK_BUDGET // 2**20,
+        help=(
+            "Largest total size in megabytes of the files downloaded ahead "
+            "which are waiting to be checked.  Defaults to {}.".format(
+                DEFAULT_DISK_BUDGET // 2**20
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help=(
+            "Profile the checks and write a profile of each dataset to the "
+            "directory PATH, named after the dataset."
+        ),
+    )
+
+    parser.add_argument(
+        "--profile-format",
+        default="pstats",
+        choices=["pstats", "collapsed"],
+        help=(
+            "Format of the profiles written with --profile.  'pstats' uses "
+            "the deterministic cProfile profiler and writes files which can be "
+            "read with the pstats module, snakeviz or gprof2dot.  'collapsed' "
+            "samples the call stack and writes collapsed stacks which can be "
+            "read by flamegraph.pl or speedscope.  Defaults to 'pstats'."
+        ),
+    )
+
+    parser.add_argument(
+        "--profile-checker",
+        default=[],
+        action="append",
+        help=(
+            "Restrict profiling to a checker, e.g. 'cf' or 'cf:1.7'.  May be "
+            "specified multiple times.  Dataset loading is only profiled "
+            "when profiling isn't restricted."
+        ),
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help=(
+            "Record nested spans around dataset loading, checker setup, each "
+            "check and each output writer, and write them to PATH as JSON in "
+            "the Chrome trace-event format, which can be opened in "
+            "chrome://tracing, Perfetto or speedscope."
+        ),
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help=(
+            "Write counters and histograms of the datasets checked, dataset "
+            "load times, checker and check durations, cache hits and check "
+            "exceptions in the OpenMetrics text format to PATH once all the "
+            "datasets have been checked."
+        ),
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        metavar="PORT",
+        type=int,
+        help=(
+            "Serve the metrics in the OpenMetrics text format over HTTP on "
+            "PORT on the local host while the datasets are checked."
+        ),
+    )
+
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=DEFAULT_BACKEND,
+        help=(
+            "Library to open local netCDF files with.  Checks of netCDF-4 "
+            "files read with h5netcdf don't hold the netCDF library's lock, "
+            "though h5py serializes their HDF5 calls behind its own lock.  "
+            "Classic netCDF files are always opened with netcdf4.  Defaults "
+            "to netcdf4."
+        ),
+    )
+
     parser.add_argument(
         "-V",
         "--version",
@@ -182,7 +341,8 @@ def main():
         nargs="*",
         help=(
             "Defines the location of the dataset to be checked. The location "
-            "can be a local netCDF file, a remote OPeNDAP endpoint, a remote "
+            "can be a local netCDF file, a local Zarr store directory, a "
+            "remote OPeNDAP endpoint, a remote "
             "netCDF file which returns content-type header of "
             "'application/x-netcdf', or an ERDDAP TableDAP endpoint. "
             "Note that the ERDDAP TableDAP endpoint will currently attempt "
@@ -268,51 +428,85 @@ def main():
         )
         sys.exit(2)
 
-    # Run the compliance checker
-    # 2 modes, concatenated output file or multiple output files
-    return_values = []
-    had_errors = []
-    if output_len == 1:
-        if args.format != "json":
-            print(
-                "Running Compliance Checker on the datasets from: {}".format(
-                    args.dataset_location
-                ),
-                file=sys.stderr,
-            )
-        return_value, errors = ComplianceChecker.run_checker(
-            args.dataset_location,
-            args.test or ["acdd"],
-            args.verbose,
-            args.criteria,
-            args.skip_checks,
-            args.output[0],
-            args.format or ["text"],
-            options=options_dict,
+    if args.metrics_port is not None:
+        metrics.start_http_server(args.metrics_port)
+
+    metadata_cache = None
+    if args.dedup_metadata:
+        metadata_cache = MetadataResultCache(
+            args.volatile_attribute or DEFAULT_VOLATILE_ATTRIBUTES
         )
-        return_values.append(return_value)
-        had_errors.append(errors)
-    else:
-        for output, dataset in zip(args.output, args.dataset_location):
+
+    with tracing(enabled=bool(args.trace)) as tracer:
+        # Run the compliance checker
+        # 2 modes, concatenated output file or multiple output files
+        return_values = []
+        had_errors = []
+        if output_len == 1:
             if args.format != "json":
                 print(
-                    "Running Compliance Checker on the dataset from: {}".format(
-                        dataset
+                    "Running Compliance Checker on the datasets from: {}".format(
+                        args.dataset_location
                     ),
                     file=sys.stderr,
                 )
             return_value, errors = ComplianceChecker.run_checker(
-                [dataset],
+                args.dataset_location,
                 args.test or ["acdd"],
                 args.verbose,
                 args.criteria,
                 args.skip_checks,
-                output,
+                args.output[0],
                 args.format or ["text"],
                 options=options_dict,
+                timings=args.timings,
+                profile=args.profile,
+                profile_format=args.profile_format,
+                profile_checkers=args.profile_checker,
+                header_only=args.header_only,
+                prefetch=args.prefetch,
+                prefetch_budget=args.prefetch_budget * 2**20,
+                metadata_cache=metadata_cache,
+                backend=args.backend,
             )
             return_values.append(return_value)
             had_errors.append(errors)
+        else:
+            for output, dataset in zip(args.output, args.dataset_location):
+                if args.format != "json":
+                    print(
+                        "Running Compliance Checker on the dataset from: {}".format(
+                            dataset
+                        ),
+                        file=sys.stderr,
+                    )
+                return_value, errors = ComplianceChecker.run_checker(
+                    [dataset],
+                    args.test or ["acdd"],
+                    args.verbose,
+                    args.criteria,
+                    args.skip_checks,
+                    output,
+                    args.format or ["text"],
+                    options=options_dict,
+                    timings=args.timings,
+                    profile=args.profile,
+                    profile_format=args.profile_format,
+                    profile_checkers=args.profile_checker,
+                    header_only=args.header_only,
+                    prefetch=args.prefetch,
+                    prefetch_budget=args.prefetch_budget * 2**20,
+                    metadata_cache=metadata_cache,
+                    backend=args.backend,
+                )
+                return_values.append(return_value)
+                had_errors.append(errors)
+
+    if tracer is not None:
+        tracer.dump(args.trace)
+
+    if args.metrics_file:
+        metrics.write_metrics(args.metrics_file)
 
     if any(had_errors):
         sys.exit(2)
@@ -24,6 +24,14 @@ class MemoizedDataset(Dataset):
     def get_variables_by_attributes(self, **kwargs):
         return super(MemoizedDataset, self).get_variables_by_attributes(**kwargs)
 
+    def getncattr(self, name, encoding="utf-8"):
+        # global attribute reads are recorded while checking whether check
+        # results can be reused between datasets, see fingerprint.py
+        reads = self.__dict__.get("_attribute_reads")
+        if reads is not None:
+            reads.add(name)
+        return super(MemoizedDataset, self).getncattr(name, encoding)
+
 
 @contextmanager
 def tempnc(data: BinaryIO) -> Generator[str, None, None]:
@@ -32,6 +32,15 @@ class ACDDBaseCheck(BaseCheck):
     _cc_description = "Attribute Conventions for Dataset Discovery (ACDD)"
     _cc_url = "http://wiki.esipfed.org/index.php?title=Category:Attribute_Conventions_Dataset_Discovery"
     _cc_display_headers = {3: "Highly Recommended", 2: "Recommended", 1: "Suggested"}
+    # the extent checks compare attributes against the data
+    _cc_data_checks = frozenset(
+        [
+            "check_lat_extents",
+            "check_lon_extents",
+            "check_time_extents",
+            "check_vertical_extents",
+        ]
+    )
 
     def __init__(self):
 
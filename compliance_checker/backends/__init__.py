@@ -0,0 +1,50 @@
+"""
+Dataset backends, which open local netCDF files for checking.  The default
+netcdf4 backend opens them with the netCDF library, as a MemoizedDataset,
+while other backends read them into a ReadOnlyDataset, which has the parts
+of the netCDF4.Dataset interface the checkers use.  Local Zarr stores are
+read into a ZarrDataset, a ReadOnlyDataset, whichever backend is named.
+"""
+from compliance_checker import MemoizedDataset
+from compliance_checker.backends.hdf5 import H5NetCDFDataset
+from compliance_checker.protocols import netcdf
+
+
+# default dataset backend
+DEFAULT_BACKEND = "netcdf4"
+
+# names of the dataset backends
+BACKENDS = ("netcdf4", "h5netcdf")
+
+
+def is_hdf5_file(path):
+    """
+    Returns True if the local file at path is an HDF5 file, such as a
+    netCDF-4 file
+
+    :param str path: Path of the file
+    """
+    with open(path, "rb") as f:
+        return netcdf.is_hdf5(f.read(4))
+
+
+def open_dataset(path, backend=DEFAULT_BACKEND):
+    """
+    Opens the local netCDF file at path with the named backend.  The
+    h5netcdf backend only reads netCDF-4 files, so classic netCDF files are
+    opened with netcdf4 whichever backend is named.  netcdf4 datasets should
+    be opened while holding NETCDF_LOCK.
+
+    :param str path: Path of the netCDF file
+    :param str backend: Name of the backend, one of BACKENDS
+    :rtype: netCDF4.Dataset or ReadOnlyDataset
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            "Unknown dataset backend {!r}, expected one of {}".format(
+                backend, ", ".join(BACKENDS)
+            )
+        )
+    if backend == "h5netcdf" and is_hdf5_file(path):
+        return H5NetCDFDataset(path)
+    return MemoizedDataset(path)
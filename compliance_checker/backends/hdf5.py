@@ -0,0 +1,117 @@
+"""
+Reads netCDF-4 files with h5netcdf, which reads HDF5 through h5py rather
+than the netCDF library
+"""
+import numpy as np
+
+from compliance_checker.backends.readonly import (
+    ReadOnlyDataset,
+    ReadOnlyDimension,
+    ReadOnlyVariable,
+)
+
+
+# h5netcdf is an optional dependency of this backend
+try:
+    import h5netcdf
+except ImportError:
+    h5netcdf = None
+
+
+def _string(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+
+def _attribute_value(value):
+    """
+    Returns an attribute value read by h5netcdf as netCDF4 returns it:
+    strings are str, string arrays are lists unless they have one element,
+    and numeric arrays with one element are numpy scalars
+    """
+    if isinstance(value, bytes):
+        return _string(value)
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in "OSU":
+            strings = [_string(v) for v in value.ravel()]
+            return strings[0] if len(strings) == 1 else strings
+        if value.size == 1:
+            return value.reshape(())[()]
+    return value
+
+
+def _attributes(attrs):
+    return [(name, _attribute_value(attrs[name])) for name in attrs]
+
+
+def _reader(var, strings):
+    """
+    Returns a function reading var at an index, with variable length
+    strings decoded to str
+    """
+
+    def read(key):
+        # h5py doesn't slice scalar variables, which netCDF4 allows
+        data = var[key if var.shape else ()]
+        if strings:
+            data = np.array(
+                [_string(value) for value in np.ravel(data)], dtype=object
+            ).reshape(np.shape(data))
+        return data
+
+    return read
+
+
+class H5NetCDFDataset(ReadOnlyDataset):
+    """
+    A netCDF-4 file read with h5netcdf.  Checks of these datasets don't
+    hold NETCDF_LOCK, so they can run in threads alongside checks of netCDF4
+    datasets, although h5py serializes each HDF5 call behind its own lock.
+
+    Only the root group is read, and user defined types aren't supported.
+
+    :param str path: Path of the netCDF-4 file
+    """
+
+    disk_format = "HDF5"
+
+    def __init__(self, path):
+        if h5netcdf is None:
+            raise RuntimeError(
+                "The h5netcdf dataset backend requires h5netcdf to be installed"
+            )
+        self._file = h5netcdf.File(path, "r")
+        try:
+            # files written as NETCDF4_CLASSIC are marked by _nc3_strict,
+            # which h5netcdf hides from the attributes
+            classic = "_nc3_strict" in self._file._h5file.attrs
+            super(H5NetCDFDataset, self).__init__(
+                path,
+                _attributes(self._file.attrs),
+                "NETCDF4_CLASSIC" if classic else "NETCDF4",
+            )
+            for name, dim in self._file.dimensions.items():
+                self.dimensions[name] = ReadOnlyDimension(
+                    name, len(dim), dim.isunlimited()
+                )
+            for name, var in self._file.variables.items():
+                dtype = var.dtype
+                strings = dtype is str or dtype.kind == "O"
+                self.variables[name] = ReadOnlyVariable(
+                    self,
+                    name,
+                    var.dimensions,
+                    str if strings else dtype,
+                    var.shape,
+                    _attributes(var.attrs),
+                    _reader(var, strings),
+                )
+        except Exception:
+            self._file.close()
+            raise
+
+    def close(self):
+        if not self._closed:
+            self._file.close()
+        super(H5NetCDFDataset, self).close()
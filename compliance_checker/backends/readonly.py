@@ -0,0 +1,254 @@
+"""
+Read-only datasets with the parts of the netCDF4.Dataset interface the
+checkers use, for backends which read datasets without the netCDF library
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from netCDF4 import chartostring, default_fillvals
+
+
+def _equal(data, value):
+    """
+    Returns where data equals value, treating NaN as equal to NaN
+    """
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return np.isnan(data)
+    return data == value
+
+
+def mask_and_scale(data, attributes, mask=True, scale=True):
+    """
+    Masks and scales raw variable data the way netCDF4 does by default:
+    missing values, fill values and values outside of the valid range are
+    masked, and packed data is unpacked with scale_factor and add_offset
+
+    :param numpy.ndarray data: Raw data read from a variable
+    :param dict attributes: The attributes of the variable
+    :param bool mask: Whether to mask the data
+    :param bool scale: Whether to unpack packed data
+    :rtype: numpy.ma.MaskedArray
+    """
+    # netCDF4 compares the default fill value of the signed type with the
+    # unsigned data, which never masks it
+    default_fill = default_fillvals.get(data.dtype.str[1:])
+    if attributes.get("_Unsigned") == "true" and data.dtype.kind == "i":
+        data = data.view(data.dtype.str.replace("i", "u"))
+        default_fill = None
+    data = np.ma.masked_array(data)
+    if mask and data.dtype.kind in "iufc":
+        invalid = np.zeros(data.shape, dtype=bool)
+        for value in np.ravel(attributes.get("missing_value", [])):
+            invalid |= _equal(data.data, value)
+        if "_FillValue" in attributes:
+            fill_values = np.ravel(attributes["_FillValue"])
+        else:
+            fill_values = [default_fill]
+        for value in fill_values:
+            if value is not None:
+                invalid |= _equal(data.data, data.dtype.type(value))
+        valid_min = attributes.get("valid_min")
+        valid_max = attributes.get("valid_max")
+        if "valid_range" in attributes:
+            valid_min, valid_max = np.ravel(attributes["valid_range"])[:2]
+        if valid_min is not None:
+            invalid |= data.data < valid_min
+        if valid_max is not None:
+            invalid |= data.data > valid_max
+        data = np.ma.masked_where(invalid, data, copy=False)
+        if data.ndim == 0 and invalid:
+            # like netCDF4, a masked scalar is the masked constant
+            return np.ma.masked
+    if scale and ("scale_factor" in attributes or "add_offset" in attributes):
+        data = data * attributes.get("scale_factor", 1) + attributes.get(
+            "add_offset", 0
+        )
+    return data
+
+
+class ReadOnlyDimension(object):
+    """
+    A dimension of a ReadOnlyDataset
+    """
+
+    def __init__(self, name, size, unlimited=False):
+        self.name = name
+        self.size = size
+        self._unlimited = unlimited
+
+    def __len__(self):
+        return self.size
+
+    def isunlimited(self):
+        return self._unlimited
+
+    def __repr__(self):
+        return "<{} {}: size = {}{}>".format(
+            type(self).__name__,
+            self.name,
+            self.size,
+            ", unlimited" if self._unlimited else "",
+        )
+
+
+class _Attributes(object):
+    """
+    netCDF attributes, read with ncattrs and getncattr or as python
+    attributes of the object
+    """
+
+    def ncattrs(self):
+        return list(self._attributes)
+
+    def getncattr(self, name):
+        try:
+            return self._attributes[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getattr__(self, name):
+        # only called for names which aren't python attributes
+        if name.startswith("__") or name == "_attributes":
+            raise AttributeError(name)
+        return self.getncattr(name)
+
+
+class ReadOnlyVariable(_Attributes):
+    """
+    A variable of a ReadOnlyDataset.  Reads are served by calling read with
+    the index, which returns the raw data, and are masked and scaled like
+    netCDF4 does by default.
+
+    :param ReadOnlyDataset dataset: Dataset of the variable
+    :param str name: Name of the variable
+    :param tuple dimensions: Names of the dimensions of the variable
+    :param dtype: numpy dtype of the data, or str for variable length strings
+    :param tuple shape: Shape of the variable
+    :param dict attributes: Attributes of the variable, in order
+    :param function read: Returns the raw data at an index
+    """
+
+    def __init__(self, dataset, name, dimensions, dtype, shape, attributes, read):
+        self._dataset = dataset
+        self.name = self._name = name
+        self.dimensions = tuple(dimensions)
+        self.dtype = self.datatype = dtype
+        self.shape = tuple(shape)
+        self._attributes = OrderedDict(attributes)
+        self._read = read
+        self.mask = True
+        self.scale = True
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        if not self.shape:
+            raise TypeError("len() of unsized object")
+        return self.shape[0]
+
+    def group(self):
+        return self._dataset
+
+    def set_auto_mask(self, mask):
+        self.mask = bool(mask)
+
+    def set_auto_scale(self, scale):
+        self.scale = bool(scale)
+
+    def set_auto_maskandscale(self, maskandscale):
+        self.mask = self.scale = bool(maskandscale)
+
+    def __getitem__(self, key):
+        data = np.asarray(self._read(key))
+        if self.dtype is str:
+            return data
+        if data.dtype.kind == "S" and "_Encoding" in self._attributes:
+            return chartostring(data, encoding=self._attributes["_Encoding"])
+        return mask_and_scale(data, self._attributes, self.mask, self.scale)
+
+    def __array__(self):
+        return self[...]
+
+    def __repr__(self):
+        return "<{} {} {}{}>".format(
+            type(self).__name__, self.dtype, self.name, self.dimensions
+        )
+
+
+class ReadOnlyDataset(_Attributes):
+    """
+    A dataset opened read only by a backend other than netCDF4, which only
+    has the root group.  Backends build its dimensions and variables and
+    release their resources in close.
+
+    :param str path: Path of the dataset
+    :param dict attributes: Global attributes, in order
+    :param str data_model: netCDF data model of the dataset
+    """
+
+    disk_format = "UNDEFINED"
+
+    def __init__(self, path, attributes, data_model="NETCDF4"):
+        self._path = path
+        self._attributes = OrderedDict(attributes)
+        self.data_model = self.file_format = data_model
+        self.dimensions = OrderedDict()
+        self.variables = OrderedDict()
+        self.groups = OrderedDict()
+        self._closed = False
+
+    def getncattr(self, name):
+        # global attribute reads are recorded like MemoizedDataset does
+        reads = self.__dict__.get("_attribute_reads")
+        if reads is not None:
+            reads.add(name)
+        return super(ReadOnlyDataset, self).getncattr(name)
+
+    def filepath(self):
+        return self._path
+
+    def get_variables_by_attributes(self, **kwargs):
+        """
+        Returns the variables whose attributes match kwargs, like
+        netCDF4.Dataset.get_variables_by_attributes.  Values may be
+        functions, which are called with the value of the attribute or
+        None.
+        """
+        variables = []
+        for variable in self.variables.values():
+            matched = False
+            for name, value in kwargs.items():
+                if callable(value):
+                    matched = value(getattr(variable, name, None))
+                    if matched is False:
+                        break
+                elif hasattr(variable, name) and getattr(variable, name) == value:
+                    matched = True
+                else:
+                    matched = False
+                    break
+            if matched is True:
+                variables.append(variable)
+        return variables
+
+    def isopen(self):
+        return not self._closed
+
+    def close(self):
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, self._path)
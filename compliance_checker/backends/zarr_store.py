@@ -0,0 +1,150 @@
+"""
+Reads Zarr stores laid out like netCDF datasets, as written by xarray, with
+the dimensions of each array named in its _ARRAY_DIMENSIONS attribute
+"""
+import os
+
+import numpy as np
+
+from compliance_checker.backends.readonly import (
+    ReadOnlyDataset,
+    ReadOnlyDimension,
+    ReadOnlyVariable,
+)
+from compliance_checker.concurrency import io_executor
+
+
+# zarr is an optional dependency of this backend
+try:
+    import zarr
+except ImportError:
+    zarr = None
+
+
+def _attribute_value(value):
+    """
+    Returns an attribute value decoded from the JSON of .zattrs as netCDF4
+    returns it: lists of strings are lists unless they have one element, and
+    numbers and lists of numbers are numpy scalars and arrays
+    """
+    if isinstance(value, list):
+        if value and all(isinstance(v, str) for v in value):
+            return value[0] if len(value) == 1 else value
+        value = np.array(value)
+        return value[0] if value.size == 1 else value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return np.array(value)[()]
+    return value
+
+
+def _attributes(array):
+    attributes = [
+        (name, _attribute_value(value))
+        for name, value in array.attrs.asdict().items()
+        if name != "_ARRAY_DIMENSIONS"
+    ]
+    # xarray keeps the _FillValue of an array as the fill value of the array
+    # rather than an attribute.  zarr gives arrays created without one a fill
+    # value of 0, which can't be told apart from one set explicitly, so it
+    # isn't taken as a _FillValue, or data which is 0 would be masked.
+    fill_value = getattr(array, "fill_value", None)
+    if (
+        fill_value is not None
+        and fill_value != 0
+        and array.dtype.kind in "iufc"
+        and "_FillValue" not in dict(attributes)
+    ):
+        attributes.append(("_FillValue", array.dtype.type(fill_value)))
+    return attributes
+
+
+def _slabs(array):
+    """
+    Returns the selections of the slabs of chunks along the first dimension
+    of array, which together select all of it
+    """
+    size, step = array.shape[0], array.chunks[0]
+    return [slice(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def _reader(array, strings):
+    """
+    Returns a function reading array at an index.  Only the chunks holding
+    the selection are read, and reads of all of an array with more than one
+    slab of chunks read the slabs in parallel in the shared I/O threads.
+    """
+
+    def read(key):
+        keys = key if isinstance(key, tuple) else (key,)
+        if not array.shape:
+            data = array[()]
+        elif (
+            all(
+                k is Ellipsis or (isinstance(k, slice) and k == slice(None))
+                for k in keys
+            )
+            and array.shape[0] > array.chunks[0]
+        ):
+            slabs = io_executor().map(array.__getitem__, _slabs(array))
+            data = np.concatenate(list(slabs))
+        elif any(isinstance(k, (list, np.ndarray)) for k in keys):
+            # netCDF4 indexes with sequences orthogonally
+            data = array.oindex[key]
+        else:
+            data = array[key]
+        if strings:
+            data = np.asarray(data, dtype=object)
+        return data
+
+    return read
+
+
+class ZarrDataset(ReadOnlyDataset):
+    """
+    A Zarr store read as a netCDF-4 dataset.  Global attributes come from
+    the .zattrs of the root group, and variables from its arrays, whose
+    dimensions are named by their _ARRAY_DIMENSIONS attribute.  Data is
+    read lazily, chunk by chunk, when the checks read it.
+
+    Only the root group is read.
+
+    :param str path: Path of the Zarr store
+    """
+
+    def __init__(self, path):
+        if zarr is None:
+            raise RuntimeError("Reading Zarr stores requires zarr to be installed")
+        if os.path.isfile(os.path.join(path, ".zmetadata")):
+            group = zarr.open_consolidated(path, mode="r")
+        else:
+            group = zarr.open_group(path, mode="r")
+        super(ZarrDataset, self).__init__(
+            path, [(k, _attribute_value(v)) for k, v in group.attrs.asdict().items()]
+        )
+        self._group = group
+        for name, array in group.arrays():
+            dimensions = array.attrs.get("_ARRAY_DIMENSIONS")
+            if dimensions is None or len(dimensions) != array.ndim:
+                raise ValueError(
+                    "Zarr array {} does not name its dimensions in "
+                    "_ARRAY_DIMENSIONS".format(name)
+                )
+            for dim, size in zip(dimensions, array.shape):
+                dim_size = len(
+                    self.dimensions.setdefault(dim, ReadOnlyDimension(dim, size))
+                )
+                if dim_size != size:
+                    raise ValueError(
+                        "Zarr array {} has size {} along dimension {}, which "
+                        "has size {}".format(name, size, dim, dim_size)
+                    )
+            strings = array.dtype.kind in "OU"
+            self.variables[name] = ReadOnlyVariable(
+                self,
+                name,
+                dimensions,
+                str if strings else array.dtype,
+                array.shape,
+                _attributes(array),
+                _reader(array, strings),
+            )
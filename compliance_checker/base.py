@@ -8,10 +8,12 @@ import itertools
 import pprint
 import re
 import sys
+import time
 import warnings
 
 from collections import defaultdict
-from functools import wraps
+from datetime import datetime
+from functools import lru_cache, wraps
 from io import StringIO
 
 import validators
@@ -25,7 +27,11 @@ from owslib.swe.sensor.sml import SensorML
 import compliance_checker.cfutil as cfutil
 
 from compliance_checker import MemoizedDataset, __version__
-from compliance_checker.util import kvp_convert
+from compliance_checker.backends.hdf5 import H5NetCDFDataset
+from compliance_checker.backends.readonly import ReadOnlyDataset
+from compliance_checker.backends.zarr_store import ZarrDataset
+from compliance_checker.planner import HeaderDataset, PlannedDataset
+from compliance_checker.util import json_float, kvp_convert
 
 
 # Python 3.5+ should work, also have a fallback
@@ -105,12 +111,23 @@ class ValidationObject(object):
             return True, None
 
 
+# the same contact addresses and URLs turn up in dataset after dataset
+@lru_cache(1024)
+def _valid_email(input_value):
+    return bool(validators.email(input_value))
+
+
+@lru_cache(1024)
+def _valid_url(input_value):
+    return bool(validators.url(input_value))
+
+
 class EmailValidator(ValidationObject):
     validator_fail_msg = "{} must be a valid email address"
     expected_type = str
 
     def validator_func(self, input_value):
-        return validators.email(input_value)
+        return _valid_email(input_value)
 
 
 class RegexValidator(ValidationObject):
@@ -127,7 +144,7 @@ class UrlValidator(ValidationObject):
     expected_type = str
 
     def validator_func(self, input_value):
-        return bool(validators.url(input_value))
+        return _valid_url(input_value)
 
 
 # Simple class for Generic File type (default to this if file not recognised)
@@ -150,6 +167,10 @@ class BaseCheck(object):
 
     _cc_checker_version = __version__
     _cc_display_headers = {3: "High Priority", 2: "Medium Priority", 1: "Low Priority"}
+    # names of the checks which read variable data, so that the results of
+    # the other checks can be reused between datasets with the same header.
+    # None if unknown, in which case no results are reused.
+    _cc_data_checks = None
 
     supported_ds = []
 
@@ -205,7 +226,15 @@ class BaseNCCheck(object):
     Base Class for NetCDF Dataset supporting Check Suites.
     """
 
-    supported_ds = {Dataset, MemoizedDataset}
+    supported_ds = {
+        Dataset,
+        MemoizedDataset,
+        PlannedDataset,
+        HeaderDataset,
+        ReadOnlyDataset,
+        H5NetCDFDataset,
+        ZarrDataset,
+    }
 
     @classmethod
     def std_check_in(cls, dataset, name, allowed_vals):
@@ -310,10 +339,54 @@ class Result(object):
             "children": [i.serialize() for i in self.children],
         }
 
+    def to_primitive(self):
+        """
+        Returns a dictionary of JSON-compatible primitives representing the
+        result object and its children.  Equivalent to passing the output of
+        serialize() through CheckSuite.serialize, but converts the known
+        Result fields directly instead of type checking every node.
+        """
+        name = self.name
+        if type(name) is tuple:
+            name = list(name)
+        value = self.value
+        if type(value) in (tuple, list):
+            value = [json_float(v) for v in value]
+        else:
+            value = json_float(value)
+        msgs = self.msgs
+        if not all(type(m) is str for m in msgs):
+            msgs = [_to_primitive(m) for m in msgs]
+        else:
+            msgs = list(msgs)
+        return {
+            "name": name,
+            "weight": self.weight,
+            "value": value,
+            "msgs": msgs,
+            "children": [c.to_primitive() for c in self.children],
+        }
+
     def __eq__(self, other):
         return self.serialize() == other.serialize()
 
 
+def _to_primitive(o):
+    """
+    Generic conversion of a nested object into JSON-compatible primitives,
+    used for the uncommon fields which are not plain strings or numbers.
+    """
+    if isinstance(o, (list, tuple)):
+        return [_to_primitive(i) for i in o]
+    if isinstance(o, dict):
+        return {k: _to_primitive(v) for k, v in o.items()}
+    if isinstance(o, datetime):
+        return o.isoformat()
+    if isinstance(o, Result):
+        return o.to_primitive()
+    return json_float(o)
+
+
 class TestCtx(object):
     """
     Simple struct object that holds score values and messages to compile into a result
@@ -414,178 +487,413 @@ def maybe_get_global_attr(attr_name, ds):
         return False, [err_msg.format(attr_name)]
 
 
-def attr_check(kvp, ds, priority, ret_val, gname=None, var_name=None):
+class AttributeRequirement(object):
+    """
+    An attribute requirement of check_has or attr_check, compiled once into
+    the evaluator for its kind so that checking a dataset against it does
+    not need to work out what kind of requirement it is again.  Calling it
+    with a dataset appends the Result of the requirement, if any, to ret_val.
+
+    :param str name: the attribute being checked
+    :param other: None, allowed values, XPath, ValidationObject, compiled
+                  regular expression or function, as taken by attr_check
+    :param int priority: priority level of check
+    :param str or None gname: group name assigned to a group of attribute Results
+    :param str or None var_name: name of the variable which contains this attribute
     """
-    Handles attribute checks for simple presence of an attribute, presence of
-    one of several attributes, and passing a validation function.  Returns a
-    status along with an error message in the event of a failure.  Mutates
-    ret_val parameter
 
-    :param tuple(str, func) or str l: the attribute being checked
-    :param netCDF4 dataset ds       : dataset being checked
-    :param int priority             : priority level of check
-    :param list ret_val             : result to be returned
-    :param str or None gname        : group name assigned to a group of attribute Results
-    :param str or None var_name     : name of the variable which contains this attribute
+    def __init__(self, name, other, priority, gname=None, var_name=None):
+        self.name = name
+        self.other = other
+        self.priority = priority
+        self.var_name = var_name
+        # gname arg allows the global attrs to be grouped together
+        self.result_name = gname if gname else name
+        if var_name is not None:
+            self.display_name = "attribute {} in variable {}".format(name, var_name)
+        else:
+            self.display_name = name
+
+    def base_context(self, ds):
+        if self.var_name is not None:
+            return ds.variables[self.var_name]
+        return ds
+
+    def __call__(self, ds, ret_val):
+        raise NotImplementedError
+
+
+class PresenceRequirement(AttributeRequirement):
+    """
+    The attribute is present and not empty or completely whitespace
     """
 
-    msgs = []
-    name, other = kvp
-    if var_name is not None:
-        display_name = "attribute {} in variable {}".format(name, var_name)
-        base_context = ds.variables[var_name]
-    else:
-        display_name = name
-        base_context = ds
-    if other is None:
-        res = std_check(ds, name)
+    def __call__(self, ds, ret_val):
+        msgs = []
+        res = std_check(ds, self.name)
         if not res:
-            msgs = ["{} not present".format(display_name)]
+            msgs = ["{} not present".format(self.display_name)]
         else:
             try:
                 # see if this attribute is a string, try stripping
                 # whitespace, and return an error if empty
-                att_strip = base_context.getncattr(name).strip()
+                att_strip = self.base_context(ds).getncattr(self.name).strip()
                 if not att_strip:
                     res = False
-                    msgs = ["{} is empty or completely whitespace".format(display_name)]
+                    msgs = [
+                        "{} is empty or completely whitespace".format(self.display_name)
+                    ]
             # if not a string/has no strip method we should be OK
             except AttributeError:
                 pass
 
-        # gname arg allows the global attrs to be grouped together
         ret_val.append(
             Result(
-                priority,
+                self.priority,
                 value=res,
-                name=gname if gname else name,
+                name=self.result_name,
                 msgs=msgs,
-                variable_name=var_name,
+                variable_name=self.var_name,
             )
         )
-    elif hasattr(other, "__iter__"):
-        # redundant, we could easily do this with a hasattr
-        # check instead
-        res = std_check_in(base_context, name, other)
+
+
+class AllowedValuesRequirement(AttributeRequirement):
+    """
+    The attribute is present and one of the allowed values
+    """
+
+    def __call__(self, ds, ret_val):
+        msgs = []
+        res = std_check_in(self.base_context(ds), self.name, self.other)
         if res == 0:
-            msgs.append("{} not present".format(display_name))
+            msgs.append("{} not present".format(self.display_name))
         elif res == 1:
             msgs.append(
                 "{} present, but not in expected value list ({})".format(
-                    display_name, sorted(other)
+                    self.display_name, sorted(self.other)
                 )
             )
 
         ret_val.append(
             Result(
-                priority,
+                self.priority,
                 (res, 2),
-                gname if gname else name,  # groups Globals if supplied
+                self.result_name,
                 msgs,
-                variable_name=var_name,
+                variable_name=self.var_name,
             )
         )
-    # if we have an XPath expression, call it on the document
-    elif type(other) is etree.XPath:
-        # TODO: store tree instead of creating it each time?
+
+
+class XPathRequirement(AttributeRequirement):
+    """
+    The document has elements matching the XPath
+    """
+
+    def __call__(self, ds, ret_val):
         # no execution path for variable
-        res = xpath_check(ds._root, other)
-        if not res:
-            msgs = ["XPath for {} not found".format(display_name)]
+        res = xpath_check(ds._root, self.other)
+        msgs = [] if res else ["XPath for {} not found".format(self.display_name)]
         ret_val.append(
             Result(
-                priority, res, gname if gname else name, msgs, variable_name=var_name
+                self.priority, res, self.result_name, msgs, variable_name=self.var_name
             )
         )
-    # check if this is a subclass of ValidationObject
-    elif isinstance(other, ValidationObject):
-        attr_result = maybe_get_global_attr(name, ds)
+
+
+class ValidatorRequirement(AttributeRequirement):
+    """
+    The global attribute is present and passes a ValidationObject
+    """
+
+    def __call__(self, ds, ret_val):
+        attr_result = maybe_get_global_attr(self.name, ds)
         if not attr_result[0]:
             res_tup = attr_result
         else:
-            check_val = attr_result[1]
-            res_tup = other.validate(name, check_val)
+            res_tup = self.other.validate(self.name, attr_result[1])
 
         msgs = [] if res_tup[1] is None else res_tup[1]
 
-        ret_val.append(Result(priority, res_tup[0], name, msgs))
-    elif isinstance(other, re_pattern_type):
-        attr_result = maybe_get_global_attr(name, ds)
+        ret_val.append(Result(self.priority, res_tup[0], self.name, msgs))
+
+
+class RegexRequirement(AttributeRequirement):
+    """
+    The global attribute, if present, is a string matching a regular
+    expression.  There is no Result if it is not present.
+    """
+
+    def __call__(self, ds, ret_val):
+        attr_result = maybe_get_global_attr(self.name, ds)
         if not attr_result[0]:
-            return attr_result
-        else:
-            check_val = attr_result[1]
+            return
+        check_val = attr_result[1]
         if not isinstance(check_val, str):
             res = False
-            msgs = ["{} must be a string".format(name)]
-        elif not other.search(check_val):
+            msgs = ["{} must be a string".format(self.name)]
+        elif not self.other.search(check_val):
             res = False
-            msgs = ["{} must match regular expression {}".format(name, other)]
+            msgs = ["{} must match regular expression {}".format(self.name, self.other)]
         else:
             res = True
             msgs = []
 
         ret_val.append(
-            Result(priority, value=res, name=gname if gname else name, msgs=msgs)
+            Result(self.priority, value=res, name=self.result_name, msgs=msgs)
         )
 
-    # if the attribute is a function, call it
-    # right now only supports single attribute
-    # important note: current magic approach uses all functions
-    # starting with "check".  Avoid naming check functions
-    # starting with check if you want to pass them in with
-    # a tuple to avoid them being checked more than once
-    elif hasattr(other, "__call__"):
-        # check that the attribute is actually present.
-        # This reduces boilerplate in functions by not needing
-        # to check whether the attribute is present every time
-        # and instead focuses on the core functionality of the
-        # test
 
-        res = other(base_context)  # call the method on the dataset
+class FunctionRequirement(AttributeRequirement):
+    """
+    A function called with the dataset, or the variable, returns a Result
+    factory taking the priority, or a false value if the attribute is not
+    present
+    """
+
+    def __call__(self, ds, ret_val):
+        res = self.other(self.base_context(ds))  # call the method on the dataset
         if not res:
-            msgs = ["{} not present".format(display_name)]
+            msgs = ["{} not present".format(self.display_name)]
             ret_val.append(
                 Result(
-                    priority,
+                    self.priority,
                     res,
-                    gname if gname else name,
+                    self.result_name,
                     msgs,
-                    variable_name=var_name,
+                    variable_name=self.var_name,
                 )
             )
         else:
-            ret_val.append(res(priority))
+            ret_val.append(res(self.priority))
+
+
+def compile_requirement(kvp, priority, gname=None, var_name=None):
+    """
+    Compiles an attribute requirement of check_has or attr_check into an
+    AttributeRequirement of the matching kind
+
+    :param tuple(str, other) kvp: the attribute being checked, and None,
+                                  allowed values, XPath, ValidationObject,
+                                  compiled regular expression or function
+    :param int priority             : priority level of check
+    :param str or None gname        : group name assigned to a group of attribute Results
+    :param str or None var_name     : name of the variable which contains this attribute
+    :rtype: AttributeRequirement
+    """
+    name, other = kvp
+    if other is None:
+        requirement_type = PresenceRequirement
+    elif hasattr(other, "__iter__"):
+        requirement_type = AllowedValuesRequirement
+    # if we have an XPath expression, call it on the document
+    elif type(other) is etree.XPath:
+        requirement_type = XPathRequirement
+    # check if this is a subclass of ValidationObject
+    elif isinstance(other, ValidationObject):
+        requirement_type = ValidatorRequirement
+    elif isinstance(other, re_pattern_type):
+        requirement_type = RegexRequirement
+    # if the attribute is a function, call it
+    # right now only supports single attribute
+    # important note: current magic approach uses all functions
+    # starting with "check".  Avoid naming check functions
+    # starting with check if you want to pass them in with
+    # a tuple to avoid them being checked more than once
+    elif hasattr(other, "__call__"):
+        requirement_type = FunctionRequirement
     # unsupported second type in second
     else:
         raise TypeError(
             "Second arg in tuple has unsupported type: {}".format(type(other))
         )
+    return requirement_type(name, other, priority, gname, var_name)
+
+
+def compile_requirements(attributes, priority, gname=None):
+    """
+    Compiles the attribute requirements returned by a check_has decorated
+    method
+
+    :param attributes: list of attribute names and/or (name, other) tuples,
+                       or an OrderedDict of them
+    :param int priority: priority level of check
+    :param str or None gname: group name assigned to a group of attribute Results
+    :rtype: tuple
+    :return: AttributeRequirements in the order of the attributes
+    """
+    return tuple(
+        compile_requirement(kvp, priority, gname)
+        for kvp in kvp_convert(attributes).items()
+    )
 
+
+def attr_check(kvp, ds, priority, ret_val, gname=None, var_name=None):
+    """
+    Handles attribute checks for simple presence of an attribute, presence of
+    one of several attributes, and passing a validation function.  Returns a
+    status along with an error message in the event of a failure.  Mutates
+    ret_val parameter
+
+    :param tuple(str, func) or str l: the attribute being checked
+    :param netCDF4 dataset ds       : dataset being checked
+    :param int priority             : priority level of check
+    :param list ret_val             : result to be returned
+    :param str or None gname        : group name assigned to a group of attribute Results
+    :param str or None var_name     : name of the variable which contains this attribute
+    """
+    compile_requirement(kvp, priority, gname, var_name)(ds, ret_val)
     return ret_val
 
 
+def _requirements_key(attributes):
+    """
+    Returns a shallow copy of the requirements returned by a check_has
+    decorated method, which compares equal to them for as long as they are
+    not changed
+    """
+    if isinstance(attributes, dict):
+        return tuple(attributes.items())
+    return tuple(attributes)
+
+
 def check_has(priority=BaseCheck.HIGH, gname=None):
     """Decorator to wrap a function to check if a dataset has given attributes.
+    The requirements returned by the function are compiled once per checker
+    class, and the compiled requirements are reused for as long as the
+    function returns equal requirements.
     :param function func: function to wrap"""
 
     def _inner(func):
+        # checker class -> (requirements, compiled requirements)
+        plans = {}
+
         def _dec(s, ds):
-            attr_process = kvp_convert(func(s, ds))
+            attributes = func(s, ds)
+            key = _requirements_key(attributes)
+            plan = plans.get(type(s))
+            if plan is None or plan[0] != key:
+                plan = key, compile_requirements(attributes, priority, gname)
+                plans[type(s)] = plan
 
             ret_val = []
             # could potentially run tests in parallel if we eliminated side
             # effects on `ret_val`
-            for kvp in attr_process.items():
+            for requirement in plan[1]:
                 # function mutates ret_val
-                attr_check(kvp, ds, priority, ret_val, gname)
+                requirement(ds, ret_val)
             return ret_val
 
-        return wraps(func)(_dec)
+        _dec = wraps(func)(_dec)
+        # lets attribute tables evaluate the rules in bulk, see batch.py
+        _dec._cc_check_has = (priority, gname)
+        _dec._cc_requirement_plans = plans
+        return _dec
 
     return _inner
 
 
+class VariableVisitor(object):
+    """
+    Callbacks of a check which visits each variable of a dataset, or each of
+    their attributes, and the function returning the result of the check
+    once every variable has been visited.
+
+    :param function result: returns the result of the check
+    :param function visit_variable: called with the name of each variable,
+                                    the variable and its attribute names
+    :param function visit_attribute: called with the name of each variable,
+                                     the variable and each attribute name
+    :param attributes: names of the attributes visit_attribute is called
+                       with, or None for all attributes
+    """
+
+    def __init__(
+        self, result, visit_variable=None, visit_attribute=None, attributes=None
+    ):
+        self.result = result
+        self.visit_variable = visit_variable
+        self.visit_attribute = visit_attribute
+        self.attributes = None if attributes is None else frozenset(attributes)
+        # (exception, traceback) raised by a callback
+        self.error = None
+        # wall and CPU time spent in the callbacks, when the walk is timed
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+
+    def finish(self):
+        """
+        Returns the result of the check, or raises the exception a callback
+        raised while visiting
+        """
+        if self.error is not None:
+            exc, tb = self.error
+            raise exc.with_traceback(tb)
+        return self.result()
+
+
+def walk_variables(ds, visitors, timed=False):
+    """
+    Visits the variables of a dataset in one traversal, reading each
+    variable and the names of its attributes once for all of the visitors.
+    Visitors whose callbacks raise keep the error and aren't called again.
+
+    :param netCDF4.Dataset ds: An open netCDF dataset
+    :param list visitors: VariableVisitor instances
+    :param bool timed: Whether to add the time spent in the callbacks of
+                       each visitor to its wall_time and cpu_time
+    """
+    visitors = [v for v in visitors if v.error is None]
+    for name, variable in ds.variables.items():
+        if not visitors:
+            break
+        attributes = variable.ncattrs()
+        failed = False
+        for visitor in visitors:
+            if timed:
+                start_wall, start_cpu = time.perf_counter(), time.process_time()
+            try:
+                if visitor.visit_variable is not None:
+                    visitor.visit_variable(name, variable, attributes)
+                if visitor.visit_attribute is not None:
+                    for attribute in attributes:
+                        if (
+                            visitor.attributes is None
+                            or attribute in visitor.attributes
+                        ):
+                            visitor.visit_attribute(name, variable, attribute)
+            except Exception as e:
+                visitor.error = (e, sys.exc_info()[2])
+                failed = True
+            if timed:
+                visitor.wall_time += time.perf_counter() - start_wall
+                visitor.cpu_time += time.process_time() - start_cpu
+        if failed:
+            visitors = [v for v in visitors if v.error is None]
+
+
+def visits_variables(func):
+    """
+    Decorator for check methods which return a VariableVisitor rather than
+    their results.  The wrapped method visits the variables and returns the
+    result of the visitor, so it's called like any other check, while
+    CheckSuite makes the visitors of all such checks of a checker through
+    `_cc_visitor` and visits the variables once for all of them.
+
+    :param function func: check method returning a VariableVisitor
+    """
+
+    def _dec(s, ds):
+        visitor = func(s, ds)
+        walk_variables(ds, [visitor])
+        return visitor.finish()
+
+    _dec = wraps(func)(_dec)
+    _dec._cc_visitor = func
+    return _dec
+
+
 def fix_return_value(v, method_name, method=None, checker=None):
     """
     Transforms scalar return values into Result.
@@ -0,0 +1,479 @@
+"""
+Columnar tables of the attributes of many datasets, used to evaluate the
+attribute rules of `check_has` checks across all of the datasets at once
+rather than one dataset at a time
+"""
+import inspect
+
+import numpy as np
+
+from netCDF4 import Dataset
+
+from compliance_checker.base import (
+    FunctionRequirement,
+    Result,
+    XPathRequirement,
+    compile_requirement,
+    fix_return_value,
+)
+from compliance_checker.concurrency import NETCDF_LOCK
+from compliance_checker.util import kvp_convert
+
+
+# variable code of the rows of global attributes
+GLOBAL = -1
+
+# value code of datasets without an attribute
+MISSING = -1
+
+# attribute value of datasets without the attribute
+_ABSENT = object()
+
+
+def _value_key(value):
+    """
+    Returns a hashable key for an attribute value which tells apart values
+    of different types
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, np.ndarray):
+        return value.dtype.str, tuple(value.ravel().tolist())
+    if isinstance(value, np.generic):
+        return value.dtype.str, value.item()
+    if isinstance(value, list):
+        return "list", tuple(_value_key(v) for v in value)
+    return type(value).__name__, value
+
+
+class _Encoder(object):
+    """
+    Assigns consecutive codes to distinct keys, keeping their values
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value, key=None):
+        key = value if key is None else key
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class AttributeTable(object):
+    """
+    The global and variable attributes of many datasets, one row per
+    attribute of each dataset, kept as columns of integer codes:
+
+    * dataset: index of the dataset in `locations`
+    * variable: index of the variable name in `variables`, or GLOBAL
+    * name: index of the attribute name in `names`
+    * value: index of the attribute value in `values`
+
+    Equal values are stored once, so rules on attribute values are evaluated
+    once per distinct value rather than once per dataset.
+    """
+
+    def __init__(
+        self, locations, dataset, variable, name, value, variables, names, values
+    ):
+        self.locations = list(locations)
+        self.dataset = np.asarray(dataset, dtype=np.int64)
+        self.variable = np.asarray(variable, dtype=np.int64)
+        self.name = np.asarray(name, dtype=np.int64)
+        self.value = np.asarray(value, dtype=np.int64)
+        self.variables = list(variables)
+        self.names = list(names)
+        self.values = list(values)
+        self._name_codes = {n: i for i, n in enumerate(self.names)}
+        self._variable_codes = {v: i for i, v in enumerate(self.variables)}
+        # variable code -> name codes and rows of its attributes
+        self._index = {}
+
+    def __len__(self):
+        return len(self.dataset)
+
+    @property
+    def n_datasets(self):
+        return len(self.locations)
+
+    @classmethod
+    def from_datasets(cls, datasets, locations=None):
+        """
+        Reads the attributes of open netCDF datasets, and of the variables in
+        their root groups
+
+        :param datasets: Iterable of open netCDF datasets
+        :param locations: Locations of the datasets, defaults to their paths
+        :rtype: AttributeTable
+        """
+        columns = ([], [], [], [])
+        variables, names, values = _Encoder(), _Encoder(), _Encoder()
+        found = []
+        for index, ds in enumerate(datasets):
+            found.append(ds.filepath() if locations is None else locations[index])
+            parts = [(GLOBAL, ds)]
+            parts.extend(
+                (variables.code(var_name), var)
+                for var_name, var in ds.variables.items()
+            )
+            for variable, obj in parts:
+                for attr_name in obj.ncattrs():
+                    attr_value = obj.getncattr(attr_name)
+                    columns[0].append(index)
+                    columns[1].append(variable)
+                    columns[2].append(names.code(attr_name))
+                    columns[3].append(values.code(attr_value, _value_key(attr_value)))
+        return cls(found, *columns, variables.values, names.values, values.values)
+
+    @classmethod
+    def from_paths(cls, paths):
+        """
+        Reads the attributes of netCDF files, opening one file at a time
+
+        :param paths: Iterable of paths of netCDF files
+        :rtype: AttributeTable
+        """
+        paths = list(paths)
+
+        def datasets():
+            for path in paths:
+                with NETCDF_LOCK, Dataset(path) as ds:
+                    yield ds
+
+        return cls.from_datasets(datasets(), paths)
+
+    def column(self, name, variable=None):
+        """
+        Returns the value codes of an attribute in each dataset, MISSING for
+        datasets without it
+
+        :param str name: Attribute name
+        :param str variable: Variable name, or None for a global attribute
+        :rtype: numpy.ndarray
+        """
+        codes = np.full(self.n_datasets, MISSING, dtype=np.int64)
+        name_code = self._name_codes.get(name)
+        variable_code = (
+            GLOBAL if variable is None else self._variable_codes.get(variable)
+        )
+        if name_code is None or variable_code is None:
+            return codes
+        index = self._index.get(variable_code)
+        if index is None:
+            # rows of the variable sorted by name, so the rows of an
+            # attribute are found by bisection
+            rows = np.flatnonzero(self.variable == variable_code)
+            rows = rows[np.argsort(self.name[rows])]
+            index = self._index[variable_code] = self.name[rows], rows
+        names, rows = index
+        rows = rows[
+            np.searchsorted(names, name_code, "left") : np.searchsorted(
+                names, name_code, "right"
+            )
+        ]
+        codes[self.dataset[rows]] = self.value[rows]
+        return codes
+
+    def global_attributes(self, index):
+        """
+        Returns the global attributes of a dataset
+
+        :param int index: Index of the dataset
+        :rtype: dict
+        """
+        start, stop = np.searchsorted(self.dataset, [index, index + 1])
+        return {
+            self.names[self.name[row]]: self.values[self.value[row]]
+            for row in range(start, stop)
+            if self.variable[row] == GLOBAL
+        }
+
+
+class _GlobalAttributes(object):
+    """
+    Stands in for a dataset, with the global attributes of one dataset of a
+    table, for the functions given in attribute rules.  Records the names
+    of the attributes read.
+    """
+
+    def __init__(self, attributes):
+        self._attributes = attributes
+        # None once all of the names have been listed
+        self._reads = set()
+
+    def ncattrs(self):
+        self._reads = None
+        return list(self._attributes)
+
+    def getncattr(self, name):
+        if self._reads is not None:
+            self._reads.add(name)
+        try:
+            return self._attributes[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self.getncattr(name)
+
+
+def _value_outcome(requirement, value):
+    """
+    Returns the (value, name, msgs) of the Result of a compiled presence,
+    allowed value, regular expression or validator requirement on an
+    attribute value, or None if there is no Result
+    """
+    attributes = {} if value is _ABSENT else {requirement.name: value}
+    ret_val = []
+    requirement(_GlobalAttributes(attributes), ret_val)
+    if not ret_val:
+        return None
+    (result,) = ret_val
+    return result.value, result.name, result.msgs
+
+
+class _RuleResults(object):
+    """
+    The outcomes of one attribute rule on every dataset of a table: the
+    outcome of dataset i is outcomes[outcome_ids[i]], either a Result
+    factory taking the priority, None for no Result, or the exception raised
+    """
+
+    def __init__(self, outcome_ids, outcomes):
+        self.outcome_ids = outcome_ids
+        self.outcomes = outcomes
+
+    def outcome(self, index):
+        return self.outcomes[self.outcome_ids[index]]
+
+
+def _result_factory(value, name, msgs):
+    return lambda priority: Result(priority, value, name, list(msgs))
+
+
+def _factorize(codes, n_values):
+    """
+    Returns the distinct value codes of a column, MISSING included, and the
+    index of the value code of each dataset among them
+    """
+    present = np.zeros(n_values + 1, dtype=bool)
+    present[codes + 1] = True
+    positions = np.cumsum(present) - 1
+    return np.flatnonzero(present) - 1, positions[codes + 1]
+
+
+def _evaluate_value_rule(table, requirement):
+    """
+    Evaluates a compiled requirement once per distinct value of the
+    attribute, and once for the datasets without it
+    """
+    codes, outcome_ids = _factorize(table.column(requirement.name), len(table.values))
+    outcomes = []
+    for code in codes:
+        value = _ABSENT if code == MISSING else table.values[code]
+        try:
+            outcome = _value_outcome(requirement, value)
+        except Exception as e:
+            outcomes.append(e)
+            continue
+        outcomes.append(None if outcome is None else _result_factory(*outcome))
+    return _RuleResults(outcome_ids, outcomes)
+
+
+def _evaluate_function_rule(table, name, func, gname):
+    """
+    Evaluates a rule given as a function of the dataset, such as the ACDD
+    date checks, on stand-ins for the datasets.  The function is assumed to
+    only depend on the attributes it reads, so it is called once per
+    distinct combination of their values.
+    """
+    columns = {}
+    outcome_ids = np.empty(table.n_datasets, dtype=np.int64)
+    outcomes = []
+
+    def groups(indices, reads):
+        """Splits datasets into groups with the same values of attributes"""
+        for read in reads:
+            if read not in columns:
+                columns[read] = table.column(read)
+        keys = np.stack([columns[read][indices] for read in reads], axis=1)
+        _, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        return np.split(indices[order], np.flatnonzero(np.diff(inverse[order])) + 1)
+
+    # datasets with the same values of the attributes read so far
+    pending = [(np.arange(table.n_datasets), frozenset())]
+    while pending:
+        indices, reads = pending.pop()
+        if not len(indices):
+            continue
+        attributes = _GlobalAttributes(table.global_attributes(indices[0]))
+        try:
+            res = func(attributes)
+        except Exception as e:
+            outcome = e
+        else:
+            if not res:
+                outcome = _result_factory(
+                    res, gname if gname else name, ["{} not present".format(name)]
+                )
+            else:
+                outcome = res
+        outcome_id = len(outcomes)
+        outcomes.append(outcome)
+        if attributes._reads is None:
+            # the function listed the attributes, so may depend on any
+            outcome_ids[indices[0]] = outcome_id
+            pending.append((indices[1:], reads))
+        elif attributes._reads <= reads:
+            outcome_ids[indices] = outcome_id
+        else:
+            reads = reads | attributes._reads
+            for group in groups(indices, sorted(reads)):
+                if group[0] == indices[0]:
+                    outcome_ids[group] = outcome_id
+                else:
+                    pending.append((group, reads))
+    return _RuleResults(outcome_ids, outcomes)
+
+
+def _evaluate_rule(table, kvp, priority, gname):
+    requirement = compile_requirement(kvp, priority, gname)
+    if isinstance(requirement, FunctionRequirement):
+        return _evaluate_function_rule(
+            table, requirement.name, requirement.other, gname
+        )
+    if isinstance(requirement, XPathRequirement):
+        raise TypeError(
+            "Second arg in tuple has unsupported type for attribute tables: {}".format(
+                type(requirement.other)
+            )
+        )
+    return _evaluate_value_rule(table, requirement)
+
+
+def attribute_checks(checker):
+    """
+    Returns the check methods of a checker instance which are wrapped with
+    `check_has`, by name
+
+    :param checker: Checker instance
+    :rtype: dict
+    """
+    return {
+        name: method
+        for name, method in inspect.getmembers(checker, inspect.ismethod)
+        if name.startswith("check_") and hasattr(method, "_cc_check_has")
+    }
+
+
+class AttributeCheckResults(object):
+    """
+    The results of the `check_has` checks of a checker on every dataset of
+    an attribute table
+    """
+
+    def __init__(self, table, checker, rules):
+        self.table = table
+        self.checker = checker
+        # check name -> (priority, rule results)
+        self.rules = rules
+
+    def results(self, index):
+        """
+        Returns the results of each check on a dataset as they would be for
+        the dataset itself, by check name
+
+        :param int index: Index of the dataset in the table
+        :rtype: dict
+        :return: check name -> (list of Result, None or (exception, traceback))
+        """
+        checks = {}
+        for check_name, (priority, rules) in self.rules.items():
+            method = getattr(self.checker, check_name)
+            check_vals, error = [], None
+            for rule in rules:
+                outcome = rule.outcome(index)
+                if isinstance(outcome, Exception):
+                    # the check stops at its first error
+                    check_vals, error = [], (outcome, outcome.__traceback__)
+                    break
+                if outcome is not None:
+                    check_vals.append(
+                        fix_return_value(
+                            outcome(priority), check_name, method, self.checker
+                        )
+                    )
+            checks[check_name] = check_vals, error
+        return checks
+
+    def scores(self):
+        """
+        Returns the points scored and possible in the checks of each
+        dataset, without building their results.  Checks which raised score
+        no points.
+
+        :rtype: tuple(numpy.ndarray, numpy.ndarray)
+        """
+        n_datasets = self.table.n_datasets
+        scored = np.zeros(n_datasets, dtype=np.int64)
+        possible = np.zeros(n_datasets, dtype=np.int64)
+        for priority, rules in self.rules.values():
+            failed = np.zeros(n_datasets, dtype=bool)
+            check_scored = np.zeros(n_datasets, dtype=np.int64)
+            check_possible = np.zeros(n_datasets, dtype=np.int64)
+            for rule in rules:
+                points = np.zeros((len(rule.outcomes), 2), dtype=np.int64)
+                errors = np.zeros(len(rule.outcomes), dtype=bool)
+                for i, outcome in enumerate(rule.outcomes):
+                    if isinstance(outcome, Exception):
+                        errors[i] = True
+                    elif outcome is not None:
+                        value = outcome(priority).value
+                        if isinstance(value, tuple):
+                            points[i] = value
+                        elif value is not None:
+                            points[i] = int(value), 1
+                check_scored += points[rule.outcome_ids, 0]
+                check_possible += points[rule.outcome_ids, 1]
+                failed |= errors[rule.outcome_ids]
+            scored += np.where(failed, 0, check_scored)
+            possible += np.where(failed, 0, check_possible)
+        return scored, possible
+
+
+def evaluate_attribute_checks(table, checker, check_names=None):
+    """
+    Evaluates the attribute rules of the `check_has` checks of a netCDF
+    checker, such as the ACDD and IOOS global attribute checks, on every
+    dataset of an attribute table.  Presence, allowed value, regular
+    expression and validator rules are evaluated once per distinct
+    attribute value.
+
+    :param AttributeTable table: Attributes of the datasets
+    :param checker: Checker instance
+    :param check_names: Names of the checks to evaluate, defaults to all of
+                        the `check_has` checks of the checker
+    :rtype: AttributeCheckResults
+    """
+    methods = attribute_checks(checker)
+    if check_names is not None:
+        methods = {name: methods[name] for name in check_names}
+    rules = {}
+    for check_name, method in methods.items():
+        priority, gname = method._cc_check_has
+        # the attribute lists of checkers don't depend on the dataset
+        kvps = kvp_convert(method.__wrapped__(checker, None))
+        rules[check_name] = (
+            priority,
+            [_evaluate_rule(table, kvp, priority, gname) for kvp in kvps.items()],
+        )
+    return AttributeCheckResults(table, checker, rules)
@@ -16,7 +16,14 @@ import regex
 from cf_units import Unit
 
 from compliance_checker import cfutil
-from compliance_checker.base import BaseCheck, BaseNCCheck, Result, TestCtx
+from compliance_checker.base import (
+    BaseCheck,
+    BaseNCCheck,
+    Result,
+    TestCtx,
+    VariableVisitor,
+    visits_variables,
+)
 from compliance_checker.cf import util
 from compliance_checker.cf.appendix_d import (
     dimless_vertical_coordinates_1_6,
@@ -69,6 +76,8 @@ class CFBaseCheck(BaseCheck):
     CF Convention Checker Base
     """
 
+    _cc_data_checks = frozenset(["check_actual_range", "check_geographic_region"])
+
     def __init__(self, options=None):
         # The compliance checker can be run on multiple datasets in a single
         # instantiation, so caching values has be done by the unique identifier
@@ -1310,6 +1319,7 @@ class CF1_6Check(CFNCCheck):
     # Chapter 2: NetCDF Files and Components
     ###############################################################################
 
+    @visits_variables
     def check_data_types(self, ds):
         """
         Checks the data type of all netCDF variables to ensure they are valid
@@ -1324,7 +1334,7 @@ class CF1_6Check(CFNCCheck):
         fails = []
         total = len(ds.variables)
 
-        for k, v in ds.variables.items():
+        def visit_variable(k, v, attributes):
             if (
                 v.dtype is not str
                 and v.dtype.kind != "S"
@@ -1346,13 +1356,18 @@ class CF1_6Check(CFNCCheck):
                         k, v.datatype
                     )
                 )
-        return Result(
-            BaseCheck.HIGH,
-            (total - len(fails), total),
-            self.section_titles["2.2"],
-            msgs=fails,
-        )
 
+        def result():
+            return Result(
+                BaseCheck.HIGH,
+                (total - len(fails), total),
+                self.section_titles["2.2"],
+                msgs=fails,
+            )
+
+        return VariableVisitor(result, visit_variable)
+
+    @visits_variables
     def check_child_attr_data_types(self, ds):
         """
         For any variables which contain any of the following attributes:
@@ -1381,11 +1396,14 @@ class CF1_6Check(CFNCCheck):
             "_FillValue",
         }
 
-        for var_name, var in ds.variables.items():
-            for att_name in special_attrs.intersection(var.ncattrs()):
-                self._parent_var_attr_type_check(att_name, var, ctx)
-        return ctx.to_result()
+        def visit_attribute(var_name, var, att_name):
+            self._parent_var_attr_type_check(att_name, var, ctx)
+
+        return VariableVisitor(
+            ctx.to_result, visit_attribute=visit_attribute, attributes=special_attrs
+        )
 
+    @visits_variables
     def check_naming_conventions(self, ds):
         """
         Checks the variable names to ensure they are valid CF variable names under CF.
@@ -1411,54 +1429,58 @@ class CF1_6Check(CFNCCheck):
 
         rname = regex.compile("^[A-Za-z][A-Za-z0-9_]*$")
 
-        for name, variable in ds.variables.items():
+        def visit_variable(name, variable, attributes):
             variable_naming.assert_true(
                 rname.match(name) is not None,
                 "variable {} should begin with a letter and be composed of "
                 "letters, digits, and underscores".format(name),
             )
 
-            # Keep track of all the attributes, we'll need to check them
-            for attr in variable.ncattrs():
-                if attr in ignore_attributes:
-                    continue
+        # Keep track of all the attributes, we'll need to check them
+        def visit_attribute(name, variable, attr):
+            if attr in ignore_attributes:
+                return
+            # Special attributes made by THREDDS
+            if attr.startswith("DODS"):
+                return
+            # Ignore model produced attributes
+            if attr.startswith("_Coordinate"):
+                return
+            attribute_naming.assert_true(
+                rname.match(attr) is not None,
+                "attribute {}:{} should begin with a letter and be composed of "
+                "letters, digits, and underscores".format(name, attr),
+            )
+
+        def result():
+            ret_val.append(variable_naming.to_result())
+
+            for dimension in ds.dimensions:
+                dimension_naming.assert_true(
+                    rname.match(dimension) is not None,
+                    "dimension {} should begin with a latter and be composed of "
+                    "letters, digits, and underscores".format(dimension),
+                )
+            ret_val.append(dimension_naming.to_result())
+
+            for global_attr in ds.ncattrs():
                 # Special attributes made by THREDDS
-                if attr.startswith("DODS"):
+                if global_attr.startswith("DODS"):
                     continue
-                # Ignore model produced attributes
-                if attr.startswith("_Coordinate"):
+                if global_attr.startswith("EXTRA_DIMENSION"):
                     continue
                 attribute_naming.assert_true(
-                    rname.match(attr) is not None,
-                    "attribute {}:{} should begin with a letter and be composed of "
-                    "letters, digits, and underscores".format(name, attr),
+                    rname.match(global_attr) is not None,
+                    "global attribute {} should begin with a letter and be composed of "
+                    "letters, digits, and underscores".format(global_attr),
                 )
+            ret_val.append(attribute_naming.to_result())
 
-        ret_val.append(variable_naming.to_result())
+            return ret_val
 
-        for dimension in ds.dimensions:
-            dimension_naming.assert_true(
-                rname.match(dimension) is not None,
-                "dimension {} should begin with a latter and be composed of "
-                "letters, digits, and underscores".format(dimension),
-            )
-        ret_val.append(dimension_naming.to_result())
-
-        for global_attr in ds.ncattrs():
-            # Special attributes made by THREDDS
-            if global_attr.startswith("DODS"):
-                continue
-            if global_attr.startswith("EXTRA_DIMENSION"):
-                continue
-            attribute_naming.assert_true(
-                rname.match(global_attr) is not None,
-                "global attribute {} should begin with a letter and be composed of "
-                "letters, digits, and underscores".format(global_attr),
-            )
-        ret_val.append(attribute_naming.to_result())
-
-        return ret_val
+        return VariableVisitor(result, visit_variable, visit_attribute)
 
+    @visits_variables
     def check_names_unique(self, ds):
         """
         Checks the variable names for uniqueness regardless of case.
@@ -1473,21 +1495,25 @@ class CF1_6Check(CFNCCheck):
         total = len(ds.variables)
         names = defaultdict(int)
 
-        for k in ds.variables:
+        def visit_variable(k, variable, attributes):
             names[k.lower()] += 1
 
-        fails = [
-            "Variables are not case sensitive. Duplicate variables named: %s" % k
-            for k, v in names.items()
-            if v > 1
-        ]
-        return Result(
-            BaseCheck.MEDIUM,
-            (total - len(fails), total),
-            self.section_titles["2.3"],
-            msgs=fails,
-        )
+        def result():
+            fails = [
+                "Variables are not case sensitive. Duplicate variables named: %s" % k
+                for k, v in names.items()
+                if v > 1
+            ]
+            return Result(
+                BaseCheck.MEDIUM,
+                (total - len(fails), total),
+                self.section_titles["2.3"],
+                msgs=fails,
+            )
+
+        return VariableVisitor(result, visit_variable)
 
+    @visits_variables
     def check_dimension_names(self, ds):
         """
         Checks variables contain no duplicate dimension names.
@@ -1501,7 +1527,7 @@ class CF1_6Check(CFNCCheck):
         fails = []
         total = len(ds.variables)
 
-        for k, v in ds.variables.items():
+        def visit_variable(k, v, attributes):
             dims = defaultdict(int)
             for d in v.dimensions:
                 dims[d] += 1
@@ -1512,12 +1538,15 @@ class CF1_6Check(CFNCCheck):
                         "%s has two or more dimensions named %s" % (k, dimension)
                     )
 
-        return Result(
-            BaseCheck.HIGH,
-            (total - len(fails), total),
-            self.section_titles["2.4"],
-            msgs=fails,
-        )
+        def result():
+            return Result(
+                BaseCheck.HIGH,
+                (total - len(fails), total),
+                self.section_titles["2.4"],
+                msgs=fails,
+            )
+
+        return VariableVisitor(result, visit_variable)
 
     def check_dimension_order(self, ds):
         """
@@ -1566,6 +1595,7 @@ class CF1_6Check(CFNCCheck):
                 )
         return valid_dimension_order.to_result()
 
+    @visits_variables
     def check_fill_value_outside_valid_range(self, ds):
         """
         Checks each variable's _FillValue to ensure that it's in valid_range or
@@ -1580,17 +1610,15 @@ class CF1_6Check(CFNCCheck):
         """
         valid_fill_range = TestCtx(BaseCheck.MEDIUM, self.section_titles["2.5"])
 
-        for name, variable in ds.variables.items():
+        def visit_variable(name, variable, attributes):
             # If the variable doesn't have a defined _FillValue don't check it.
 
-            if not hasattr(variable, "_FillValue"):
-                continue
+            if "_FillValue" not in attributes:
+                return
 
             fill_value = variable._FillValue
 
-            attrs = variable.ncattrs()
-
-            if "valid_range" in attrs:
+            if "valid_range" in attributes:
                 if isinstance(variable.valid_range, str):
                     m = "§2.5.1 Fill Values should be outside the range specified by valid_range"  # subsection message
                     valid_fill_range.assert_true(
@@ -1599,11 +1627,11 @@ class CF1_6Check(CFNCCheck):
                             m, name
                         ),
                     )
-                    continue
+                    return
                 rmin, rmax = variable.valid_range
                 spec_by = "valid_range"
 
-            elif "valid_min" in attrs and "valid_max" in attrs:
+            elif "valid_min" in attributes and "valid_max" in attributes:
                 if isinstance(variable.valid_min, str):
                     valid_fill_range.assert_true(
                         False,
@@ -1617,12 +1645,12 @@ class CF1_6Check(CFNCCheck):
                 if isinstance(variable.valid_min, str) or isinstance(
                     variable.valid_max, str
                 ):
-                    continue
+                    return
                 rmin = variable.valid_min
                 rmax = variable.valid_max
                 spec_by = "valid_min/valid_max"
             else:
-                continue
+                return
 
             if np.isnan(fill_value):
                 valid = True
@@ -1635,7 +1663,7 @@ class CF1_6Check(CFNCCheck):
                 "".format(name, fill_value, spec_by, rmin, rmax),
             )
 
-        return valid_fill_range.to_result()
+        return VariableVisitor(valid_fill_range.to_result, visit_variable)
 
     def check_convention_globals(self, ds):
         """
@@ -1713,6 +1741,7 @@ class CF1_6Check(CFNCCheck):
     # Chapter 3: Description of the Data
     ###############################################################################
 
+    @visits_variables
     def check_units(self, ds):
         """
         Check the units attribute for all variables to ensure they are CF
@@ -1741,27 +1770,28 @@ class CF1_6Check(CFNCCheck):
         coordinate_variables = self._find_coord_vars(ds)
         auxiliary_coordinates = self._find_aux_coord_vars(ds)
         geophysical_variables = self._find_geophysical_vars(ds)
-        unit_required_variables = (
+        unit_required_variables = set(
             coordinate_variables + auxiliary_coordinates + geophysical_variables
         )
 
-        for name in set(unit_required_variables):
+        def visit_variable(name, variable, attributes):
+            if name not in unit_required_variables:
+                return
+
             # For reduced horizontal grids, the compression index variable does
             # not require units.
             if cfutil.is_compression_coordinate(ds, name):
-                continue
-
-            variable = ds.variables[name]
+                return
 
             # Skip instance coordinate variables
             if getattr(variable, "cf_role", None) is not None:
-                continue
+                return
 
             # Skip labels
             if hasattr(variable.dtype, "char") and variable.dtype.char == "S":
-                continue
+                return
             elif variable.dtype == str:
-                continue
+                return
 
             standard_name = getattr(variable, "standard_name", None)
             standard_name, standard_name_modifier = self._split_standard_name(
@@ -1790,7 +1820,7 @@ class CF1_6Check(CFNCCheck):
                 valid_standard_units = self._check_valid_standard_units(ds, name)
                 ret_val.append(valid_standard_units)
 
-        return ret_val
+        return VariableVisitor(lambda: ret_val, visit_variable)
 
     def _check_valid_cf_units(self, ds, variable_name):
         """
@@ -1963,6 +1993,7 @@ class CF1_6Check(CFNCCheck):
 
         return valid_standard_units.to_result()
 
+    @visits_variables
     def check_standard_name(self, ds):
         """
         Check a variables's standard_name attribute to ensure that it meets CF
@@ -1984,28 +2015,30 @@ class CF1_6Check(CFNCCheck):
         flag_vars = cfutil.get_flag_variables(ds)
         geophysical_vars = self._find_geophysical_vars(ds)
 
-        variables_requiring_standard_names = (
+        variables_requiring_standard_names = set(
             coord_vars + aux_coord_vars + axis_vars + flag_vars + geophysical_vars
         )
-        for name in set(variables_requiring_standard_names):
+
+        def visit_variable(name, ncvar, attributes):
+            if name not in variables_requiring_standard_names:
+                return
+
             # Compression indices used in reduced horizontal grids or
             # compression schemes do not require attributes other than compress
             if cfutil.is_compression_coordinate(ds, name):
-                continue
-
-            ncvar = ds.variables[name]
+                return
 
             # §9 doesn't explicitly allow instance variables as coordinates but
             # it's loosely implied. Just in case, skip it.
             if hasattr(ncvar, "cf_role"):
-                continue
+                return
 
             # Unfortunately, §6.1 allows for string types to be listed as
             # coordinates.
             if hasattr(ncvar.dtype, "char") and ncvar.dtype.char == "S":
-                continue
+                return
             elif ncvar.dtype == str:
-                continue
+                return
 
             standard_name = getattr(ncvar, "standard_name", None)
             standard_name, standard_name_modifier = self._split_standard_name(
@@ -2073,7 +2106,8 @@ class CF1_6Check(CFNCCheck):
                 ),
             )
             ret_val.append(long_or_std_name.to_result())
-        return ret_val
+
+        return VariableVisitor(lambda: ret_val, visit_variable)
 
     def check_ancillary_variables(self, ds):
         """
@@ -3709,22 +3743,20 @@ class CF1_6Check(CFNCCheck):
         """
 
         ret_val = []
-        psep = regex.compile(
-            r"(?P<vars>\w+: )+(?P<method>\w+) ?(?P<where>where (?P<wtypevar>\w+) "
-            r"?(?P<over>over (?P<otypevar>\w+))?| ?)(?:\((?P<paren_contents>[^)]*)\))?"
-        )
 
         for var in ds.get_variables_by_attributes(cell_methods=lambda x: x is not None):
             if not getattr(var, "cell_methods", ""):
                 continue
 
             method = getattr(var, "cell_methods", "")
+            # the parse is shared by every variable with the same string
+            cell_methods = util.parse_cell_methods(method)
 
             valid_attribute = TestCtx(
                 BaseCheck.HIGH, self.section_titles["7.3"]
             )  # changed from 7.1 to 7.3
             valid_attribute.assert_true(
-                regex.match(psep, method) is not None,
+                cell_methods.valid,
                 '"{}" is not a valid format for cell_methods attribute of "{}"'
                 "".format(method, var.name),
             )
@@ -3733,12 +3765,10 @@ class CF1_6Check(CFNCCheck):
             valid_cell_names = TestCtx(BaseCheck.MEDIUM, self.section_titles["7.3"])
 
             # check that the name is valid
-            for match in regex.finditer(psep, method):
+            for cell_method in cell_methods.methods:
                 # it is possible to have "var1: var2: ... varn: ...", so handle
                 # that case
-                for var_raw_str in match.captures("vars"):
-                    # strip off the ' :' at the end of each match
-                    var_str = var_raw_str[:-2]
+                for var_str in cell_method.names:
                     if (
                         var_str in var.dimensions
                         or var_str == "area"
@@ -3760,29 +3790,27 @@ class CF1_6Check(CFNCCheck):
             # Checks if the method value of the 'name: method' pair is acceptable
             valid_cell_methods = TestCtx(BaseCheck.MEDIUM, self.section_titles["7.3"])
 
-            for match in regex.finditer(psep, method):
+            for cell_method in cell_methods.methods:
                 # CF section 7.3 - "Case is not significant in the method name."
                 valid_cell_methods.assert_true(
-                    match.group("method").lower() in self.cell_methods,
+                    cell_method.method.lower() in self.cell_methods,
                     "{}:cell_methods contains an invalid method: {}"
-                    "".format(var.name, match.group("method")),
+                    "".format(var.name, cell_method.method),
                 )
 
             ret_val.append(valid_cell_methods.to_result())
 
-            for match in regex.finditer(psep, method):
-                if match.group("paren_contents") is not None:
-                    # split along spaces followed by words with a colon
-                    # not sure what to do if a comment contains a colon!
+            for cell_method in cell_methods.methods:
+                if cell_method.paren_contents is not None:
                     ret_val.append(
                         self._check_cell_methods_paren_info(
-                            match.group("paren_contents"), var
+                            cell_method, var
                         ).to_result()
                     )
 
         return ret_val
 
-    def _check_cell_methods_paren_info(self, paren_contents, var):
+    def _check_cell_methods_paren_info(self, cell_method, var):
         """
         Checks that the spacing and/or comment info contained inside the
         parentheses in cell_methods is well-formed
@@ -3790,39 +3818,31 @@ class CF1_6Check(CFNCCheck):
         valid_info = TestCtx(BaseCheck.MEDIUM, self.section_titles["7.3"])
         # if there are no colons, this is a simple comment
         # TODO: are empty comments considered valid?
-        if ":" not in paren_contents:
+        if cell_method.info is None:
             valid_info.out_of += 1
             valid_info.score += 1
             return valid_info
-        # otherwise, split into k/v pairs
-        kv_pair_pat = r"(\S+:)\s+(.*(?=\s+\w+:)|[^:]+$)\s*"
-        # otherwise, we must split further with intervals coming
-        # first, followed by non-standard comments
-        # we need the count of the matches, and re.findall() only returns
-        # groups if they are present and we wish to see if the entire match
-        # object concatenated together is the same as the original string
-        pmatches = [m for m in regex.finditer(kv_pair_pat, paren_contents)]
-        for i, pmatch in enumerate(pmatches):
-            keyword, val = pmatch.groups()
+        # otherwise, the contents were split into k/v pairs with intervals
+        # coming first, followed by non-standard comments
+        for i, info in enumerate(cell_method.info):
+            keyword, val = info.keyword, info.value
             if keyword == "interval:":
                 valid_info.out_of += 2
-                interval_matches = regex.match(
-                    r"^\s*(?P<interval_number>\S+)\s+(?P<interval_units>\S+)\s*$", val
-                )
                 # attempt to get the number for the interval
-                if not interval_matches:
+                if info.interval is None:
                     valid_info.messages.append(
                         '§7.3.3 {}:cell_methods contains an interval specification that does not parse: "{}". Should be in format "interval: <number> <units>"'.format(
                             var.name, val
                         )
                     )
                 else:
+                    interval_number, interval_units = info.interval
                     try:
-                        float(interval_matches.group("interval_number"))
+                        float(interval_number)
                     except ValueError:
                         valid_info.messages.append(
                             '§7.3.3 {}:cell_methods contains an interval value that does not parse as a numeric value: "{}".'.format(
-                                var.name, interval_matches.group("interval_number")
+                                var.name, interval_number
                             )
                         )
                     else:
@@ -3830,11 +3850,11 @@ class CF1_6Check(CFNCCheck):
 
                     # then the units
                     try:
-                        Unit(interval_matches.group("interval_units"))
+                        Unit(interval_units)
                     except ValueError:
                         valid_info.messages.append(
                             '§7.3.3 {}:cell_methods interval units "{}" is not parsable by UDUNITS.'.format(
-                                var.name, interval_matches.group("interval_units")
+                                var.name, interval_units
                             )
                         )
                     else:
@@ -3845,7 +3865,7 @@ class CF1_6Check(CFNCCheck):
                 # maybe if they contain colons embedded in the
                 # comment string
                 valid_info.out_of += 1
-                if len(pmatches) == 1:
+                if len(cell_method.info) == 1:
                     valid_info.messages.append(
                         "§7.3.3 If there is no standardized information, the keyword comment: should be omitted for variable {}".format(
                             var.name
@@ -3853,7 +3873,7 @@ class CF1_6Check(CFNCCheck):
                     )
                 # otherwise check that the comment is the last
                 # item in the parentheses
-                elif i != len(pmatches) - 1:
+                elif i != len(cell_method.info) - 1:
                     valid_info.messages.append(
                         '§7.3.3 The non-standard "comment:" element must come after any standard elements in cell_methods for variable {}'.format(
                             var.name
@@ -3873,9 +3893,9 @@ class CF1_6Check(CFNCCheck):
         # Ensure concatenated reconstructed matches are the same as the
         # original string.  If they're not, there's likely a formatting error
         valid_info.assert_true(
-            "".join(m.group(0) for m in pmatches) == paren_contents,
+            cell_method.well_formed,
             "§7.3.3 Parenthetical content inside {}:cell_methods is not well formed: {}".format(
-                var.name, paren_contents
+                var.name, cell_method.paren_contents
             ),
         )
 
@@ -4037,6 +4057,7 @@ class CF1_6Check(CFNCCheck):
     # Chapter 8: Reduction of Dataset Size
     ###############################################################################
 
+    @visits_variables
     def check_packed_data(self, ds):
         """
         8.1 Simple packing may be achieved through the use of the optional NUG defined attributes scale_factor and
@@ -4060,12 +4081,13 @@ class CF1_6Check(CFNCCheck):
         :return: List of results
         """
         ret_val = []
-        for name, var in ds.variables.items():
+
+        def visit_variable(name, var, attributes):
 
             add_offset = getattr(var, "add_offset", None)
             scale_factor = getattr(var, "scale_factor", None)
             if not (add_offset or scale_factor):
-                continue
+                return
 
             valid = True
             reasoning = []
@@ -4143,7 +4165,7 @@ class CF1_6Check(CFNCCheck):
             )
             ret_val.append(result)
 
-        return ret_val
+        return VariableVisitor(lambda: ret_val, visit_variable)
 
     def check_compression_gathering(self, ds):
         """
@@ -3,12 +3,14 @@ import itertools
 import os
 import sys
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from copy import deepcopy
+from functools import lru_cache
 from pkgutil import get_data
 from urllib.parse import urljoin
 
 import lxml.html
+import regex
 import requests
 
 from cf_units import Unit
@@ -491,6 +493,85 @@ def units_temporal(units):
     return u.is_time_reference()
 
 
+# "name: [name: ...] method [where type [over type]] [(information)]" entries
+# of a cell_methods attribute, CF §7.3
+_CELL_METHODS_PATTERN = regex.compile(
+    r"(?P<vars>\w+: )+(?P<method>\w+) ?(?P<where>where (?P<wtypevar>\w+) "
+    r"?(?P<over>over (?P<otypevar>\w+))?| ?)(?:\((?P<paren_contents>[^)]*)\))?"
+)
+# "keyword: value" pairs inside the parentheses of an entry, CF §7.3.3
+_CELL_METHODS_INFO_PATTERN = regex.compile(r"(\S+:)\s+(.*(?=\s+\w+:)|[^:]+$)\s*")
+_CELL_METHODS_INTERVAL_PATTERN = regex.compile(
+    r"^\s*(?P<interval_number>\S+)\s+(?P<interval_units>\S+)\s*$"
+)
+
+CellMethods = namedtuple("CellMethods", ["valid", "methods"])
+CellMethod = namedtuple(
+    "CellMethod",
+    ["names", "method", "where", "over", "paren_contents", "info", "well_formed"],
+)
+CellMethodInfo = namedtuple("CellMethodInfo", ["keyword", "value", "interval"])
+
+
+def _parse_cell_methods_info(paren_contents):
+    """
+    Splits the contents of the parentheses of a cell_methods entry into
+    keyword/value pairs.  Returns None for a plain comment without any
+    keywords, otherwise the pairs and whether they make up the whole string.
+    """
+    if ":" not in paren_contents:
+        return None, True
+    info = []
+    matched = []
+    for match in _CELL_METHODS_INFO_PATTERN.finditer(paren_contents):
+        keyword, value = match.groups()
+        interval = None
+        if keyword == "interval:":
+            interval = _CELL_METHODS_INTERVAL_PATTERN.match(value)
+            if interval is not None:
+                interval = interval.group("interval_number", "interval_units")
+        info.append(CellMethodInfo(keyword, value, interval))
+        matched.append(match.group(0))
+    return tuple(info), "".join(matched) == paren_contents
+
+
+@lru_cache(1024)
+def parse_cell_methods(cell_methods):
+    """
+    Parses a cell_methods attribute into its "name: method" entries.  Datasets
+    tend to repeat a handful of cell_methods strings over many variables, so
+    the parsed entries are cached by string.
+
+    :param str cell_methods: The value of a cell_methods attribute
+    :rtype: CellMethods
+    :return: Whether the string starts with a valid entry, and the entries
+             found in it.  Each entry has the names, the method, the where and
+             over types, the contents of the parentheses, if any, and their
+             keyword/value pairs, or None if they are a plain comment.
+    """
+    methods = []
+    for match in _CELL_METHODS_PATTERN.finditer(cell_methods):
+        paren_contents = match.group("paren_contents")
+        info, well_formed = None, True
+        if paren_contents is not None:
+            info, well_formed = _parse_cell_methods_info(paren_contents)
+        methods.append(
+            CellMethod(
+                # strip off the ': ' at the end of each name
+                tuple(name[:-2] for name in match.captures("vars")),
+                match.group("method"),
+                match.group("wtypevar"),
+                match.group("otypevar"),
+                paren_contents,
+                info,
+                well_formed,
+            )
+        )
+    return CellMethods(
+        _CELL_METHODS_PATTERN.match(cell_methods) is not None, tuple(methods)
+    )
+
+
 def map_axes(dim_vars, reverse_map=False):
     """
     axis name       -> [dimension names]
@@ -0,0 +1,119 @@
+"""
+Support for running checks concurrently, from threads or from asyncio code
+without blocking the event loop.  Network I/O runs in a shared pool of I/O
+threads, and the checks, which read datasets through the netCDF library,
+run in an executor which by default has a single thread.
+
+The netCDF library isn't thread safe, so CheckSuite holds NETCDF_LOCK while
+it loads or checks a netCDF dataset, and code closing or reading datasets
+outside of a CheckSuite from more than one thread should hold it too.  Runs
+in a thread pool therefore overlap their downloads and report rendering
+while taking turns reading datasets.
+"""
+import asyncio
+import functools
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+# number of threads in the shared I/O executor
+IO_THREADS = 8
+
+# held while calling into the netCDF library, which isn't thread safe
+NETCDF_LOCK = threading.RLock()
+
+_executors = {}
+_executors_lock = threading.Lock()
+_local = threading.local()
+
+
+class CheckCancelled(Exception):
+    """
+    Raised in a check run whose asynchronous caller has been cancelled
+    """
+
+
+def _shared_executor(name, max_workers):
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=name
+            )
+        return _executors[name]
+
+
+def check_executor():
+    """
+    Returns the default executor of asynchronous check runs, which runs one
+    at a time
+    """
+    return _shared_executor("compliance-checker", 1)
+
+
+def io_executor():
+    """
+    Returns the shared executor of blocking network I/O
+    """
+    return _shared_executor("compliance-checker-io", IO_THREADS)
+
+
+@contextmanager
+def cancellation(event):
+    """
+    Makes event the cancellation event of the current thread within the
+    block, so that raise_if_cancelled raises once it is set
+    """
+    previous = getattr(_local, "event", None)
+    _local.event = event
+    try:
+        yield
+    finally:
+        _local.event = previous
+
+
+def raise_if_cancelled():
+    """
+    Raises CheckCancelled if the run on the current thread has been
+    cancelled.  Runs check between checks, so that a cancelled run stops at
+    the next check rather than running to completion.
+    """
+    event = getattr(_local, "event", None)
+    if event is not None and event.is_set():
+        raise CheckCancelled()
+
+
+def _call_cancellable(event, func):
+    with cancellation(event):
+        raise_if_cancelled()
+        return func()
+
+
+async def run_cancellable(func, executor=None):
+    """
+    Calls func in executor, or the default check executor, and returns its
+    result.  If the awaiting task is cancelled, func is stopped at its next
+    raise_if_cancelled call.
+
+    :param func: Function to call without arguments
+    :param concurrent.futures.Executor executor: Thread pool to call func in
+    """
+    event = threading.Event()
+    loop = asyncio.get_event_loop()
+    future = loop.run_in_executor(
+        executor or check_executor(), functools.partial(_call_cancellable, event, func)
+    )
+    try:
+        return await future
+    except asyncio.CancelledError:
+        event.set()
+        raise
+
+
+async def run_io(func, *args):
+    """
+    Calls func with args in the shared I/O executor and returns its result
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(io_executor(), functools.partial(func, *args))
@@ -0,0 +1,149 @@
+"""
+Structural fingerprints of dataset headers, used to check metadata once per
+header when many datasets share one, such as the granules of a product
+which only differ in their data and a few global attributes
+"""
+import hashlib
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# global attributes which usually differ between the granules of a product,
+# whose values are left out of fingerprints by default
+DEFAULT_VOLATILE_ATTRIBUTES = (
+    "date_created",
+    "date_issued",
+    "date_metadata_modified",
+    "date_modified",
+    "history",
+    "id",
+    "time_coverage_end",
+    "time_coverage_start",
+    "tracking_id",
+    "uuid",
+)
+
+# number of fingerprints whose check results are kept
+DEFAULT_MAX_FINGERPRINTS = 64
+
+
+def _attribute_value(value):
+    """
+    Returns a comparable representation of an attribute value, including
+    its type
+    """
+    if isinstance(value, np.ndarray):
+        return value.dtype.str, value.tolist()
+    if isinstance(value, np.generic):
+        return value.dtype.str, value.item()
+    return type(value).__name__, value
+
+
+def _attributes(obj, volatile=()):
+    return [
+        (name, None if name in volatile else _attribute_value(obj.getncattr(name)))
+        for name in obj.ncattrs()
+    ]
+
+
+def _group_header(group, volatile):
+    """
+    Returns the layout of the dimensions, variables and attributes of a
+    dataset or group, and of its subgroups
+    """
+    return (
+        _attributes(group, volatile),
+        [(name, len(dim), dim.isunlimited()) for name, dim in group.dimensions.items()],
+        [
+            (name, str(var.dtype), var.dimensions, _attributes(var))
+            for name, var in group.variables.items()
+        ],
+        [(name, _group_header(g, ())) for name, g in group.groups.items()],
+    )
+
+
+def header_fingerprint(ds, volatile_attributes=DEFAULT_VOLATILE_ATTRIBUTES):
+    """
+    Returns a fingerprint of the header of a netCDF dataset: its data model,
+    dimensions and their sizes, and variables with their types, dimensions
+    and attributes.  Global attributes are included by name, and by value
+    unless they are volatile.  Datasets with the same fingerprint only
+    differ in their data and the values of their volatile attributes.
+
+    :param netCDF4.Dataset ds: An open netCDF dataset
+    :param volatile_attributes: Names of the global attributes whose values
+                                are left out
+    :rtype: str
+    """
+    header = (ds.data_model, _group_header(ds, frozenset(volatile_attributes)))
+    return hashlib.sha256(repr(header).encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def recording_attribute_reads(ds):
+    """
+    Records the names of the global attributes of a MemoizedDataset read
+    with getncattr, or as attributes of the dataset, within the block into
+    the yielded set
+    """
+    reads = set()
+    ds.__dict__["_attribute_reads"] = reads
+    try:
+        yield reads
+    finally:
+        del ds.__dict__["_attribute_reads"]
+
+
+class MetadataResultCache(object):
+    """
+    Keeps the results of the checks which only read metadata by the header
+    fingerprint of the dataset they were run on, so that they are reused for
+    datasets with the same fingerprint rather than run again.
+
+    Checkers list the checks which read data in `_cc_data_checks`, and the
+    results of checkers which don't aren't kept.  Results of checks which
+    read a volatile attribute, or whose checker's setup read one, aren't
+    kept either.  Results are kept for the most recently used
+    max_fingerprints fingerprints.
+
+    A cache isn't thread safe, so each CheckSuite should have its own.
+    """
+
+    def __init__(
+        self,
+        volatile_attributes=DEFAULT_VOLATILE_ATTRIBUTES,
+        max_fingerprints=DEFAULT_MAX_FINGERPRINTS,
+    ):
+        self.volatile_attributes = frozenset(volatile_attributes)
+        self.max_fingerprints = max_fingerprints
+        self._results = OrderedDict()
+
+    def fingerprint(self, ds):
+        """
+        Returns the fingerprint of a dataset, ignoring the volatile
+        attributes
+        """
+        return header_fingerprint(ds, self.volatile_attributes)
+
+    def results(self, fingerprint, checker_key):
+        """
+        Returns the dict of kept check results of a checker on datasets with
+        the fingerprint, which the caller adds results to
+
+        :param str fingerprint: Header fingerprint of the dataset
+        :param checker_key: Hashable name and options of the checker
+        :rtype: dict
+        """
+        checkers = self._results.pop(fingerprint, None)
+        if checkers is None:
+            checkers = {}
+            while self._results and len(self._results) >= self.max_fingerprints:
+                self._results.popitem(last=False)
+        self._results[fingerprint] = checkers
+        return checkers.setdefault(checker_key, {})
+
+    def clear(self):
+        self._results.clear()
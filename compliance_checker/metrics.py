@@ -0,0 +1,328 @@
+"""
+Process-wide metrics for check runs, exported in the OpenMetrics text
+format either to a file or over HTTP for scraping by Prometheus compatible
+collectors
+"""
+import bisect
+import threading
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from compliance_checker import MemoizedDataset, cfutil
+from compliance_checker.cf import util as cf_util
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# upper bounds in seconds, suited to checks taking from a millisecond to
+# dataset loads taking over a minute
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    float("inf"),
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{{{}}}".format(",".join('{}="{}"'.format(k, _escape(v)) for k, v in labels))
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return repr(value)
+    return str(value)
+
+
+class Metric(object):
+    """
+    Base class for a metric family, with one series per distinct set of
+    label values
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), unit=""):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.unit = unit
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                "Expected labels {} for metric {}".format(self.labelnames, self.name)
+            )
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def samples(self):
+        """
+        Returns a list of (sample name suffix, labels, value) for every series
+        """
+        raise NotImplementedError
+
+    def render(self):
+        lines = ["# TYPE {} {}".format(self.name, self.type)]
+        if self.unit:
+            lines.append("# UNIT {} {}".format(self.name, self.unit))
+        lines.append("# HELP {} {}".format(self.name, _escape(self.documentation)))
+        for suffix, labels, value in self.samples():
+            lines.append(
+                "{}{}{} {}".format(
+                    self.name, suffix, _format_labels(labels), _format_value(value)
+                )
+            )
+        return lines
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count
+    """
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [("_total", key, value) for key, value in self._series.items()]
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self, name, documentation, labelnames=(), unit="", buckets=DEFAULT_BUCKETS
+    ):
+        super(Histogram, self).__init__(name, documentation, labelnames, unit)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def get_count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append(
+                        ("_bucket", key + (("le", _format_value(bound)),), cumulative)
+                    )
+                samples.append(("_count", key, cumulative))
+                samples.append(("_sum", key, total))
+        return samples
+
+
+class CacheCollector(object):
+    """
+    Reports the hits and misses of functools.lru_cache decorated functions
+    at render time
+    """
+
+    def __init__(self):
+        self.caches = OrderedDict()
+
+    def register(self, name, cached_function):
+        self.caches[name] = cached_function
+
+    def render(self):
+        infos = [(name, fn.cache_info()) for name, fn in self.caches.items()]
+        lines = []
+        for family, attr, documentation in (
+            ("compliance_checker_cache_hits", "hits", "Cache hits"),
+            ("compliance_checker_cache_misses", "misses", "Cache misses"),
+        ):
+            lines.append("# TYPE {} counter".format(family))
+            lines.append("# HELP {} {}".format(family, documentation))
+            for name, info in infos:
+                lines.append(
+                    '{}_total{{cache="{}"}} {}'.format(
+                        family, _escape(name), getattr(info, attr)
+                    )
+                )
+        return lines
+
+
+class Registry(object):
+    """
+    Collection of metric families rendered together
+    """
+
+    def __init__(self):
+        self.collectors = []
+        self.caches = CacheCollector()
+
+    def register(self, metric):
+        self.collectors.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Returns the metrics in the OpenMetrics text format
+        """
+        lines = []
+        for collector in self.collectors + [self.caches]:
+            lines.extend(collector.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for collector in self.collectors:
+            collector.clear()
+
+
+REGISTRY = Registry()
+
+DATASETS_CHECKED = REGISTRY.register(
+    Counter(
+        "compliance_checker_datasets_checked",
+        "Number of datasets checked",
+    )
+)
+DATASET_LOAD_SECONDS = REGISTRY.register(
+    Histogram(
+        "compliance_checker_dataset_load_seconds",
+        "Time taken to load a dataset, by protocol",
+        ["protocol"],
+        unit="seconds",
+    )
+)
+CHECKER_SECONDS = REGISTRY.register(
+    Histogram(
+        "compliance_checker_checker_seconds",
+        "Time taken to set up a checker and run all of its checks on a dataset",
+        ["checker"],
+        unit="seconds",
+    )
+)
+CHECK_SECONDS = REGISTRY.register(
+    Histogram(
+        "compliance_checker_check_seconds",
+        "Time taken by a check method",
+        ["checker", "check"],
+        unit="seconds",
+    )
+)
+CHECK_EXCEPTIONS = REGISTRY.register(
+    Counter(
+        "compliance_checker_check_exceptions",
+        "Exceptions raised by check methods",
+        ["checker", "check", "exception"],
+    )
+)
+CDL_CACHE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "compliance_checker_cdl_cache_lookups",
+        "Lookups of compiled CDL files in the CDL cache, by hit or miss",
+        ["result"],
+    )
+)
+METADATA_RESULT_LOOKUPS = REGISTRY.register(
+    Counter(
+        "compliance_checker_metadata_result_lookups",
+        "Lookups of the results of checks which only read metadata by header "
+        "fingerprint, by hit or miss",
+        ["result"],
+    )
+)
+
+REGISTRY.caches.register(
+    "get_variables_by_attributes", MemoizedDataset.get_variables_by_attributes
+)
+for _fn in (
+    cfutil.get_geophysical_variables,
+    cfutil.get_z_variable,
+    cfutil.get_lat_variable,
+    cfutil.get_lon_variable,
+    cfutil.get_time_variables,
+    cfutil.get_axis_map,
+    cfutil.is_dimensionless_standard_name,
+):
+    REGISTRY.caches.register("cfutil.{}".format(_fn.__name__), _fn)
+REGISTRY.caches.register("cf.util.parse_cell_methods", cf_util.parse_cell_methods)
+
+
+def write_metrics(path, registry=REGISTRY):
+    """
+    Writes the metrics in the OpenMetrics text format to path
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+
+
+def start_http_server(port, addr="127.0.0.1", registry=REGISTRY):
+    """
+    Serves the metrics in the OpenMetrics text format over HTTP from a daemon
+    thread, and returns the server.  Call shutdown() on the server to stop
+    serving.
+
+    :param int port: Port to listen on, or 0 for any free port
+    :param str addr: Address to listen on, local only by default
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer((addr, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,812 @@
+"""
+In-process compilation of CDL text into netCDF datasets, as a replacement
+for running the ncgen utility, with a cache of compiled files keyed by the
+CDL content
+"""
+import hashlib
+import math
+import os
+import re
+import tempfile
+
+from collections import OrderedDict
+
+import numpy as np
+
+from netCDF4 import Dataset, default_fillvals
+
+from compliance_checker import metrics
+
+
+# bump when the compiler output changes to invalidate cached files
+CACHE_VERSION = "3"
+
+
+class CDLError(ValueError):
+    """
+    Raised when CDL text cannot be parsed or compiled into a dataset
+    """
+
+
+# CDL type keywords mapped to numpy dtype strings.  "string" is handled
+# separately as a variable length string type.
+CDL_TYPES = {
+    "char": "S1",
+    "byte": "i1",
+    "ubyte": "u1",
+    "short": "i2",
+    "ushort": "u2",
+    "int": "i4",
+    "long": "i4",
+    "integer": "i4",
+    "uint": "u4",
+    "int64": "i8",
+    "uint64": "u8",
+    "float": "f4",
+    "real": "f4",
+    "double": "f8",
+    "string": str,
+}
+
+# types which can only be stored in a netCDF-4 file
+NC4_ONLY_TYPES = {"ubyte", "ushort", "uint", "int64", "uint64", "string"}
+
+# ncgen-recognized special attributes which control storage rather than
+# being written to the file
+SPECIAL_ATTRS = {
+    "_Format",
+    "_Storage",
+    "_ChunkSizes",
+    "_DeflateLevel",
+    "_Shuffle",
+    "_Endianness",
+    "_NoFill",
+    "_Fletcher32",
+    "_NCProperties",
+    "_IsNetcdf4",
+    "_SuperblockVersion",
+}
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+|//[^\n]*)
+    |(?P<str>"(?:[^"\\]|\\.)*")
+    |(?P<chr>'(?:[^'\\]|\\.)*')
+    |(?P<punct>[{}(),;=:])
+    |(?P<word>(?:[A-Za-z0-9_.+\-@]|\\.)+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_NUMBER_RE = re.compile(
+    r"""
+    ^(?P<num>[+-]?(?:0[xX][0-9a-fA-F]+
+        |(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))
+    (?P<suffix>[a-zA-Z]*)$
+    """,
+    re.VERBOSE,
+)
+
+_SPECIAL_FLOATS = {
+    "nan": float("nan"),
+    "infinity": float("inf"),
+    "inf": float("inf"),
+}
+
+_INT_SUFFIXES = {
+    "b": "byte",
+    "ub": "ubyte",
+    "s": "short",
+    "us": "ushort",
+    "l": "int",
+    "u": "uint",
+    "ul": "uint",
+    "ll": "int64",
+    "ull": "uint64",
+}
+
+# ordering used to choose a common type for untyped numeric attributes
+_TYPE_RANK = [
+    "byte",
+    "ubyte",
+    "short",
+    "ushort",
+    "int",
+    "uint",
+    "int64",
+    "uint64",
+    "float",
+    "double",
+]
+
+_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "b": "\b",
+    "f": "\f",
+    "v": "\v",
+    "a": "\a",
+    "0": "\0",
+}
+
+
+class _Fill(object):
+    """Sentinel for the CDL "_" fill value placeholder"""
+
+    def __repr__(self):
+        return "_"
+
+
+FILL = _Fill()
+
+
+def _unescape(text):
+    """
+    Replaces CDL backslash escape sequences in a string or name
+    """
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def tokenize(text):
+    """
+    Splits CDL text into a list of (kind, value) tuples, discarding whitespace
+    and comments.
+
+    :param str text: CDL source text
+    :rtype: list
+    """
+    tokens = []
+    pos = 0
+    length = len(text)
+    while pos < length:
+        match = _TOKEN_RE.match(text, pos)
+        if match is None:
+            line = text.count("\n", 0, pos) + 1
+            raise CDLError(
+                "Unexpected character {!r} on line {}".format(text[pos], line)
+            )
+        kind = match.lastgroup
+        value = match.group(kind)
+        pos = match.end()
+        if kind == "ws":
+            continue
+        if kind in {"str", "chr"}:
+            value = _unescape(value[1:-1])
+            kind = "str"
+        tokens.append((kind, value))
+    return tokens
+
+
+def parse_number(word):
+    """
+    Interprets a CDL numeric literal, returning a (value, cdl_type) tuple.
+    Returns None if the word is not a number.
+
+    :param str word: A CDL token
+    :rtype: tuple or None
+    """
+    lowered = word.lower()
+    sign = -1.0 if lowered.startswith("-") else 1.0
+    bare = lowered.lstrip("+-")
+    for name, val in _SPECIAL_FLOATS.items():
+        if bare == name:
+            return sign * val, "double"
+        if bare == name + "f":
+            return sign * val, "float"
+        if bare == name + "d":
+            return sign * val, "double"
+
+    match = _NUMBER_RE.match(word)
+    if match is None:
+        return None
+    num, suffix = match.group("num"), match.group("suffix").lower()
+    is_hex = num.lstrip("+-")[:2].lower() == "0x"
+    is_float = not is_hex and bool(re.search(r"[.eE]", num))
+    if is_float or suffix in {"f", "d"}:
+        if suffix not in {"", "f", "d"}:
+            return None
+        return float(num), "float" if suffix == "f" else "double"
+    if suffix not in _INT_SUFFIXES and suffix != "":
+        return None
+    value = int(num, 16) if is_hex else int(num)
+    if suffix:
+        return value, _INT_SUFFIXES[suffix]
+    if -(2**31) <= value < 2**31:
+        return value, "int"
+    return value, "int64"
+
+
+class CDLVariable(object):
+    """
+    Parsed representation of a CDL variable declaration
+    """
+
+    def __init__(self, name, cdl_type, dimensions):
+        self.name = name
+        self.cdl_type = cdl_type
+        self.dimensions = dimensions
+        self.attributes = OrderedDict()
+        self.data = None
+
+
+class CDLGroup(object):
+    """
+    Parsed representation of a CDL group, including the root group
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.dimensions = OrderedDict()
+        self.variables = OrderedDict()
+        self.attributes = OrderedDict()
+        self.groups = OrderedDict()
+
+
+class _Parser(object):
+    """
+    Recursive descent parser producing a CDLGroup tree from CDL tokens
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        idx = self.pos + offset
+        if idx < len(self.tokens):
+            return self.tokens[idx]
+        return (None, None)
+
+    def next(self):
+        tok = self.peek()
+        if tok[0] is None:
+            raise CDLError("Unexpected end of CDL input")
+        self.pos += 1
+        return tok
+
+    def expect(self, value):
+        kind, tok_value = self.next()
+        if tok_value != value or kind not in {"punct", "word"}:
+            raise CDLError("Expected {!r}, found {!r}".format(value, tok_value))
+
+    def name(self):
+        kind, value = self.next()
+        if kind != "word":
+            raise CDLError("Expected a name, found {!r}".format(value))
+        return _unescape(value)
+
+    def parse(self):
+        kind, value = self.next()
+        if value not in {"netcdf", "netCDF"}:
+            raise CDLError("CDL must start with 'netcdf', found {!r}".format(value))
+        if self.peek() == ("punct", "{"):
+            # the dataset name is optional
+            root = CDLGroup("")
+        else:
+            root = CDLGroup(self.name())
+        self.expect("{")
+        self.group_body(root)
+        return root
+
+    def group_body(self, group):
+        section = None
+        while True:
+            kind, value = self.peek()
+            if kind is None:
+                raise CDLError("Unterminated group {!r}".format(group.name))
+            if value == "}" and kind == "punct":
+                self.pos += 1
+                return group
+            next_tok = self.peek(1)
+            if kind == "word" and next_tok == ("punct", ":"):
+                if value in {"dimensions", "variables", "data", "types"}:
+                    self.pos += 2
+                    section = value
+                    if section == "types":
+                        raise CDLError("User defined types are not supported")
+                    continue
+                if value == "group":
+                    self.pos += 2
+                    sub = CDLGroup(self.name())
+                    self.expect("{")
+                    self.group_body(sub)
+                    group.groups[sub.name] = sub
+                    continue
+            if section == "dimensions":
+                self.dimension_decl(group)
+            elif section == "variables":
+                self.variable_section_decl(group)
+            elif section == "data":
+                self.data_decl(group)
+            elif kind == "punct" and value == ":":
+                # bare global attributes before any section
+                self.variable_section_decl(group)
+            else:
+                raise CDLError("Unexpected token {!r}".format(value))
+
+    def dimension_decl(self, group):
+        while True:
+            name = self.name()
+            self.expect("=")
+            kind, value = self.next()
+            if value.upper() == "UNLIMITED":
+                size = None
+            else:
+                number = parse_number(value)
+                if number is None or not isinstance(number[0], int):
+                    raise CDLError(
+                        "Invalid size {!r} for dimension {}".format(value, name)
+                    )
+                size = number[0]
+            group.dimensions[name] = size
+            kind, value = self.next()
+            if value == ";":
+                return
+            if value != ",":
+                raise CDLError("Expected ',' or ';' after dimension {}".format(name))
+
+    def variable_section_decl(self, group):
+        kind, value = self.peek()
+        # global attribute ":name = values ;"
+        if kind == "punct" and value == ":":
+            self.pos += 1
+            self.attribute_decl(group.attributes, None)
+            return
+        explicit_type = None
+        if kind == "word" and value in CDL_TYPES:
+            following = self.peek(1)
+            # a type keyword followed by a name, or by ":" for a typed
+            # global attribute
+            if following[0] == "word" or following == ("punct", ":"):
+                explicit_type = value
+                self.pos += 1
+        kind, value = self.peek()
+        if kind == "punct" and value == ":":
+            self.pos += 1
+            self.attribute_decl(group.attributes, explicit_type)
+            return
+        name = self.name()
+        if self.peek() == ("punct", ":"):
+            # variable attribute "var:name = values ;"
+            self.pos += 1
+            if name not in group.variables:
+                raise CDLError(
+                    "Attribute declared for undefined variable {}".format(name)
+                )
+            self.attribute_decl(group.variables[name].attributes, explicit_type)
+            return
+        if explicit_type is None:
+            raise CDLError("Variable {} declared without a type".format(name))
+        # variable declarations, possibly comma separated
+        while True:
+            dims = []
+            if self.peek() == ("punct", "("):
+                self.pos += 1
+                while True:
+                    dims.append(self.name())
+                    kind, value = self.next()
+                    if value == ")":
+                        break
+                    if value != ",":
+                        raise CDLError("Malformed dimension list for {}".format(name))
+            group.variables[name] = CDLVariable(name, explicit_type, dims)
+            kind, value = self.next()
+            if value == ";":
+                return
+            if value != ",":
+                raise CDLError("Expected ',' or ';' after variable {}".format(name))
+            name = self.name()
+
+    def values(self):
+        vals = []
+        while True:
+            kind, value = self.next()
+            # braces group values of compound or nested data and are
+            # flattened
+            while kind == "punct" and value in {"{", "}"}:
+                kind, value = self.next()
+            if kind == "str":
+                vals.append(value)
+            elif kind == "word":
+                if value == "_":
+                    vals.append(FILL)
+                elif value in {"NC_FILL", "NC_FILL_VALUE"}:
+                    vals.append(FILL)
+                else:
+                    number = parse_number(value)
+                    if number is None:
+                        raise CDLError("Invalid value {!r}".format(value))
+                    vals.append(number)
+            else:
+                raise CDLError("Unexpected {!r} in value list".format(value))
+            kind, value = self.next()
+            while kind == "punct" and value == "}":
+                kind, value = self.next()
+            if value == ";":
+                return vals
+            if value != ",":
+                raise CDLError(
+                    "Expected ',' or ';' in value list, found {!r}".format(value)
+                )
+
+    def attribute_decl(self, attributes, explicit_type):
+        name = self.name()
+        self.expect("=")
+        attributes[name] = (explicit_type, self.values())
+
+    def data_decl(self, group):
+        name = self.name()
+        self.expect("=")
+        variable = self._lookup_variable(group, name)
+        variable.data = self.values()
+
+    def _lookup_variable(self, group, name):
+        if name not in group.variables:
+            raise CDLError("Data supplied for undefined variable {}".format(name))
+        return group.variables[name]
+
+
+def parse_cdl(text):
+    """
+    Parses CDL text into a tree of CDLGroup objects
+
+    :param str text: CDL source text
+    :rtype: CDLGroup
+    """
+    return _Parser(tokenize(text)).parse()
+
+
+def _walk_groups(group):
+    yield group
+    for sub in group.groups.values():
+        for g in _walk_groups(sub):
+            yield g
+
+
+def requires_netcdf4(root):
+    """
+    Returns True if the parsed CDL uses any features which cannot be
+    represented in the netCDF classic data model
+
+    :param CDLGroup root: parsed CDL root group
+    :rtype: bool
+    """
+    if root.groups:
+        return True
+    for group in _walk_groups(root):
+        for variable in group.variables.values():
+            if variable.cdl_type in NC4_ONLY_TYPES:
+                return True
+            for att_type, att_vals in variable.attributes.values():
+                if att_type in NC4_ONLY_TYPES:
+                    return True
+        for att_type, att_vals in group.attributes.values():
+            if att_type in NC4_ONLY_TYPES:
+                return True
+    return False
+
+
+def _infer_type(values):
+    """
+    Infers the CDL type of an untyped attribute from its values
+    """
+    if any(isinstance(v, str) for v in values):
+        return "char"
+    types = [v[1] for v in values if v is not FILL]
+    if not types:
+        return "double"
+    return max(types, key=_TYPE_RANK.index)
+
+
+def _numeric_values(values, dtype, fill_value):
+    out = []
+    for v in values:
+        if v is FILL:
+            out.append(fill_value)
+        elif isinstance(v, str):
+            # like ncgen, convert string constants to the target type
+            number = parse_number(v.strip())
+            if number is None:
+                raise CDLError("String value {!r} given for numeric type".format(v))
+            out.append(number[0])
+        else:
+            out.append(v[0])
+    if np.dtype(dtype).kind in "iu":
+        # guard against NaN/inf being passed to integer types
+        out = [0 if isinstance(x, float) and not math.isfinite(x) else x for x in out]
+    return np.array(out, dtype=dtype)
+
+
+def _char_values(values):
+    return "".join(
+        v if isinstance(v, str) else chr(int(v[0])) for v in values if v is not FILL
+    )
+
+
+def _set_attribute(target, name, att_type, values, var_type=None):
+    if name in SPECIAL_ATTRS:
+        return
+    if att_type is None:
+        if name == "_FillValue" and var_type is not None:
+            att_type = var_type
+        else:
+            att_type = _infer_type(values)
+    if att_type == "char":
+        target.setncattr(name, _char_values(values))
+    elif att_type == "string":
+        strings = [v for v in values if isinstance(v, str)]
+        if len(strings) == 1:
+            target.setncattr_string(name, strings[0])
+        else:
+            target.setncattr_string(name, strings)
+    else:
+        dtype = CDL_TYPES[att_type]
+        arr = _numeric_values(values, dtype, default_fillvals[dtype])
+        target.setncattr(name, arr[0] if arr.size == 1 else arr)
+
+
+def _fill_value(variable):
+    """
+    Returns the (cdl type aware) _FillValue for a parsed variable, or None
+    if the variable uses the library default.
+    """
+    if "_FillValue" not in variable.attributes:
+        return None
+    att_type, values = variable.attributes["_FillValue"]
+    if variable.cdl_type == "char":
+        chars = _char_values(values)
+        return chars[:1] or "\0"
+    if variable.cdl_type == "string":
+        return None
+    dtype = CDL_TYPES[variable.cdl_type]
+    return _numeric_values(values, dtype, 0)[0]
+
+
+def _dim_sizes(group_chain, dims):
+    sizes = []
+    for dim in dims:
+        for group in reversed(group_chain):
+            if dim in group.dimensions:
+                sizes.append(group.dimensions[dim])
+                break
+        else:
+            raise CDLError("Undefined dimension {}".format(dim))
+    return sizes
+
+
+def _resolve_unlimited(group_chain, group, unlimited_sizes):
+    """
+    Determines the length of unlimited dimensions from the amount of data
+    supplied for variables using them.
+    """
+    for variable in group.variables.values():
+        if variable.data is None or not variable.dimensions:
+            continue
+        sizes = _dim_sizes(group_chain, variable.dimensions)
+        if sizes[0] is not None or variable.dimensions[0] not in unlimited_sizes:
+            continue
+        inner = 1
+        for size in sizes[1:]:
+            inner *= size or 1
+        if variable.cdl_type == "char" and len(sizes) > 1:
+            count = sum(1 for v in variable.data if v is not FILL)
+        elif variable.cdl_type == "char":
+            count = len(_char_values(variable.data))
+            inner = 1
+        else:
+            count = len(variable.data)
+        length = int(math.ceil(count / float(inner))) if inner else 0
+        dim = variable.dimensions[0]
+        unlimited_sizes[dim] = max(unlimited_sizes[dim], length)
+
+
+def _char_array(values, shape):
+    """
+    Lays out CDL string data into a char array of the given shape.  Each
+    string fills (and is padded to) the length of the last dimension.
+    """
+    arr = np.zeros(shape, dtype="S1")
+    if not shape:
+        chars = _char_values(values)
+        if chars:
+            arr[()] = chars[0].encode("utf-8")
+        return arr
+    strlen = shape[-1]
+    flat = arr.reshape(-1, strlen)
+    strings = [v for v in values if isinstance(v, str)]
+    if len(shape) == 1:
+        strings = ["".join(strings)]
+    for row, string in enumerate(strings):
+        if row >= flat.shape[0]:
+            break
+        encoded = string.encode("utf-8")[:strlen]
+        flat[row, : len(encoded)] = [encoded[i : i + 1] for i in range(len(encoded))]
+    return arr
+
+
+def _write_data(nc_var, variable, shape, fill_value):
+    nc_var.set_auto_maskandscale(False)
+    if variable.cdl_type == "char":
+        nc_var[...] = _char_array(variable.data, tuple(shape))
+        return
+    total = int(np.prod(shape)) if shape else 1
+    if variable.cdl_type == "string":
+        strings = ["" if v is FILL else v for v in variable.data]
+        strings += [""] * (total - len(strings))
+        arr = np.array(strings[:total], dtype=object).reshape(shape)
+        if shape:
+            nc_var[...] = arr
+        else:
+            nc_var.assignValue(arr[()])
+        return
+    dtype = CDL_TYPES[variable.cdl_type]
+    if fill_value is None:
+        fill_value = default_fillvals[dtype]
+    values = list(variable.data) + [FILL] * max(total - len(variable.data), 0)
+    arr = _numeric_values(values[:total], dtype, fill_value).reshape(shape)
+    if shape:
+        nc_var[...] = arr
+    else:
+        nc_var.assignValue(arr[()])
+
+
+def _build_group(nc_group, group, group_chain, unlimited_sizes):
+    for name, size in group.dimensions.items():
+        nc_group.createDimension(name, size)
+    for name, (att_type, values) in group.attributes.items():
+        _set_attribute(nc_group, name, att_type, values)
+    for variable in group.variables.values():
+        dtype = CDL_TYPES[variable.cdl_type]
+        fill_value = _fill_value(variable)
+        nc_var = nc_group.createVariable(
+            variable.name, dtype, tuple(variable.dimensions), fill_value=fill_value
+        )
+        for name, (att_type, values) in variable.attributes.items():
+            if name == "_FillValue":
+                continue
+            _set_attribute(nc_var, name, att_type, values, variable.cdl_type)
+        if variable.data is not None:
+            shape = []
+            for dim, size in zip(
+                variable.dimensions, _dim_sizes(group_chain, variable.dimensions)
+            ):
+                shape.append(unlimited_sizes.get(dim, 0) if size is None else size)
+            _write_data(nc_var, variable, shape, fill_value)
+            # data is written raw, but the returned dataset should read as
+            # any other dataset would
+            nc_var.set_auto_maskandscale(True)
+    for sub in group.groups.values():
+        _build_group(
+            nc_group.createGroup(sub.name), sub, group_chain + [sub], unlimited_sizes
+        )
+
+
+def _collect_unlimited(group_chain, group, unlimited_sizes):
+    for name, size in group.dimensions.items():
+        if size is None:
+            unlimited_sizes.setdefault(name, 0)
+    _resolve_unlimited(group_chain, group, unlimited_sizes)
+    for sub in group.groups.values():
+        _collect_unlimited(group_chain + [sub], sub, unlimited_sizes)
+
+
+def _compile(text, path, format, **dataset_kwargs):
+    root = parse_cdl(text)
+    nc4 = requires_netcdf4(root)
+    if format is None:
+        # ncgen was run with -k nc4, so the checkers see the same data model
+        format = "NETCDF4"
+    elif nc4 and not format.startswith("NETCDF4"):
+        raise CDLError("CDL uses netCDF-4 features unavailable in {}".format(format))
+    unlimited_sizes = {}
+    _collect_unlimited([root], root, unlimited_sizes)
+    nc = Dataset(path, "w", format=format, **dataset_kwargs)
+    try:
+        _build_group(nc, root, [root], unlimited_sizes)
+    except Exception:
+        nc.close()
+        raise
+    return nc
+
+
+def compile_cdl(text, path, format=None, diskless=False):
+    """
+    Compiles CDL text into a netCDF dataset, returning the open dataset.
+
+    :param str text: CDL source text
+    :param str path: path of the dataset to create
+    :param str format: netCDF4 format string, NETCDF4 by default
+    :param bool diskless: create the dataset in memory only
+    :rtype: netCDF4.Dataset
+    """
+    return _compile(text, path, format, diskless=diskless, persist=False)
+
+
+def _compile_file(text, path, format=None):
+    """
+    Compiles CDL text into the netCDF file at path, which is closed
+    """
+    _compile(text, path, format).close()
+
+
+def compile_cdl_bytes(text, format=None):
+    """
+    Compiles CDL text into a netCDF dataset and returns the bytes of the
+    netCDF file
+
+    :param str text: CDL source text
+    :param str format: netCDF4 format string, see compile_cdl
+    :rtype: bytes
+    """
+    # netCDF-4 files built in memory list their variables in alphabetical
+    # rather than declaration order, so the file is built on disk
+    fd, path = tempfile.mkstemp(suffix=".nc")
+    os.close(fd)
+    try:
+        _compile_file(text, path, format)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def cache_directory():
+    """
+    Returns the directory compiled CDL files are cached in, under
+    $XDG_CACHE_HOME or ~/.cache
+    """
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_home, "compliance-checker", "cdl")
+
+
+def cache_key(data):
+    """
+    Returns the cache key of CDL content
+
+    :param bytes data: CDL file content
+    :rtype: str
+    """
+    digest = hashlib.sha256(CACHE_VERSION.encode("ascii"))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def compile_cached(cdl_path, cache_dir=None):
+    """
+    Returns the path to a netCDF file compiled from a CDL file, compiling it
+    in-process into the cache if a file with the same CDL content hasn't
+    been compiled before.  Nothing is written next to the CDL file.
+
+    :param str cdl_path: Path to the CDL file
+    :param str cache_dir: Cache directory, defaults to cache_directory()
+    :rtype: str
+    """
+    if cache_dir is None:
+        cache_dir = cache_directory()
+    with open(cdl_path, "rb") as f:
+        data = f.read()
+    nc_path = os.path.join(cache_dir, "{}.nc".format(cache_key(data)))
+    if os.path.isfile(nc_path):
+        metrics.CDL_CACHE_LOOKUPS.inc(result="hit")
+        return nc_path
+    metrics.CDL_CACHE_LOOKUPS.inc(result="miss")
+
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise CDLError("CDL is not UTF-8 encoded: {}".format(e))
+    os.makedirs(cache_dir, exist_ok=True)
+    # compile into a temporary file and rename it so that concurrent runs
+    # never see a partially written file
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+    os.close(fd)
+    try:
+        _compile_file(text, tmp_path)
+        os.replace(tmp_path, nc_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return nc_path
@@ -0,0 +1,327 @@
+"""
+Planning of the data reads checks make against OPeNDAP and ERDDAP datasets,
+so that they can be fetched in a single constrained request before the
+checks run instead of one request per access
+"""
+import warnings
+
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+
+from netCDF4 import Dataset
+
+from compliance_checker import MemoizedDataset, cfutil
+from compliance_checker.protocols import erddap, opendap
+from compliance_checker.tracing import span
+
+
+# read extents, in increasing order of the data they need
+ENDPOINTS = 1  # first and last values of a one dimensional variable
+WHOLE = 2  # all values
+
+# largest total size of the variables read whole in one plan
+MAX_PREFETCH_BYTES = 64 * 2**20
+
+# largest number of rows fetched for the checks reading the data of a
+# header-only ERDDAP dataset
+MAX_HEADER_ROWS = 10000
+
+
+def plan_acdd_reads(ds):
+    """
+    Returns the reads of the ACDD extent checks: the latitude, longitude and
+    vertical variables whole, and the first and last times
+    """
+    reads = {}
+    for name in cfutil.get_latitude_variables(ds) + cfutil.get_longitude_variables(ds):
+        reads[name] = WHOLE
+    z_variable = cfutil.get_z_variable(ds)
+    if z_variable is not None:
+        reads[z_variable] = WHOLE
+    time_variable = cfutil.get_time_variable(ds)
+    if time_variable is not None:
+        reads[time_variable] = ENDPOINTS
+    return reads
+
+
+def plan_cf_reads(ds):
+    """
+    Returns the reads of the CF checks which compare data against
+    attributes: variables with actual_range and region variables, whole
+    """
+    reads = {}
+    for variable in ds.get_variables_by_attributes(
+        actual_range=lambda v: v is not None
+    ):
+        reads[variable.name] = WHOLE
+    for variable in ds.get_variables_by_attributes(standard_name="region"):
+        reads[variable.name] = WHOLE
+    return reads
+
+
+# checker name without version -> function returning the reads of its checks
+# as a dict of variable name to read extent
+READ_PLANS = {
+    "acdd": plan_acdd_reads,
+    "cf": plan_cf_reads,
+}
+
+
+def plan_reads(ds, checker_names):
+    """
+    Returns the combined reads of the checkers, as a dict of variable name to
+    the largest read extent
+
+    :param netCDF4.Dataset ds: An open netCDF dataset
+    :param list checker_names: Names of the checkers, with or without version
+    """
+    plan = {}
+    for checker_name in checker_names:
+        read_plan = READ_PLANS.get(checker_name.split(":")[0])
+        if read_plan is None:
+            continue
+        for name, extent in read_plan(ds).items():
+            plan[name] = max(plan.get(name, extent), extent)
+    return plan
+
+
+def _projection(name, variable, extent, budget):
+    """
+    Returns the DAP projection of a planned read and its extent, or
+    (None, None) if it shouldn't be prefetched
+    """
+    # char and string data is left to the netCDF library to assemble
+    if variable.dtype == str or variable.dtype.kind not in "iuf":
+        return None, None
+    if extent == WHOLE and variable.size * variable.dtype.itemsize <= budget:
+        return name, WHOLE
+    if variable.ndim == 1 and variable.size > 0:
+        last = variable.size - 1
+        return "{}[0:{}:{}]".format(name, max(last, 1), last), ENDPOINTS
+    return None, None
+
+
+class _EndpointsVariable(object):
+    """
+    Stands in for a one dimensional variable whose first and last values
+    have been prefetched, reading anything else from the variable
+    """
+
+    def __init__(self, variable, endpoints):
+        self._variable = variable
+        self._endpoints = endpoints
+
+    def __getattr__(self, name):
+        # only called for attributes not set in __init__
+        if name in ("_variable", "_endpoints"):
+            raise AttributeError(name)
+        return getattr(self._variable, name)
+
+    def __getitem__(self, key):
+        size = len(self._variable)
+        if isinstance(key, (int, np.integer)) and -size <= key < size:
+            index = key % size
+            if index == 0:
+                return self._endpoints[0]
+            if index == size - 1:
+                return self._endpoints[-1]
+        return self._variable[key]
+
+    def __len__(self):
+        return len(self._variable)
+
+    def __array__(self, *args):
+        return self._variable.__array__(*args)
+
+    def __repr__(self):
+        return repr(self._variable)
+
+
+class PlannedDataset(MemoizedDataset):
+    """
+    OPeNDAP dataset which can prefetch the data checks are planned to read
+    in a single DAP request.  Prefetched variables are served from an
+    in-memory copy with the same dimensions, attributes and data, and the
+    others are read from the server as usual.
+    """
+
+    def __init__(self, url, *args, **kwargs):
+        super(PlannedDataset, self).__init__(url, *args, **kwargs)
+        # Dataset attributes are netCDF attributes, so python attributes
+        # have to be set in the instance dict
+        self.__dict__["url"] = url
+        self.__dict__["_buffers"] = []
+        self.__dict__["_prefetched"] = {}
+        self.__dict__["_variables"] = None
+
+    @property
+    def variables(self):
+        if self._variables is None:
+            return Dataset.variables.__get__(self)
+        return self._variables
+
+    def get_variables_by_attributes(self, **kwargs):
+        variables = super(PlannedDataset, self).get_variables_by_attributes(**kwargs)
+        return [
+            self._prefetched.get(v.name, v) if v.group() is self else v
+            for v in variables
+        ]
+
+    def prefetch(self, plan, max_bytes=MAX_PREFETCH_BYTES):
+        """
+        Fetches the planned reads which haven't been prefetched yet in a
+        single DAP request.  Variables read whole are prefetched up to
+        max_bytes in total, and one dimensional variables past that have
+        their first and last values prefetched.
+
+        :param dict plan: Variable name to read extent, as from plan_reads
+        :param int max_bytes: Largest total size of the whole variables
+        """
+        remote = Dataset.variables.__get__(self)
+        projections = OrderedDict()
+        for name, extent in plan.items():
+            variable = remote.get(name)
+            if variable is None or name in self._prefetched:
+                continue
+            projection, extent = _projection(name, variable, extent, max_bytes)
+            if projection is not None:
+                projections[name] = (projection, extent)
+                if extent == WHOLE:
+                    max_bytes -= variable.size * variable.dtype.itemsize
+        if not projections:
+            return
+
+        with span("prefetch", url=self.url, variables=len(projections)):
+            try:
+                arrays = opendap.fetch_data(
+                    self.url, [projection for projection, _ in projections.values()]
+                )
+            except (ValueError, KeyError, requests.RequestException) as e:
+                warnings.warn(
+                    "Could not prefetch data from {}, reading it as it is "
+                    "accessed instead: {}".format(self.url, e)
+                )
+                return
+
+        buffer = Dataset("prefetch.nc", "w", diskless=True, persist=False)
+        self._buffers.append(buffer)
+        self._serve(
+            {
+                name: self._buffer_variable(buffer, remote[name], arrays[name], extent)
+                for name, (_, extent) in projections.items()
+            }
+        )
+
+    def _serve(self, variables):
+        """
+        Serves the variables, a dict of name to prefetched variable, in place
+        of the dataset's variables of the same names
+        """
+        self._prefetched.update(variables)
+        self.__dict__["_variables"] = OrderedDict(
+            (name, self._prefetched.get(name, variable))
+            for name, variable in Dataset.variables.__get__(self).items()
+        )
+
+    def _buffer_variable(self, buffer, variable, values, extent):
+        """
+        Copies a variable with its prefetched values into the buffer dataset,
+        returning the variable to serve reads from
+        """
+        if extent == WHOLE:
+            dimensions = variable.dimensions
+            shape = variable.shape
+        else:
+            dimensions = ("{}_endpoints".format(variable.name),)
+            shape = values.shape
+        for dimension, size in zip(dimensions, shape):
+            if dimension not in buffer.dimensions:
+                buffer.createDimension(dimension, size)
+        attributes = {k: variable.getncattr(k) for k in variable.ncattrs()}
+        copy = buffer.createVariable(
+            variable.name,
+            variable.dtype,
+            dimensions,
+            fill_value=attributes.pop("_FillValue", None),
+        )
+        for attribute, value in attributes.items():
+            try:
+                copy.setncattr(attribute, value)
+            except (AttributeError, RuntimeError):
+                # reserved attributes set by the netCDF library
+                pass
+        copy.set_auto_maskandscale(False)
+        copy[...] = values.astype(variable.dtype).reshape(shape)
+        copy.set_auto_mask(variable.mask)
+        copy.set_auto_scale(variable.scale)
+        if extent == WHOLE:
+            return copy
+        return _EndpointsVariable(variable, copy)
+
+    def close(self):
+        for buffer in self._buffers:
+            buffer.close()
+        del self._buffers[:]
+        return super(PlannedDataset, self).close()
+
+
+class HeaderDataset(PlannedDataset):
+    """
+    ERDDAP tabledap dataset built from the header of its .ncCF file, without
+    any data.  The planned reads are fetched as the first rows of the dataset
+    in a single row-limited .ncCF request, and the data of any other
+    variable reads as missing, so CheckSuite.run skips the checkers without
+    a read plan.
+    """
+
+    def __init__(self, url, memory):
+        # the netCDF library would open a URL as an OPeNDAP dataset rather
+        # than the header in memory
+        super(HeaderDataset, self).__init__(urlparse(url).path, memory=memory)
+        self.__dict__["url"] = url
+
+    def prefetch(self, plan, max_rows=MAX_HEADER_ROWS):
+        """
+        Fetches the first max_rows rows of the planned variables which
+        haven't been prefetched yet in a single .ncCF request
+
+        :param dict plan: Variable name to read extent, as from plan_reads
+        :param int max_rows: Largest number of rows to fetch
+        """
+        remote = Dataset.variables.__get__(self)
+        names = [
+            name for name in plan if name in remote and name not in self._prefetched
+        ]
+        if not names:
+            return
+
+        url = erddap.row_limited_url(self.url, names, max_rows)
+        with span("prefetch", url=url, variables=len(names)):
+            try:
+                response = requests.get(url, timeout=60)
+                response.raise_for_status()
+                data = Dataset("prefetch.nc", memory=response.content)
+            except (OSError, requests.RequestException) as e:
+                warnings.warn(
+                    "Could not fetch data from {}, checks reading it will "
+                    "see missing values: {}".format(self.url, e)
+                )
+                return
+
+        self._buffers.append(data)
+        truncated = [
+            name
+            for name, dimension in data.dimensions.items()
+            if name in self.dimensions and len(dimension) < len(self.dimensions[name])
+        ]
+        if truncated:
+            warnings.warn(
+                "Only the first {} rows of {} were fetched, checks of its "
+                "data only see those rows".format(max_rows, self.url)
+            )
+        self._serve(
+            {name: data.variables[name] for name in names if name in data.variables}
+        )
@@ -0,0 +1,214 @@
+"""
+Downloads upcoming remote datasets in background threads while the current
+dataset is being checked, so that the network and the checks are busy at
+the same time when checking many remote files
+"""
+import os
+import shutil
+import tempfile
+import threading
+
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from compliance_checker.protocols import netcdf
+from compliance_checker.tracing import span
+
+
+# number of datasets downloaded at once
+DEFAULT_MAX_IN_FLIGHT = 4
+# largest total size of the downloaded datasets waiting to be checked
+DEFAULT_DISK_BUDGET = 2 * 2**30
+
+CHUNK_SIZE = 2**20
+
+
+class Prefetcher(object):
+    """
+    Iterates over dataset locations, yielding each location with the path of
+    its download, or None if it isn't downloaded ahead.  Remote netCDF files
+    which would be downloaded whole (from servers without range request
+    support, or generated by a query) are downloaded into a temporary
+    directory by up to max_in_flight threads, in order, while the total size
+    of the downloads which haven't been checked yet is within disk_budget.
+
+    A download is deleted when the next location is requested, so the
+    dataset must be closed by then.  Other locations, and downloads which
+    fail or don't fit in the budget, are left to CheckSuite.load_dataset.
+
+        with Prefetcher(locations) as prefetcher:
+            for location, path in prefetcher:
+                ds = cs.load_dataset(path or location)
+    """
+
+    def __init__(
+        self,
+        locations,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        disk_budget=DEFAULT_DISK_BUDGET,
+        directory=None,
+    ):
+        self.locations = list(locations)
+        self.max_in_flight = max_in_flight
+        self.disk_budget = disk_budget
+        self.directory = directory
+        self._condition = threading.Condition()
+        # index of the next location allowed to reserve space, so space is
+        # reserved in the order the downloads are checked in
+        self._next_reservation = 0
+        self._reserved = 0
+        self._closed = False
+        self._executor = None
+        self._futures = []
+        self._tmpdir = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        """
+        Starts downloading, which entering the prefetcher as a context
+        manager does
+        """
+        self._tmpdir = tempfile.mkdtemp(
+            prefix="compliance-checker-", dir=self.directory
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="prefetch"
+        )
+        self._futures = [
+            self._executor.submit(self._prefetch, index, location)
+            for index, location in enumerate(self.locations)
+        ]
+
+    def wait(self, index):
+        """
+        Waits until the location at index has been downloaded, or won't be
+        """
+        futures.wait(self._futures[index : index + 1])
+
+    def close(self):
+        """
+        Cancels the pending downloads and deletes the downloaded files
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._executor is not None:
+            for future in self._futures:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def __iter__(self):
+        for location, future in zip(self.locations, self._futures):
+            # a failed download leaves the location to be loaded as usual,
+            # rather than stopping the other locations from being checked
+            try:
+                path, size = future.result()
+            except Exception:
+                path, size = None, 0
+            try:
+                yield location, path
+            finally:
+                if path is not None:
+                    os.remove(path)
+                    self._release(size)
+
+    def _reserve(self, index, size):
+        """
+        Waits until the earlier locations have reserved space and size bytes
+        fit in the budget, and reserves them.  Returns False if the size
+        can't be reserved.
+        """
+        with self._condition:
+            while not self._closed and (
+                self._next_reservation != index
+                or (size and self._reserved + size > self.disk_budget)
+            ):
+                self._condition.wait()
+            if self._closed:
+                return False
+            self._next_reservation += 1
+            self._reserved += size
+            self._condition.notify_all()
+            return bool(size)
+
+    def _release(self, size):
+        with self._condition:
+            self._reserved -= size
+            self._condition.notify_all()
+
+    def _prefetch(self, index, location):
+        """
+        Downloads a location into the temporary directory if it should be,
+        returning the path and size of the download, or (None, 0)
+        """
+        # the later locations wait for this one to reserve space, so errors,
+        # such as from malformed URLs, mustn't stop it from reserving
+        try:
+            size = download_size(location, self.disk_budget)
+        except Exception:
+            size = 0
+        if not self._reserve(index, size):
+            return None, 0
+        path = os.path.join(self._tmpdir, "{}.nc".format(index))
+        if not download(location, path):
+            self._release(size)
+            return None, 0
+        return path, size
+
+
+def download_size(location, max_size=DEFAULT_DISK_BUDGET):
+    """
+    Returns the size of the download of a location, or 0 if it shouldn't be
+    downloaded ahead: if it isn't a remote netCDF file which would be
+    downloaded whole, its size is unknown or it is larger than max_size
+
+    :param str location: Dataset path or URL
+    :param int max_size: Largest size in bytes to download
+    :rtype: int
+    """
+    if not urlparse(location).netloc:
+        return 0
+    headers = netcdf.remote_headers(location)
+    if not netcdf.is_remote_netcdf(location, headers):
+        return 0
+    # files read with range requests aren't downloaded
+    if netcdf.accepts_byte_ranges(headers) and not urlparse(location).query:
+        return 0
+    size = int(headers.get("content-length") or 0)
+    return size if size <= max_size else 0
+
+
+def download(location, path):
+    """
+    Downloads a URL to path, returning whether it succeeded.  Errors are
+    left to be raised when the location is loaded as usual.
+
+    :param str location: URL to download
+    :param str path: Path of the file to write
+    :rtype: bool
+    """
+    try:
+        with span("prefetch_download", url=location):
+            with requests.get(location, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                with open(path, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+    except (OSError, requests.RequestException):
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    return True
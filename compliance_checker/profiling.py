@@ -0,0 +1,119 @@
+"""
+Profiling support for check runs, writing either cProfile statistics or
+sampled stacks in the collapsed format read by flamegraph tools
+"""
+import cProfile
+import os
+import re
+import sys
+import threading
+
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class SamplingProfiler(object):
+    """
+    Statistical profiler which samples the call stack of the thread which
+    enabled it at a regular interval while enabled, in the same way that
+    cProfile.Profile profiles while enabled.
+
+    The sampled stacks are written by dump_stats in the collapsed format,
+    one line per distinct stack with the frames from the outermost call
+    separated by semicolons followed by the number of samples, which can be
+    read by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._sampler = None
+        self._stop = threading.Event()
+
+    def enable(self):
+        if self._sampler is not None:
+            return
+        self._stop.clear()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), daemon=True
+        )
+        self._sampler.start()
+
+    def disable(self):
+        if self._sampler is None:
+            return
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+
+    def _sample(self, thread_id):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    "{} ({}:{})".format(
+                        code.co_name, code.co_filename, code.co_firstlineno
+                    )
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump_stats(self, filename):
+        with open(filename, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write("{} {}\n".format(stack, count))
+
+
+# profile format -> (profiler class, file extension)
+PROFILE_FORMATS = {
+    "pstats": (cProfile.Profile, "pstats"),
+    "collapsed": (SamplingProfiler, "collapsed"),
+}
+
+
+def new_profiler(profile_format="pstats"):
+    """
+    Returns a new profiler for the profile format, either "pstats" for a
+    deterministic cProfile profiler or "collapsed" for a sampling profiler
+    """
+    return PROFILE_FORMATS[profile_format][0]()
+
+
+def profile_filename(directory, ds_loc, profile_format="pstats", index=None):
+    """
+    Returns the path of the profile for a dataset in directory, named after
+    the file name of the dataset path or URL and prefixed with index if
+    given
+
+    :param str directory: Directory the profiles are written to
+    :param str ds_loc: Dataset location
+    :param str profile_format: Profile format, which sets the file extension
+    :param int index: Optional index of the dataset in the run
+    """
+    name = os.path.basename(urlparse(ds_loc).path.rstrip("/")) or "dataset"
+    name = re.sub(r"[^\w.-]", "_", name)
+    if index is not None:
+        name = "{}-{}".format(index, name)
+    return os.path.join(
+        directory, "{}.{}".format(name, PROFILE_FORMATS[profile_format][1])
+    )
+
+
+@contextmanager
+def profiling(profiler, enabled=True):
+    """
+    Enables the profiler within the block, unless the profiler is None or
+    enabled is False
+    """
+    if profiler is None or not enabled:
+        yield
+        return
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
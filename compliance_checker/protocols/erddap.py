@@ -1,3 +1,9 @@
+import re
+import urllib.parse
+
+import requests
+
+
 def is_tabledap(url):
     """
     Identify a dataset as an ERDDAP TableDAP dataset.
@@ -12,3 +18,103 @@ def is_tabledap(url):
     """
 
     return "tabledap" in url
+
+
+# variable declaration in a header, with NetCDF-Java's "dim=size" dimensions
+_VARIABLE_RE = re.compile(r"^(\s*\w+\s+)([\w.\-]+)\s*(?:\(([^)]*)\))?\s*;")
+# attribute of the last declared variable, without the variable name
+_ATTRIBUTE_RE = re.compile(r"^(\s*):[\w.\-]+\s*=")
+
+
+def header_to_cdl(header):
+    """
+    Converts an ERDDAP .ncCFHeader response, which is the header of the
+    .ncCF file as dumped by NetCDF-Java, into CDL which ncgen accepts.  The
+    dataset is renamed, sizes are dropped from the dimensions of variables
+    and variable names are added to their attributes.
+
+    Parameters
+    ----------
+    header (str): .ncCFHeader response text
+
+    Returns
+    -------
+    str
+    """
+    lines = []
+    section = None
+    variable = None
+    for line in header.splitlines():
+        stripped = line.strip()
+        if section is None:
+            if stripped.startswith("netcdf "):
+                # the dataset name is a file path, which isn't a CDL name
+                lines.append("netcdf header {")
+                section = "header"
+            continue
+        if stripped in {"dimensions:", "variables:", "data:"}:
+            section = stripped[:-1]
+            variable = None
+        elif stripped.startswith("// global attributes"):
+            variable = None
+        elif section == "variables" and not stripped.startswith(":"):
+            match = _VARIABLE_RE.match(line)
+            if match:
+                prefix, variable, dimensions = match.groups()
+                if dimensions is not None:
+                    dimensions = ", ".join(
+                        d.split("=")[0].strip()
+                        for d in dimensions.split(",")
+                        if d.strip()
+                    )
+                    line = "{}{}({});".format(prefix, variable, dimensions)
+                    if not dimensions:
+                        line = "{}{};".format(prefix, variable)
+        elif section == "variables" and variable is not None:
+            match = _ATTRIBUTE_RE.match(line)
+            if match:
+                indent = match.group(1)
+                line = "{}{}{}".format(indent, variable, line[len(indent) :])
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def fetch_header(url, variables_str):
+    """
+    Requests the header of the .ncCF file of the variables of a tabledap
+    dataset, without any data
+
+    Parameters
+    ----------
+    url (str): tabledap dataset URL
+    variables_str (str): URL-encoded comma separated variable names
+
+    Returns
+    -------
+    str
+    """
+    response = requests.get("{}.ncCFHeader?{}".format(url, variables_str), timeout=60)
+    response.raise_for_status()
+    return response.text
+
+
+def row_limited_url(url, variables, max_rows):
+    """
+    Returns the URL of an .ncCF file of the first max_rows rows of the
+    variables of a tabledap dataset
+
+    Parameters
+    ----------
+    url (str): tabledap dataset URL
+    variables (list): variable names
+    max_rows (int): maximum number of rows
+
+    Returns
+    -------
+    str
+    """
+    return "{}.ncCF?{}&{}".format(
+        url,
+        urllib.parse.quote(",".join(variables)),
+        urllib.parse.quote('orderByLimit("{}")'.format(max_rows)),
+    )
@@ -7,6 +7,8 @@ Functions to assist in determining if the URL points to a netCDF file
 
 import requests
 
+from requests.structures import CaseInsensitiveDict
+
 
 def is_netcdf(url):
     """
@@ -61,9 +63,10 @@ def is_hdf5(file_buffer):
     return False
 
 
-def is_remote_netcdf(ds_str):
+def remote_headers(ds_str):
     """
-    Check a remote path points to a NetCDF resource.
+    Returns the response headers of a HEAD request for a remote path, or an
+    empty mapping if the request fails
 
     Parameters
     ----------
@@ -71,19 +74,70 @@ def is_remote_netcdf(ds_str):
 
     Returns
     -------
-    bool
+    requests.structures.CaseInsensitiveDict
     """
-
     # Some datasets do not support HEAD requests!  The vast majority will,
     # however, support GET requests
     try:
         head_req = requests.head(ds_str, allow_redirects=True, timeout=10)
         head_req.raise_for_status()
     except:
-        content_type = None
-    else:
-        content_type = head_req.headers.get("content-type")
+        return CaseInsensitiveDict()
+    return head_req.headers
+
+
+def is_remote_netcdf(ds_str, headers=None):
+    """
+    Check a remote path points to a NetCDF resource.
+
+    Parameters
+    ----------
+    ds_str (str): remote path to a dataset
+    headers (dict): headers of a HEAD request for the path, as returned by
+                    remote_headers, requested if not given
+
+    Returns
+    -------
+    bool
+    """
+    if headers is None:
+        headers = remote_headers(ds_str)
+    content_type = headers.get("content-type")
 
     # if the Content-Type header returned was "application/x-netcdf",
     # or a netCDF file (not OPeNDAP) we can open this into a Dataset
     return content_type == "application/x-netcdf"
+
+
+def accepts_byte_ranges(headers):
+    """
+    Check whether a server supports HTTP range requests for a resource, so
+    that it can be read in pages rather than downloaded in full.
+
+    Parameters
+    ----------
+    headers (dict): headers of a HEAD request for the resource
+
+    Returns
+    -------
+    bool
+    """
+    return headers.get("accept-ranges", "").lower() == "bytes"
+
+
+def byte_range_url(ds_str):
+    """
+    Returns the URL which makes the netCDF-C library read a remote netCDF
+    file with HTTP range requests, fetching only the parts of the file which
+    are accessed
+
+    Parameters
+    ----------
+    ds_str (str): URL of a remote netCDF file
+
+    Returns
+    -------
+    str
+    """
+    separator = "&" if "#" in ds_str else "#"
+    return "{}{}mode=bytes".format(ds_str, separator)
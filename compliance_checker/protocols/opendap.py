@@ -4,9 +4,14 @@ compliance_checker/protocols/opendap.py
 
 Functions to assist in determining if the URL is an OPeNDAP endpoint
 """
+import re
+import struct
 import urllib.parse
 import urllib.request
 
+from collections import OrderedDict
+
+import numpy as np
 import requests
 
 
@@ -66,3 +71,147 @@ def is_opendap(url):
     ):
         return True
     return False
+
+
+# DAP2 base types -> numpy dtype of their XDR encoding.  Bytes are packed in
+# arrays, while the other integer types smaller than 32 bits are sent as 32
+# bit integers.
+DAP_TYPES = {
+    "Byte": np.dtype("u1"),
+    "Int16": np.dtype(">i4"),
+    "UInt16": np.dtype(">u4"),
+    "Int32": np.dtype(">i4"),
+    "UInt32": np.dtype(">u4"),
+    "Float32": np.dtype(">f4"),
+    "Float64": np.dtype(">f8"),
+}
+DAP_STRING_TYPES = {"String", "Url"}
+
+_DDS_TOKEN_RE = re.compile(r"\s*([{}\[\]=;:]|[^\s{}\[\]=;:]+)")
+
+
+def _tokenize_dds(dds):
+    return _DDS_TOKEN_RE.findall(dds)
+
+
+def _parse_declarations(tokens, pos):
+    """
+    Parses declarations up to a closing brace, returning a list of
+    declarations and the position after the brace.  Array declarations are
+    ("array", type, name, shape) tuples and Grids are ("grid", name, array,
+    maps) tuples.
+    """
+    declarations = []
+    while tokens[pos] != "}":
+        if tokens[pos] == "Grid":
+            # Grid { ARRAY: decl MAPS: decl... } name;
+            if tokens[pos + 1 : pos + 4] != ["{", "ARRAY", ":"]:
+                raise ValueError("Invalid DDS Grid declaration")
+            pos += 4
+            members, pos = _parse_declarations(tokens, pos)
+            array, maps = members[0], [m for m in members[1:] if m[0] == "array"]
+            declarations.append(("grid", tokens[pos], array, maps))
+            pos += 2
+        elif tokens[pos] in {"Structure", "Sequence"}:
+            raise ValueError("DAP {} types are not supported".format(tokens[pos]))
+        elif tokens[pos] == "MAPS":
+            declarations.append(("maps",))
+            pos += 2
+        else:
+            dap_type, name = tokens[pos], tokens[pos + 1]
+            pos += 2
+            shape = []
+            while tokens[pos] == "[":
+                # [dim = size] or [size]
+                end = tokens.index("]", pos)
+                shape.append(int(tokens[end - 1]))
+                pos = end + 1
+            declarations.append(("array", dap_type, name, tuple(shape)))
+            pos += 1
+    return declarations, pos + 1
+
+
+def parse_dds(dds):
+    """
+    Parses a DAP2 Dataset Descriptor Structure of arrays and grids of base
+    types, returning a list of declarations in the order their data is sent
+
+    :param str dds: DDS text
+    :rtype: list
+    """
+    tokens = _tokenize_dds(dds)
+    if tokens[:2] != ["Dataset", "{"]:
+        raise ValueError("Invalid DDS: {}".format(dds[:100]))
+    try:
+        declarations, _ = _parse_declarations(tokens, 2)
+    except IndexError:
+        raise ValueError("Truncated DDS: {}".format(dds[:100]))
+    return declarations
+
+
+def _decode_array(data, pos, dap_type, shape):
+    count = int(np.prod(shape)) if shape else 1
+    if dap_type in DAP_STRING_TYPES:
+        if shape:
+            pos += 4
+        values = []
+        for _ in range(count):
+            (length,) = struct.unpack_from(">I", data, pos)
+            pos += 4
+            values.append(data[pos : pos + length].decode("utf-8"))
+            pos += length + (-length % 4)
+        return np.array(values, dtype=object).reshape(shape), pos
+    dtype = DAP_TYPES[dap_type]
+    if shape:
+        # arrays are preceded by their length, twice
+        pos += 8
+    nbytes = count * dtype.itemsize
+    values = np.frombuffer(data, dtype=dtype, count=count, offset=pos)
+    if dtype.itemsize == 1 and not shape:
+        # scalar bytes are padded to four bytes like any other XDR value
+        nbytes = 4
+    pos += nbytes + (-nbytes % 4)
+    return values.reshape(shape), pos
+
+
+def decode_dods(content):
+    """
+    Decodes a DAP2 data response of arrays and grids of base types into a
+    dict of variable name to numpy array.  The values are as sent by the
+    server, without any scaling or masking applied.
+
+    :param bytes content: Body of a .dods response
+    :rtype: collections.OrderedDict
+    """
+    dds, separator, data = content.partition(b"\nData:\n")
+    if not separator:
+        raise ValueError("Invalid DAP data response: {}".format(content[:200]))
+    values = OrderedDict()
+    pos = 0
+    for declaration in parse_dds(dds.decode("utf-8")):
+        if declaration[0] == "grid":
+            _, name, array, maps = declaration
+            members = [(name, array)] + [(m[2], m) for m in maps]
+        else:
+            members = [(declaration[2], declaration)]
+        for name, (_, dap_type, _, shape) in members:
+            array, pos = _decode_array(data, pos, dap_type, shape)
+            values.setdefault(name, array)
+    return values
+
+
+def fetch_data(url, projections):
+    """
+    Requests the projections of an OPeNDAP dataset in a single DAP2 data
+    request and returns the decoded arrays by variable name
+
+    :param str url: OPeNDAP dataset URL
+    :param list projections: Variable names, optionally with hyperslabs such
+                             as "time[0:9:9]"
+    :rtype: collections.OrderedDict
+    """
+    url = urllib.parse.urldefrag(url)[0]
+    constraint = urllib.parse.quote(",".join(projections), safe=",:")
+    response = requests.get("{}.dods?{}".format(url, constraint), timeout=60)
+    response.raise_for_status()
+    return decode_dods(response.content)
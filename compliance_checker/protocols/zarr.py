@@ -0,0 +1,19 @@
+#!/usr/bin/env python
+"""
+compliance_checker/protocols/zarr.py
+"""
+import os
+
+
+def is_zarr(path):
+    """
+    Returns True if path is a local directory holding a Zarr (version 2)
+    group, such as a dataset written by xarray's to_zarr
+
+    :param str path: Location of the directory on the file system
+    """
+    if not os.path.isdir(path):
+        return False
+    return any(
+        os.path.isfile(os.path.join(path, name)) for name in (".zgroup", ".zmetadata")
+    )
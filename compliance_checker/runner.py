@@ -1,26 +1,21 @@
 import io
-import json
 import os
 import sys
 import traceback
 
 from collections import OrderedDict
-from contextlib import contextmanager
-
+from contextlib import ExitStack
+from functools import partial
+from urllib.parse import urlparse
+
+from compliance_checker.backends import DEFAULT_BACKEND
+from compliance_checker.concurrency import NETCDF_LOCK, run_cancellable, run_io
+from compliance_checker.prefetch import DEFAULT_DISK_BUDGET, Prefetcher
+from compliance_checker.profiling import new_profiler, profile_filename, profiling
 from compliance_checker.suite import CheckSuite
-
-
-# Py 3.4+ has contextlib.redirect_stdout to redirect stdout to a different
-# stream, but use this decorated function in order to redirect output in
-# previous versions
-@contextmanager
-def stdout_redirector(stream):
-    old_stdout = sys.stdout
-    sys.stdout = stream
-    try:
-        yield
-    finally:
-        sys.stdout = old_stdout
+from compliance_checker.timing import Timer, trace_memory
+from compliance_checker.tracing import traced
+from compliance_checker.util import json_dumps
 
 
 class ComplianceChecker(object):
@@ -43,6 +38,16 @@ class ComplianceChecker(object):
         output_filename="-",
         output_format=["text"],
         options=None,
+        timings=False,
+        profile=None,
+        profile_format="pstats",
+        profile_checkers=None,
+        header_only=False,
+        prefetch=0,
+        prefetch_budget=DEFAULT_DISK_BUDGET,
+        downloads=None,
+        metadata_cache=None,
+        backend=DEFAULT_BACKEND,
     ):
         """
         Static check runner.
@@ -54,14 +59,52 @@ class ComplianceChecker(object):
         @param  output_filename Path to the file for output
         @param  skip_checks     Names of checks to skip
         @param  output_format   Format of the output(s)
+        @param  timings         Whether to report the time and resources used
+                                by dataset loading, checker setup and each
+                                check in the text and JSON outputs
+        @param  profile         Directory to write a profile of each dataset
+                                to, or None to not profile
+        @param  profile_format  Either 'pstats' for cProfile statistics or
+                                'collapsed' for sampled stacks for flamegraph
+                                tools
+        @param  profile_checkers Names of the checkers to restrict profiling
+                                to, if any.  Dataset loading is only profiled
+                                when profiling isn't restricted
+        @param  header_only     Whether to load ERDDAP tabledap datasets from
+                                their header, fetching only the first rows
+                                of the data checks read
+        @param  prefetch        Number of remote datasets to download at once
+                                ahead of the dataset being checked, when
+                                checking more than one.  Defaults to 0,
+                                which disables it.
+        @param  prefetch_budget Largest total size in bytes of the datasets
+                                downloaded ahead
+        @param  downloads       Dict of dataset locations to the paths of
+                                local copies to load instead, or a started
+                                Prefetcher of the locations, which disables
+                                prefetching
+        @param  metadata_cache  MetadataResultCache to reuse the results of
+                                checks which only read metadata from, for
+                                datasets with the same header.  May be shared
+                                between calls from one thread.
+        @param  backend         Name of the backend local netCDF files are
+                                opened with, one of
+                                compliance_checker.backends.BACKENDS
 
         @returns                If the tests failed (based on the criteria)
         """
-        all_groups = []
-        cs = CheckSuite(options=options or {})
+        cs = CheckSuite(
+            options=options or {},
+            timings=timings,
+            profile_checkers=profile_checkers,
+            header_only=header_only,
+            metadata_cache=metadata_cache,
+            backend=backend,
+        )
         # using OrderedDict is important here to preserve the order
         # of multiple datasets which may be passed in
         score_dict = OrderedDict()
+        timings_dict = OrderedDict() if timings else None
         if not isinstance(ds_loc, str):
             locs = ds_loc
         # if single dataset, put in list
@@ -72,23 +115,6 @@ class ComplianceChecker(object):
         if isinstance(output_format, str):
             output_format = [output_format]
 
-        for loc in locs:  # loop through each dataset and run specified checks
-            ds = cs.load_dataset(loc)
-
-            score_groups = cs.run(ds, skip_checks, *checker_names)
-            for group in score_groups.values():
-                all_groups.append(group[0])
-            # TODO: consider wrapping in a proper context manager instead
-            if hasattr(ds, "close"):
-                ds.close()
-
-            if not score_groups:
-                raise ValueError(
-                    "No checks found, please check the name of the checker(s) and that they are installed"
-                )
-            else:
-                score_dict[loc] = score_groups
-
         # define a score limit to truncate the output to the strictness level
         # specified by the user
         if criteria == "normal":
@@ -98,12 +124,87 @@ class ComplianceChecker(object):
         elif criteria == "lenient":
             limit = 3
 
+        # JSON Lines output is written as each dataset finishes, so results
+        # only need to be kept around for the other output formats
+        keep_results = any(out_fmt != "jsonl" for out_fmt in output_format)
+        all_passed = True
+
+        with ExitStack() as stack:
+            stack.enter_context(trace_memory(timings))
+            jsonl_stream = None
+            if "jsonl" in output_format:
+                if output_filename == "-":
+                    jsonl_stream = sys.stdout
+                else:
+                    jsonl_filename = output_filename
+                    if len(output_format) > 1:
+                        jsonl_filename = "{}.jsonl".format(
+                            os.path.splitext(output_filename)[0]
+                        )
+                    jsonl_stream = stack.enter_context(
+                        io.open(jsonl_filename, "w", encoding="utf-8")
+                    )
+
+            if profile is not None:
+                os.makedirs(profile, exist_ok=True)
+
+            # download upcoming remote datasets while checking the current one
+            if isinstance(downloads, Prefetcher):
+                datasets = downloads
+            elif downloads is not None:
+                datasets = ((loc, downloads.get(loc)) for loc in locs)
+            elif prefetch and len(locs) > 1:
+                datasets = stack.enter_context(
+                    Prefetcher(locs, prefetch, prefetch_budget)
+                )
+            else:
+                datasets = ((loc, None) for loc in locs)
+
+            # loop through each dataset and run specified checks
+            for index, (loc, path) in enumerate(datasets):
+                if profile is not None:
+                    cs.profiler = new_profiler(profile_format)
+                load_timer = Timer(timings)
+                with profiling(cs.profiler, not profile_checkers), load_timer:
+                    ds = cs.load_dataset(path or loc)
+
+                score_groups = cs.run(ds, skip_checks, *checker_names)
+                if profile is not None:
+                    cs.profiler.dump_stats(
+                        profile_filename(
+                            profile,
+                            loc,
+                            profile_format,
+                            index if len(locs) > 1 else None,
+                        )
+                    )
+                if timings:
+                    timings_dict[loc] = {
+                        "load": load_timer.result,
+                        "checkers": cs.timings,
+                    }
+                for group in score_groups.values():
+                    all_passed = cs.passtree(group[0], limit) and all_passed
+                # TODO: consider wrapping in a proper context manager instead
+                if hasattr(ds, "close"):
+                    with NETCDF_LOCK:
+                        ds.close()
+
+                if not score_groups:
+                    raise ValueError(
+                        "No checks found, please check the name of the checker(s) and that they are installed"
+                    )
+                if jsonl_stream is not None:
+                    cls.jsonl_output(
+                        cs, loc, score_groups, jsonl_stream, limit, timings_dict
+                    )
+                if keep_results:
+                    score_dict[loc] = score_groups
+
         for out_fmt in output_format:
             if out_fmt == "text":
                 if output_filename == "-":
-                    cls.stdout_output(cs, score_dict, verbose, limit)
-                # need to redirect output from stdout since print functions are
-                # presently used to generate the standard report output
+                    cls.stdout_output(cs, score_dict, verbose, limit, timings_dict)
                 else:
                     if len(output_format) > 1:
                         # Update file name if needed
@@ -111,8 +212,9 @@ class ComplianceChecker(object):
                             os.path.splitext(output_filename)[0]
                         )
                     with io.open(output_filename, "w", encoding="utf-8") as f:
-                        with stdout_redirector(f):
-                            cls.stdout_output(cs, score_dict, verbose, limit)
+                        cls.stdout_output(
+                            cs, score_dict, verbose, limit, timings_dict, stream=f
+                        )
 
             elif out_fmt == "html":
                 # Update file name if needed
@@ -122,26 +224,97 @@ class ComplianceChecker(object):
                     )
                 cls.html_output(cs, score_dict, output_filename, ds_loc, limit)
 
+            elif out_fmt == "jsonl":
+                # already written as each dataset was checked
+                pass
+
             elif out_fmt in {"json", "json_new"}:
                 # Update file name if needed
                 if len(output_format) > 1 and output_filename != "-":
                     output_filename = "{}.json".format(
                         os.path.splitext(output_filename)[0]
                     )
-                cls.json_output(cs, score_dict, output_filename, ds_loc, limit, out_fmt)
+                cls.json_output(
+                    cs,
+                    score_dict,
+                    output_filename,
+                    ds_loc,
+                    limit,
+                    out_fmt,
+                    timings_dict,
+                )
 
             else:
                 raise TypeError("Invalid format %s" % out_fmt)
 
             errors_occurred = cls.check_errors(score_groups, verbose)
 
-        return (
-            all(cs.passtree(groups, limit) for groups in all_groups),
-            errors_occurred,
-        )
+        return all_passed, errors_occurred
+
+    @classmethod
+    async def run_checker_async(
+        cls,
+        ds_loc,
+        checker_names,
+        verbose,
+        criteria,
+        executor=None,
+        limiter=None,
+        **kwargs
+    ):
+        """
+        Asynchronous check runner, taking the same arguments as run_checker.
+        Remote netCDF files which would be downloaded whole are downloaded
+        by a Prefetcher in its own threads, `prefetch` at once or one at a
+        time by default, so that the runs sharing the check executor overlap
+        their downloads with each other's checks.  The checks start once the
+        first download is done, without blocking the event loop while
+        waiting for it, and the datasets are loaded and checked with
+        run_checker in executor.  Remote files read with range requests or
+        over OPeNDAP are still read as the checks access them.  Cancelling
+        the awaiting task stops the run before its next check.
+
+        @param  executor        Thread pool to run the checks in.  Defaults to
+                                a shared single thread executor, as the
+                                netCDF library isn't thread safe.
+        @param  limiter         asyncio.Semaphore shared between runs to limit
+                                how many are in flight at once, if any
+
+        @returns                If the tests failed (based on the criteria)
+        """
+        args = (ds_loc, checker_names, verbose, criteria, executor, kwargs)
+        if limiter is None:
+            return await cls._run_checker_async(*args)
+        async with limiter:
+            return await cls._run_checker_async(*args)
 
     @classmethod
-    def stdout_output(cls, cs, score_dict, verbose, limit):
+    async def _run_checker_async(
+        cls, ds_loc, checker_names, verbose, criteria, executor, kwargs
+    ):
+        locs = [ds_loc] if isinstance(ds_loc, str) else list(ds_loc)
+        prefetch = kwargs.pop("prefetch", 0) or 1
+        budget = kwargs.pop("prefetch_budget", DEFAULT_DISK_BUDGET)
+        run = partial(cls.run_checker, ds_loc, checker_names, verbose, criteria)
+        if "downloads" in kwargs or not any(urlparse(loc).netloc for loc in locs):
+            return await run_cancellable(partial(run, **kwargs), executor)
+
+        prefetcher = Prefetcher(locs, prefetch, budget)
+        prefetcher.start()
+        try:
+            await run_io(prefetcher.wait, 0)
+            return await run_cancellable(
+                partial(run, downloads=prefetcher, **kwargs), executor
+            )
+        finally:
+            # waits for the downloads in flight to stop
+            await run_io(prefetcher.close)
+
+    @classmethod
+    @traced("stdout_output")
+    def stdout_output(
+        cls, cs, score_dict, verbose, limit, timings_dict=None, stream=None
+    ):
         """
         Calls output routine to display results in terminal, including scoring.
         Goes to verbose function if called by user.
@@ -151,58 +324,94 @@ class ComplianceChecker(object):
                             value
         @param verbose      Integer value for verbosity level
         @param limit        The degree of strictness, 1 being the strictest, and going up from there.
+        @param timings_dict Optional dict with dataset name as key and the
+                            dataset load and checker timings as value
+        @param stream       Text stream to write the report to, defaulting to
+                            sys.stdout
         """
 
+        if stream is None:
+            stream = sys.stdout
         for ds, score_groups in score_dict.items():
             for checker, rpair in score_groups.items():
                 groups, errors = rpair
-                score_list, points, out_of = cs.standard_output(
-                    ds, limit, checker, groups
-                )
-                # send list of grouped result objects to stdout & reasoning_routine
-                cs.standard_output_generation(
-                    groups, limit, points, out_of, check=checker
+                timings = ()
+                if timings_dict is not None:
+                    timings = (
+                        timings_dict[ds]["checkers"][checker],
+                        timings_dict[ds]["load"],
+                    )
+                # each checker's report is rendered into a buffer and
+                # written at once
+                stream.write(
+                    cs.checker_text_output(ds, limit, checker, groups, *timings)
                 )
         return groups
 
     @classmethod
-    def html_output(cls, cs, score_dict, output_filename, ds_loc, limit):
+    @traced("html_output")
+    def html_output(cls, cs, score_dict, output_filename, ds_loc, limit, stream=None):
         """
         Generates rendered HTML output for the compliance score(s)
         @param cs              Compliance Checker Suite
         @param score_groups    List of results
-        @param output_filename The file path to output to
+        @param output_filename The file path to output to, or "-" to write
+                               to stream
         @param ds_loc          List of source datasets
         @param limit           The degree of strictness, 1 being the strictest, and going up from there.
+        @param stream          Text stream to write the report to when
+                               output_filename is "-", defaulting to
+                               sys.stdout
         """
-        checkers_html = []
-        for ds, score_groups in score_dict.items():
-            for checker, (groups, errors) in score_groups.items():
-                checkers_html.append(cs.checker_html_output(checker, groups, ds, limit))
 
-        html = cs.html_output(checkers_html)
+        def checkers_html():
+            # render each checker's report lazily so that only one is held
+            # in memory at a time while the wrapper is streamed out
+            for ds, score_groups in score_dict.items():
+                for checker, (groups, errors) in score_groups.items():
+                    yield cs.checker_html_output(checker, groups, ds, limit)
+
         if output_filename == "-":
-            print(html)
+            if stream is None:
+                stream = sys.stdout
+            cs.write_html_output(checkers_html(), stream)
+            stream.write("\n")
         else:
             with io.open(output_filename, "w", encoding="utf8") as f:
-                f.write(html)
+                cs.write_html_output(checkers_html(), f)
 
-        return groups
+        # groups from the last checker run
+        return list(list(score_dict.values())[-1].values())[-1][0]
 
     @classmethod
+    @traced("json_output")
     def json_output(
-        cls, cs, score_dict, output_filename, ds_loc, limit, output_type="json"
+        cls,
+        cs,
+        score_dict,
+        output_filename,
+        ds_loc,
+        limit,
+        output_type="json",
+        timings_dict=None,
+        stream=None,
     ):
         """
         Generates JSON output for the ocmpliance score(s)
         @param cs              Compliance Checker Suite
         @param score_groups    List of results
-        @param output_filename The file path to output to
+        @param output_filename The file path to output to, or "-" to write
+                               to stream
         @param ds_loc          List of source datasets
         @param limit           The degree of strictness, 1 being the strictest,
                                and going up from there.
         @param output_type     Either 'json' or 'json_new'. json_new is the new
                                json output format that supports multiple datasets
+        @param timings_dict    Optional dict with dataset name as key and the
+                               dataset load and checker timings as value
+        @param stream          Text stream to write the report to when
+                               output_filename is "-", defaulting to
+                               sys.stdout
         """
         results = {}
         # json output keys out at the top level by
@@ -216,22 +425,62 @@ class ComplianceChecker(object):
                 for checker, rpair in score_groups.items():
                     groups, errors = rpair
                     results[checker] = cs.dict_output(checker, groups, ds, limit,)
+                    cls._add_timings(results[checker], timings_dict, ds, checker)
         elif output_type == "json_new":
             for ds, score_groups in score_dict.items():
                 for checker, rpair in score_groups.items():
                     groups, errors = rpair
                     results[ds] = {}
                     results[ds][checker] = cs.dict_output(checker, groups, ds, limit)
-        json_results = json.dumps(results, indent=2, ensure_ascii=False)
+                    cls._add_timings(results[ds][checker], timings_dict, ds, checker)
+        json_results = json_dumps(results, indent=2)
 
         if output_filename == "-":
-            print(json_results)
+            if stream is None:
+                stream = sys.stdout
+            stream.write(json_results)
+            stream.write("\n")
         else:
             with io.open(output_filename, "w", encoding="utf8") as f:
                 f.write(json_results)
 
         return groups
 
+    @classmethod
+    @traced("jsonl_output")
+    def jsonl_output(cls, cs, ds, score_groups, stream, limit, timings_dict=None):
+        """
+        Writes JSON Lines output for a single dataset, with one compact JSON
+        record per checker, and flushes the stream so consumers can follow
+        the results while a batch is still running.
+        @param cs              Compliance Checker Suite
+        @param ds              Source dataset location
+        @param score_groups    Dict of checker names to (results, errors)
+        @param stream          Text stream to write the records to
+        @param limit           The degree of strictness, 1 being the strictest,
+                               and going up from there.
+        @param timings_dict    Optional dict with dataset name as key and the
+                               dataset load and checker timings as value
+        """
+        for checker, (groups, errors) in score_groups.items():
+            record = cs.dict_output(checker, groups, ds, limit)
+            cls._add_timings(record, timings_dict, ds, checker)
+            stream.write(json_dumps(record))
+            stream.write("\n")
+        stream.flush()
+
+    @classmethod
+    def _add_timings(cls, record, timings_dict, ds, checker):
+        """
+        Adds the dataset load and checker timings to a checker's JSON record
+        under the "timings" key, if timings were recorded
+        """
+        if timings_dict is None:
+            return
+        timings = {"load": timings_dict[ds]["load"]}
+        timings.update(timings_dict[ds]["checkers"][checker])
+        record["timings"] = timings
+
     @classmethod
     def check_errors(cls, score_groups, verbose):
         """
@@ -258,7 +507,7 @@ class ComplianceChecker(object):
 
                     if verbose > 0:
                         traceback.print_tb(
-                            epair[1].tb_next.tb_next
+                            epair[1].tb_next.tb_next, file=sys.stderr
                         )  # skip first two as they are noise from the running itself @TODO search for check_name
                         print(file=sys.stderr)
 
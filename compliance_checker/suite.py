@@ -2,7 +2,6 @@
 Compliance Checker suite runner
 """
 
-import codecs
 import inspect
 import itertools
 import os
@@ -10,11 +9,15 @@ import re
 import subprocess
 import sys
 import textwrap
+import threading
+import time
 import warnings
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from distutils.version import StrictVersion
+from functools import lru_cache, partial
 from operator import itemgetter
 from urllib.parse import urlparse
 
@@ -26,17 +29,36 @@ from owslib.sos import SensorObservationService
 from owslib.swe.sensor.sml import SensorML
 from pkg_resources import working_set
 
-from compliance_checker import MemoizedDataset, __version__, tempnc
-from compliance_checker.base import BaseCheck, GenericFile, Result, fix_return_value
+from compliance_checker import MemoizedDataset, __version__, metrics, ncgen, tempnc
+from compliance_checker.backends import DEFAULT_BACKEND, open_dataset
+from compliance_checker.backends.readonly import ReadOnlyDataset
+from compliance_checker.backends.zarr_store import ZarrDataset
+from compliance_checker.base import (
+    BaseCheck,
+    GenericFile,
+    Result,
+    VariableVisitor,
+    fix_return_value,
+    walk_variables,
+)
 from compliance_checker.cf.cf import CFBaseCheck
-from compliance_checker.protocols import cdl, erddap, netcdf, opendap
-
-
-# Ensure output is encoded as Unicode when checker output is redirected or piped
-if sys.stdout.encoding is None:
-    sys.stdout = codecs.getwriter("utf8")(sys.stdout)
-if sys.stderr.encoding is None:
-    sys.stderr = codecs.getwriter("utf8")(sys.stderr)
+from compliance_checker.concurrency import (
+    NETCDF_LOCK,
+    raise_if_cancelled,
+    run_cancellable,
+)
+from compliance_checker.fingerprint import recording_attribute_reads
+from compliance_checker.planner import (
+    READ_PLANS,
+    HeaderDataset,
+    PlannedDataset,
+    plan_reads,
+)
+from compliance_checker.profiling import profiling
+from compliance_checker.protocols import cdl, erddap, netcdf, opendap, zarr
+from compliance_checker.timing import Timer, total_timings, trace_memory
+from compliance_checker.tracing import span
+from compliance_checker.util import json_float
 
 
 def extract_docstring_summary(docstring):
@@ -58,15 +80,159 @@ def extract_docstring_summary(docstring):
     )
 
 
+def _stream_writer(stream):
+    """
+    Returns the write method of a text stream, or of sys.stdout if it is None
+    """
+    return (sys.stdout if stream is None else stream).write
+
+
+def _visitor_timings(visitor):
+    """
+    Returns the timings of the time a VariableVisitor spent visiting, whose
+    reads and memory aren't measured separately from the traversal
+    """
+    return {
+        "wall_time": visitor.wall_time,
+        "cpu_time": visitor.cpu_time,
+        "read_calls": None,
+        "read_bytes": None,
+        "peak_memory": None,
+    }
+
+
+@contextmanager
+def _null_context():
+    """
+    A context manager which does nothing, like contextlib.nullcontext, which
+    is only available from Python 3.7
+    """
+    yield
+
+
+@lru_cache(maxsize=None)
+def get_jinja_environment(templates_root):
+    """
+    Returns the Jinja2 environment used to render HTML reports from the
+    templates packaged under `templates_root`.  The environment, and the
+    templates compiled by it, are cached for the life of the process.
+
+    :param str templates_root: Package containing a data/templates directory
+    :rtype: jinja2.Environment
+    """
+    from jinja2 import Environment, PackageLoader
+
+    # templates are package data and are not expected to change while
+    # running, so skip the up-to-date check on every template lookup
+    return Environment(
+        loader=PackageLoader(templates_root, "data/templates"), auto_reload=False
+    )
+
+
+metrics.REGISTRY.caches.register("get_jinja_environment", get_jinja_environment)
+
+
+CheckInfo = namedtuple(
+    "CheckInfo", ["name", "summary", "priority", "reads_data", "visits_variables"]
+)
+
+
+@lru_cache(maxsize=None)
+def get_check_registry(checker_class):
+    """
+    Returns the check methods of a checker class, which are the routines
+    named "check_*", as CheckInfo tuples sorted by name.  Each class is
+    introspected once, rather than for every dataset it checks.
+
+    :param type checker_class: A BaseCheck derived type
+    :rtype: tuple
+    :return: CheckInfo with the name of each check, its docstring summary
+             or None, the priority declared with check_has or None,
+             whether it reads variable data, or None if the checker doesn't
+             say, and whether it visits the variables with the other
+             visiting checks
+    """
+    data_checks = checker_class._cc_data_checks
+    registry = []
+    for name, method in inspect.getmembers(checker_class, inspect.isroutine):
+        if not name.startswith("check_"):
+            continue
+        check_has = getattr(method, "_cc_check_has", None)
+        registry.append(
+            CheckInfo(
+                name,
+                None
+                if method.__doc__ is None
+                else extract_docstring_summary(method.__doc__),
+                None if check_has is None else check_has[0],
+                None if data_checks is None else name in data_checks,
+                hasattr(method, "_cc_visitor"),
+            )
+        )
+    return tuple(registry)
+
+
+metrics.REGISTRY.caches.register("get_check_registry", get_check_registry)
+
+
 class CheckSuite(object):
+    """
+    Loads datasets and runs checkers on them.
+
+    A CheckSuite keeps the state of its runs, such as timings and the
+    profiler, on the instance, so concurrent runs from different threads
+    should each use their own CheckSuite and dataset.  Loading checkers
+    replaces the class's checkers dict with an updated copy, so suites
+    running in other threads keep seeing a complete registry.  Reports are
+    written to the stream they are given, defaulting to sys.stdout when it
+    is looked up.  As the netCDF library isn't thread safe, loading and
+    checking netCDF datasets is serialized between threads by
+    NETCDF_LOCK, while other work, such as network requests and rendering
+    reports, runs concurrently.  Other datasets, such as SOS documents and
+    datasets opened with a backend other than netcdf4, are checked without
+    holding NETCDF_LOCK.
+    """
+
     checkers = (
         {}
     )  # Base dict of checker names to BaseCheck derived types, override this in your CheckSuite implementation
     templates_root = "compliance_checker"  # modify to load alternative Jinja2 templates
-
-    def __init__(self, options=None):
+    # serializes loading checkers into the class's checkers dict
+    _checkers_lock = threading.Lock()
+
+    def __init__(
+        self,
+        options=None,
+        timings=False,
+        profiler=None,
+        profile_checkers=None,
+        header_only=False,
+        checkers=None,
+        metadata_cache=None,
+        backend=DEFAULT_BACKEND,
+    ):
         self.col_width = 40
+        # checkers of this suite only, instead of the class's loaded checkers
+        if checkers is not None:
+            self.checkers = dict(checkers)
         self.options = options or {}
+        # when enabled, run() records the time and resources used by each
+        # checker's setup and checks in self.timings
+        self.record_timings = timings
+        self.timings = {}
+        # profiler enabled by run() while running the checkers named in
+        # profile_checkers, or all checkers if none are named
+        self.profiler = profiler
+        self.profile_checkers = set(profile_checkers or ())
+        # when enabled, ERDDAP tabledap datasets are loaded from the header
+        # of their .ncCF file, with only the data checks read fetched
+        self.header_only = header_only
+        # MetadataResultCache of the results of checks which only read
+        # metadata, reused between datasets with the same header, if any
+        self.metadata_cache = metadata_cache
+        # name of the backend local netCDF files are opened with, see
+        # compliance_checker.backends
+        self.backend = backend
 
     @classmethod
     def _get_generator_plugins(cls):
@@ -81,7 +247,7 @@ class CheckSuite(object):
 
         return cls.suite_generators
 
-    def _print_suites(self, verbose=0):
+    def _print_suites(self, verbose=0, stream=None):
         """
         Prints out available check suites.  If the verbose argument is True,
         includes the internal module version number of the check and also displays
@@ -89,30 +255,32 @@ class CheckSuite(object):
         :param check_suite: Check suite object
         :param verbose: Integer indicating whether to print verbose output
         :type verbose: int
+        :param stream: Text stream to print to, defaulting to sys.stdout
         """
         for checker in sorted(self.checkers.keys()):
             version = getattr(self.checkers[checker], "_cc_checker_version", "???")
             if verbose > 0:
-                print(" - {} (v{})".format(checker, version))
+                print(" - {} (v{})".format(checker, version), file=stream)
             elif ":" in checker and not checker.endswith(
                 ":latest"
             ):  # Skip the "latest" output
-                print(" - {}".format(checker))
+                print(" - {}".format(checker), file=stream)
 
-    def _print_checker(self, checker_obj):
+    def _print_checker(self, checker_obj, stream=None):
         """
         Prints each available check and a description with an abridged
         docstring for a given checker object
         :param checker_obj: Checker object on which to operate
         :type checker_obj: subclass of compliance_checker.base.BaseChecker
+        :param stream: Text stream to print to, defaulting to sys.stdout
         """
 
-        check_functions = self._get_checks(checker_obj, defaultdict(lambda: None))
-        for c, _ in check_functions:
-            print("- {}".format(c.__name__))
-            if c.__doc__ is not None:
-                u_doc = c.__doc__
-                print("\n{}\n".format(extract_docstring_summary(u_doc)))
+        if not isinstance(checker_obj, type):
+            checker_obj = type(checker_obj)
+        for check in get_check_registry(checker_obj):
+            print("- {}".format(check.name), file=stream)
+            if check.summary is not None:
+                print("\n{}\n".format(check.summary), file=stream)
 
     @classmethod
     def add_plugin_args(cls, parser):
@@ -129,9 +297,11 @@ class CheckSuite(object):
         Load checker classes from generator plugins
         """
 
-        for gen in cls._get_generator_plugins():
-            checkers = gen.get_checkers(args)
-            cls.checkers.update(checkers)
+        with cls._checkers_lock:
+            checkers = dict(cls.checkers)
+            for gen in cls._get_generator_plugins():
+                checkers.update(gen.get_checkers(args))
+            cls.checkers = checkers
 
     @classmethod
     def load_all_available_checkers(cls):
@@ -144,55 +314,60 @@ class CheckSuite(object):
     @classmethod
     def _load_checkers(cls, checkers):
         """
-        Loads up checkers in an iterable into the class checkers dict
+        Loads up checkers in an iterable into the class checkers dict.  The
+        dict is replaced with an updated copy, so that it can be read while
+        checkers are being loaded in another thread
         :param checkers: An iterable containing the checker objects
         """
 
-        for c in checkers:
-            try:
-                check_obj = c.resolve()
-                if hasattr(check_obj, "_cc_spec") and hasattr(
-                    check_obj, "_cc_spec_version"
-                ):
-                    check_version_str = ":".join(
-                        (check_obj._cc_spec, check_obj._cc_spec_version)
-                    )
-                    cls.checkers[check_version_str] = check_obj
-                # TODO: remove this once all checkers move over to the new
-                #       _cc_spec, _cc_spec_version
-                else:
-                    # if _cc_spec and _cc_spec_version attributes aren't
-                    # present, fall back to using name attribute
-                    checker_name = getattr(check_obj, "name", None) or getattr(
-                        check_obj, "_cc_spec", None
-                    )
-                    warnings.warn(
-                        "Checker for {} should implement both "
-                        '"_cc_spec" and "_cc_spec_version" '
-                        'attributes. "name" attribute is deprecated. '
-                        "Assuming checker is latest version.",
-                        DeprecationWarning,
-                    )
-                    # append "unknown" to version string since no versioning
-                    # info was provided
-                    cls.checkers["{}:unknown".format(checker_name)] = check_obj
+        with cls._checkers_lock:
+            loaded = dict(cls.checkers)
+            for c in checkers:
+                try:
+                    check_obj = c.resolve()
+                    if hasattr(check_obj, "_cc_spec") and hasattr(
+                        check_obj, "_cc_spec_version"
+                    ):
+                        check_version_str = ":".join(
+                            (check_obj._cc_spec, check_obj._cc_spec_version)
+                        )
+                        loaded[check_version_str] = check_obj
+                    # TODO: remove this once all checkers move over to the new
+                    #       _cc_spec, _cc_spec_version
+                    else:
+                        # if _cc_spec and _cc_spec_version attributes aren't
+                        # present, fall back to using name attribute
+                        checker_name = getattr(check_obj, "name", None) or getattr(
+                            check_obj, "_cc_spec", None
+                        )
+                        warnings.warn(
+                            "Checker for {} should implement both "
+                            '"_cc_spec" and "_cc_spec_version" '
+                            'attributes. "name" attribute is deprecated. '
+                            "Assuming checker is latest version.",
+                            DeprecationWarning,
+                        )
+                        # append "unknown" to version string since no versioning
+                        # info was provided
+                        loaded["{}:unknown".format(checker_name)] = check_obj
 
-            except Exception as e:
-                print("Could not load", c, ":", e, file=sys.stderr)
-        # find the latest version of versioned checkers and set that as the
-        # default checker for compliance checker if no version is specified
-        ver_checkers = sorted([c.split(":", 1) for c in cls.checkers if ":" in c])
-        for spec, versions in itertools.groupby(ver_checkers, itemgetter(0)):
-            version_nums = [v[-1] for v in versions]
-            try:
-                latest_version = str(max(StrictVersion(v) for v in version_nums))
-            # if the version can't be parsed as a StrictVersion, parse
-            # according to character collation
-            except ValueError:
-                latest_version = max(version_nums)
-            cls.checkers[spec] = cls.checkers[spec + ":latest"] = cls.checkers[
-                ":".join((spec, latest_version))
-            ]
+                except Exception as e:
+                    print("Could not load", c, ":", e, file=sys.stderr)
+            # find the latest version of versioned checkers and set that as the
+            # default checker for compliance checker if no version is specified
+            ver_checkers = sorted([c.split(":", 1) for c in loaded if ":" in c])
+            for spec, versions in itertools.groupby(ver_checkers, itemgetter(0)):
+                version_nums = [v[-1] for v in versions]
+                try:
+                    latest_version = str(max(StrictVersion(v) for v in version_nums))
+                # if the version can't be parsed as a StrictVersion, parse
+                # according to character collation
+                except ValueError:
+                    latest_version = max(version_nums)
+                loaded[spec] = loaded[spec + ":latest"] = loaded[
+                    ":".join((spec, latest_version))
+                ]
+            cls.checkers = loaded
 
     def _get_checks(self, checkclass, skip_checks):
         """
@@ -200,26 +375,30 @@ class CheckSuite(object):
         any checks in `skip_checks`.
 
         The name of the methods in the Checker class should start with "check_"
-        for this method to find them.
+        for this method to find them.  They are looked up in the registry of
+        the class's checks, see get_check_registry.
         """
-        meths = inspect.getmembers(checkclass, inspect.isroutine)
+        checker_class = checkclass if isinstance(checkclass, type) else type(checkclass)
         # return all check methods not among the skipped checks
         returned_checks = []
-        for fn_name, fn_obj in meths:
-            if fn_name.startswith("check_") and skip_checks[fn_name] != BaseCheck.HIGH:
-                returned_checks.append((fn_obj, skip_checks[fn_name]))
+        for check in get_check_registry(checker_class):
+            max_level = skip_checks[check.name]
+            if max_level != BaseCheck.HIGH:
+                returned_checks.append((getattr(checkclass, check.name), max_level))
 
         return returned_checks
 
-    def _run_check(self, check_method, ds, max_level):
+    def _run_check(self, check_method, ds, max_level, visitor=None):
         """
         Runs a check and appends a result to the values list.
         @param bound method check_method: a given check method
         @param netCDF4 dataset ds
         @param int max_level: check level
+        @param VariableVisitor visitor: visitor of the check which has visited
+                                        the variables, if any
         @return list: list of Result objects
         """
-        val = check_method(ds)
+        val = check_method(ds) if visitor is None else visitor.finish()
         if hasattr(val, "__iter__"):
             # Handle OrderedDict when we need to modify results in a superclass
             # i.e. some checks in CF 1.7 which extend CF 1.6 behaviors
@@ -248,6 +427,37 @@ class CheckSuite(object):
             else:
                 return []
 
+    def _visit_variables(self, ds, checker, checks, kept_results):
+        """
+        Makes the visitors of the checks which visit each variable, other
+        than those with kept results, and visits the variables of the dataset
+        once for all of them.  When timings are recorded, the time spent
+        making each visitor and in its callbacks is kept on the visitor.
+        @param netCDF4 dataset ds
+        @param checker: checker instance
+        @param list checks: check methods and their levels
+        @param dict kept_results: kept results by check name and level
+        @return dict: check name -> VariableVisitor
+        """
+        visitors = {}
+        for c, max_level in checks:
+            make_visitor = getattr(c, "_cc_visitor", None)
+            check_name = c.__func__.__name__
+            if make_visitor is None or (check_name, max_level) in kept_results:
+                continue
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            try:
+                visitor = make_visitor(checker, ds)
+            except Exception as e:
+                visitor = VariableVisitor(None)
+                visitor.error = (e, sys.exc_info()[2])
+            visitor.wall_time = time.perf_counter() - start_wall
+            visitor.cpu_time = time.process_time() - start_cpu
+            visitors[check_name] = visitor
+        if visitors:
+            walk_variables(ds, visitors.values(), timed=self.record_timings)
+        return visitors
+
     def _get_check_versioned_name(self, check_name):
         """
         The compliance checker allows the user to specify a
@@ -293,8 +503,10 @@ class CheckSuite(object):
         while len(checker_queue):
             name, a = checker_queue.pop()
             # is the current dataset type in the supported filetypes
-            # for the checker class?
-            if type(ds) in a().supported_ds:
+            # for the checker class?  Checkers which only set them when
+            # instantiated are instantiated to read them.
+            supported_ds = a.supported_ds or a().supported_ds
+            if type(ds) in supported_ds:
                 valid.append((name, a))
 
             # add subclasses of SOS checks
@@ -343,9 +555,14 @@ class CheckSuite(object):
         Runs this CheckSuite on the dataset with all the passed Checker instances.
 
         Returns a dictionary mapping checker names to a 2-tuple of their grouped scores and errors/exceptions while running checks.
+
+        If timings are being recorded, self.timings is replaced with a
+        dictionary mapping checker names to the timings of their setup, each
+        of their checks and the total.
         """
 
         ret_val = {}
+        self.timings = {}
         checkers = self._get_valid_checkers(ds, checker_names)
 
         if skip_checks is not None:
@@ -358,44 +575,229 @@ class CheckSuite(object):
                 "No valid checkers found for tests '{}'".format(",".join(checker_names))
             )
 
-        for checker_name, checker_class in checkers:
-            # TODO: maybe this a little more reliable than depending on
-            #       a string to determine the type of the checker -- perhaps
-            #       use some kind of checker object with checker type and
-            #       version baked in
-            checker_type_name = checker_name.split(":")[0]
-            checker_opts = self.options.get(checker_type_name, set())
+        # the data of header-only datasets is only fetched for the checkers
+        # with a read plan, so the checks of the others would read missing
+        # data and give wrong results
+        if isinstance(ds, HeaderDataset):
+            unplanned = [
+                name for name, _ in checkers if name.split(":")[0] not in READ_PLANS
+            ]
+            if unplanned:
+                warnings.warn(
+                    "Skipping checkers {} on the header-only dataset {}, as the "
+                    "data they read isn't fetched".format(", ".join(unplanned), ds.url)
+                )
+                checkers = [
+                    (name, checker_class)
+                    for name, checker_class in checkers
+                    if name not in unplanned
+                ]
+
+        # only datasets read with the netCDF library are checked holding its
+        # lock, unlike SOS and SensorML documents or datasets read by other
+        # backends
+        lock = NETCDF_LOCK if isinstance(ds, Dataset) else _null_context()
+        with lock:
+            # fetch the data the checks will read from OPeNDAP in one request
+            if isinstance(ds, PlannedDataset):
+                ds.prefetch(plan_reads(ds, [name for name, _ in checkers]))
+
+            fingerprint = None
+            if self.metadata_cache is not None and isinstance(
+                ds, (MemoizedDataset, ReadOnlyDataset)
+            ):
+                with span("fingerprint"):
+                    fingerprint = self.metadata_cache.fingerprint(ds)
+
+            with span("run", checkers=",".join(name for name, _ in checkers)):
+                with trace_memory(self.record_timings):
+                    for checker_name, checker_class in checkers:
+                        with profiling(self.profiler, self._is_profiled(checker_name)):
+                            ret_val[checker_name] = self._run_checker(
+                                ds,
+                                checker_name,
+                                checker_class,
+                                skip_check_dict,
+                                fingerprint,
+                            )
+        metrics.DATASETS_CHECKED.inc()
 
-            # instantiate a Checker object
-            try:
-                checker = checker_class(options=checker_opts)
-            # hacky fix for no options in constructor
-            except TypeError:
-                checker = checker_class()
-            # TODO? : Why is setup(ds) called at all instead of just moving the
-            #         checker setup into the constructor?
-            # setup method to prep
-            checker.setup(ds)
-
-            checks = self._get_checks(checker, skip_check_dict)
-            vals = []
-            errs = {}  # check method name -> (exc, traceback)
-
-            for c, max_level in checks:
+        return ret_val
+
+    async def run_async(self, ds, skip_checks, *checker_names, executor=None):
+        """
+        Runs this CheckSuite on the dataset like run(), in executor or a
+        shared single thread executor, without blocking the event loop.
+        Cancelling the awaiting task stops the run before its next check.
+
+        Concurrent runs should each use their own CheckSuite and dataset.
+        Runs in an executor with more than one thread take turns checking
+        their datasets, as the netCDF library isn't thread safe.
+        """
+        return await run_cancellable(
+            partial(self.run, ds, skip_checks, *checker_names), executor
+        )
+
+    def _is_profiled(self, checker_name):
+        """
+        Returns whether the checker should be profiled, which is when no
+        checkers were selected for profiling, or this checker was selected
+        with or without its version
+        """
+        if not self.profile_checkers:
+            return True
+        return (
+            checker_name in self.profile_checkers
+            or checker_name.split(":")[0] in self.profile_checkers
+        )
+
+    def _run_checker(
+        self, ds, checker_name, checker_class, skip_check_dict, fingerprint=None
+    ):
+        """
+        Runs the checks of a checker on the dataset, recording timings if
+        enabled.  If the header fingerprint of the dataset is given, results
+        of the checks which only read metadata are reused from the metadata
+        cache, or kept in it.
+
+        Returns a 2-tuple of the grouped scores and errors/exceptions while
+        running checks.
+        """
+        # TODO: maybe this a little more reliable than depending on
+        #       a string to determine the type of the checker -- perhaps
+        #       use some kind of checker object with checker type and
+        #       version baked in
+        checker_type_name = checker_name.split(":")[0]
+        checker_opts = self.options.get(checker_type_name, set())
+
+        # instantiate a Checker object
+        try:
+            checker = checker_class(options=checker_opts)
+        # hacky fix for no options in constructor
+        except TypeError:
+            checker = checker_class()
+        # TODO? : Why is setup(ds) called at all instead of just moving the
+        #         checker setup into the constructor?
+        # setup method to prep
+        checker_start = time.perf_counter()
+        setup_timer = Timer(self.record_timings)
+        reuse = fingerprint is not None and checker_class._cc_data_checks is not None
+        with span("setup", checker=checker_name), setup_timer:
+            if reuse:
+                with recording_attribute_reads(ds) as reads:
+                    checker.setup(ds)
+                reuse = not reads & self.metadata_cache.volatile_attributes
+            else:
+                checker.setup(ds)
+
+        # check name and level -> (results, error) of the checks which only
+        # read metadata on datasets with the same header
+        kept_results = {}
+        if reuse:
+            kept_results = self.metadata_cache.results(
+                fingerprint, (checker_name, frozenset(checker_opts))
+            )
+
+        checks = self._get_checks(checker, skip_check_dict)
+        vals = []
+        errs = {}  # check method name -> (exc, traceback)
+        check_timings = {}
+
+        # the checks which visit each variable share one traversal.  The time
+        # spent in the callbacks of each check is added to the check's
+        # timings, and the rest of the traversal is timed as part of the setup
+        raise_if_cancelled()
+        walk_timer = Timer(self.record_timings)
+        recording = recording_attribute_reads(ds) if reuse else _null_context()
+        with span("walk_variables", checker=checker_name), walk_timer:
+            with recording as walk_reads:
+                visitors = self._visit_variables(ds, checker, checks, kept_results)
+        walk_volatile = (
+            reuse
+            and bool(visitors)
+            and bool(walk_reads & self.metadata_cache.volatile_attributes)
+        )
+
+        for c, max_level in checks:
+            raise_if_cancelled()
+            check_name = c.__func__.__name__
+            reusable = reuse and check_name not in checker_class._cc_data_checks
+            kept = kept_results.get((check_name, max_level))
+            if reusable:
+                metrics.METADATA_RESULT_LOOKUPS.inc(
+                    result="miss" if kept is None else "hit"
+                )
+            if kept is not None:
+                check_vals, error = kept
+                vals.extend(check_vals)
+                if error is not None:
+                    errs[check_name] = error
+                continue
+
+            timer = Timer(self.record_timings)
+            check_start = time.perf_counter()
+            check_vals, error = [], None
+            recording = recording_attribute_reads(ds) if reusable else _null_context()
+            with recording as reads:
                 try:
-                    vals.extend(self._run_check(c, ds, max_level))
+                    with span(
+                        check_name, category="check", checker=checker_name
+                    ), timer:
+                        check_vals = self._run_check(
+                            c, ds, max_level, visitors.get(check_name)
+                        )
                 except Exception as e:
-                    errs[c.__func__.__name__] = (e, sys.exc_info()[2])
+                    error = (e, sys.exc_info()[2])
+                    metrics.CHECK_EXCEPTIONS.inc(
+                        checker=checker_name,
+                        check=check_name,
+                        exception=type(e).__name__,
+                    )
+            vals.extend(check_vals)
+            if error is not None:
+                errs[check_name] = error
+            if (
+                reusable
+                and not reads & self.metadata_cache.volatile_attributes
+                and not (walk_volatile and check_name in visitors)
+            ):
+                kept_results[(check_name, max_level)] = (check_vals, error)
+            metrics.CHECK_SECONDS.observe(
+                time.perf_counter() - check_start,
+                checker=checker_name,
+                check=check_name,
+            )
+            if timer.result is not None:
+                check_timings[check_name] = timer.result
+                if check_name in visitors:
+                    check_timings[check_name] = total_timings(
+                        [timer.result, _visitor_timings(visitors[check_name])]
+                    )
 
-            # score the results we got back
-            groups = self.scores(vals)
+        # score the results we got back
+        groups = self.scores(vals)
 
-            # invoke finalizer explicitly
-            checker.__del__()
+        # invoke finalizer explicitly
+        checker.__del__()
+        metrics.CHECKER_SECONDS.observe(
+            time.perf_counter() - checker_start, checker=checker_name
+        )
 
-            ret_val[checker_name] = groups, errs
+        if self.record_timings:
+            setup_timings = total_timings([setup_timer.result, walk_timer.result])
+            # the visitors' time is counted in their checks' timings instead
+            for visitor in visitors.values():
+                setup_timings["wall_time"] -= visitor.wall_time
+                setup_timings["cpu_time"] -= visitor.cpu_time
+            setup_timings["wall_time"] = max(setup_timings["wall_time"], 0.0)
+            setup_timings["cpu_time"] = max(setup_timings["cpu_time"], 0.0)
+            self.timings[checker_name] = {
+                "setup": setup_timings,
+                "checks": check_timings,
+                "total": total_timings([setup_timings] + list(check_timings.values())),
+            }
 
-        return ret_val
+        return groups, errs
 
     @classmethod
     def passtree(cls, groups, limit):
@@ -513,15 +915,24 @@ class CheckSuite(object):
 
         @param o Python object to serialize
         """
+        # Results are by far the most common node, and convert themselves
+        # directly without a second generic pass over their children
+        if isinstance(o, Result):
+            return o.to_primitive()
         if isinstance(o, (list, tuple)):
             return [self.serialize(i) for i in o]
         if isinstance(o, dict):
             return {k: self.serialize(v) for k, v in o.items()}
         if isinstance(o, datetime):
             return o.isoformat()
-        if isinstance(o, Result):
-            return self.serialize(o.serialize())
-        return o
+        return json_float(o)
+
+    @property
+    def j2(self):
+        """
+        The cached Jinja2 environment for this suite's templates_root
+        """
+        return get_jinja_environment(self.templates_root)
 
     def checker_html_output(self, check_name, groups, source_name, limit):
         """
@@ -533,15 +944,11 @@ class CheckSuite(object):
         @param source_name     Source of the dataset, used for title
         @param limit           Integer value for limiting output
         """
-        from jinja2 import Environment, PackageLoader
-
-        self.j2 = Environment(
-            loader=PackageLoader(self.templates_root, "data/templates")
-        )
-        template = self.j2.get_template("ccheck.html.j2")
+        with span("checker_html_output", checker=check_name):
+            template = self.j2.get_template("ccheck.html.j2")
 
-        template_vars = self.build_structure(check_name, groups, source_name, limit)
-        return template.render(**template_vars)
+            template_vars = self.build_structure(check_name, groups, source_name, limit)
+            return template.render(**template_vars)
 
     def html_output(self, checkers_html):
         """
@@ -550,11 +957,24 @@ class CheckSuite(object):
         @param checkers_html     List of HTML for single tests as returned by
                                  checker_html_output
         """
-        # Note: This relies on checker_html_output having been called so that
-        # self.j2 is initialised
         template = self.j2.get_template("ccheck_wrapper.html.j2")
         return template.render(checkers=checkers_html)
 
+    def write_html_output(self, checkers_html, stream):
+        """
+        Renders the HTML output for multiple tests directly to a stream,
+        without building the whole document in memory.
+
+        @param checkers_html     Iterable of HTML for single tests as returned
+                                 by checker_html_output.  May be a generator,
+                                 in which case each test is rendered just
+                                 before it is written.
+        @param stream            File-like object opened for text writing
+        """
+        template = self.j2.get_template("ccheck_wrapper.html.j2")
+        for chunk in template.generate(checkers=checkers_html):
+            stream.write(chunk)
+
     def get_points(self, groups, limit):
         score_list = []
         score_only_list = []
@@ -572,60 +992,167 @@ class CheckSuite(object):
 
         return score_list, all_passed, out_of
 
-    def standard_output(self, ds, limit, check_name, groups):
+    def standard_output(self, ds, limit, check_name, groups, stream=None):
         """
         Generates the Terminal Output for Standard cases
 
         Returns the dataset needed for the verbose output, as well as the failure flags.
+
+        @param stream: text stream to print to, defaulting to sys.stdout
         """
 
         score_list, points, out_of = self.get_points(groups, limit)
-        issue_count = out_of - points
+        self._write_report_header(
+            _stream_writer(stream), ds, check_name, out_of - points
+        )
+        return [groups, points, out_of]
 
+    def _write_report_header(self, write, ds, check_name, issue_count):
+        """
+        Writes the banner of a checker's text report with write, followed by
+        the number of issues if there are any
+        """
         # Let's add the version number to the check name if it's missing
         check_name = self._get_check_versioned_name(check_name)
         check_url = self._get_check_url(check_name)
         width = 2 * self.col_width
+        rule = "-" * width
 
-        # NOTE: printing and use of .center()
-        # Nested .format() calls should be avoided when possible.
-        # As a future enhancement, a string.Template string might work best here
-        # but for the time being individual lines are printed and centered with
-        # .center()
-
-        print("\n")
-        print("-" * width)
-        print("IOOS Compliance Checker Report".center(width))
-        print("Version {}".format(__version__).center(width))
-        print(
+        write("\n\n")
+        write(rule + "\n")
+        write("IOOS Compliance Checker Report".center(width) + "\n")
+        write("Version {}".format(__version__).center(width) + "\n")
+        write(
             "Report generated {}".format(
                 datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
             ).center(width)
+            + "\n"
         )
-        print("{}".format(check_name).center(width))
-        print("{}".format(check_url).center(width))
-        print("-" * width)
+        write("{}".format(check_name).center(width) + "\n")
+        write("{}".format(check_url).center(width) + "\n")
+        write(rule + "\n")
         if issue_count > 0:
-            print("Corrective Actions".center(width))
+            write("Corrective Actions".center(width) + "\n")
             plural = "" if issue_count == 1 else "s"
-            print(
-                "{} has {} potential issue{}".format(
+            write(
+                "{} has {} potential issue{}\n".format(
                     os.path.basename(ds), issue_count, plural
                 )
             )
 
-        return [groups, points, out_of]
-
-    def standard_output_generation(self, groups, limit, points, out_of, check):
+    def standard_output_generation(
+        self, groups, limit, points, out_of, check, stream=None
+    ):
         """
         Generates the Terminal Output
+
+        @param stream: text stream to print to, defaulting to sys.stdout
         """
         if points < out_of:
-            self.reasoning_routine(groups, check, priority_flag=limit)
+            self.reasoning_routine(groups, check, priority_flag=limit, stream=stream)
         else:
-            print("All tests passed!")
+            print("All tests passed!", file=stream)
+
+    def checker_text_output(
+        self, ds, limit, check_name, groups, checker_timings=None, load_timing=None
+    ):
+        """
+        Renders the text report of a single checker, as written by
+        standard_output, standard_output_generation and timings_output, and
+        returns it as a string.  The report is built in a buffer in one pass
+        over the results, so that it can be written with a single call.
+
+        @param ds              Source of the dataset
+        @param limit           Integer value for limiting output
+        @param check_name      The checker which was run
+        @param groups          List of results of the checker
+        @param checker_timings Timings of the checker recorded by run(), to
+                               add a table of timings
+        @param load_timing     Timing of loading the dataset
+        """
+        with span("checker_text_output", checker=check_name):
+            parts = []
+            write = parts.append
+            score_list, points, out_of = self.get_points(groups, limit)
+            self._write_report_header(write, ds, check_name, out_of - points)
+            if points < out_of:
+                self._write_reasons(write, groups, check_name, limit, True)
+            else:
+                write("All tests passed!\n")
+            if checker_timings is not None:
+                self._write_timings(write, checker_timings, load_timing)
+            return "".join(parts)
+
+    def timings_output(self, checker_timings, load_timing=None, stream=None):
+        """
+        Prints a table of the time and resources used by each check, slowest
+        first, after the dataset load and checker setup times
+
+        @param dict checker_timings: timings of a checker recorded by run()
+        @param dict load_timing: timing of loading the dataset
+        @param stream: text stream to print to, defaulting to sys.stdout
+        """
+        self._write_timings(_stream_writer(stream), checker_timings, load_timing)
 
-    def reasoning_routine(self, groups, check, priority_flag=3, _top_level=True):
+    def _write_timings(self, write, checker_timings, load_timing):
+        """
+        Writes the table of timings printed by timings_output with write
+        """
+
+        def fmt_bytes(n):
+            if n is None:
+                return "-"
+            if n < 1024:
+                return "{} B".format(n)
+            for unit in ("KiB", "MiB", "GiB"):
+                n /= 1024.0
+                if n < 1024 or unit == "GiB":
+                    return "{:.1f} {}".format(n, unit)
+
+        def write_row(name, timing):
+            write(
+                "{:<{width}} {:>9.3f} {:>9.3f} {:>7} {:>11} {:>11}\n".format(
+                    name,
+                    timing["wall_time"],
+                    timing["cpu_time"],
+                    "-" if timing["read_calls"] is None else timing["read_calls"],
+                    fmt_bytes(timing["read_bytes"]),
+                    fmt_bytes(timing["peak_memory"]),
+                    width=self.col_width,
+                )
+            )
+
+        width = 2 * self.col_width
+        write("\n\n")
+        write("-" * width + "\n")
+        write("Check Timings".center(width) + "\n")
+        write("-" * width + "\n")
+        write(
+            "{:<{width}} {:>9} {:>9} {:>7} {:>11} {:>11}\n".format(
+                "Check",
+                "Wall (s)",
+                "CPU (s)",
+                "Reads",
+                "Read",
+                "Peak mem",
+                width=self.col_width,
+            )
+        )
+        if load_timing is not None:
+            write_row("(dataset load)", load_timing)
+        write_row("(setup)", checker_timings["setup"])
+        checks = sorted(
+            checker_timings["checks"].items(),
+            key=lambda item: item[1]["wall_time"],
+            reverse=True,
+        )
+        for check_name, timing in checks:
+            write_row(check_name, timing)
+        write_row("Total", checker_timings["total"])
+
+    def reasoning_routine(
+        self, groups, check, priority_flag=3, _top_level=True, stream=None
+    ):
         """
         print routine performed
         @param list groups: the Result groups
@@ -633,75 +1160,71 @@ class CheckSuite(object):
         @param int priority_flag: indicates the weight of the groups
         @param bool _top_level: indicates the level of the group so as to
                                 print out the appropriate header string
+        @param stream: text stream to print to, defaulting to sys.stdout
         """
+        return self._write_reasons(
+            _stream_writer(stream), groups, check, priority_flag, _top_level
+        )
 
-        sort_fn = lambda x: x.weight
-        groups_sorted = sorted(groups, key=sort_fn, reverse=True)
+    def _write_reasons(self, write, groups, check, priority_flag, top_level):
+        """
+        Writes the failed results at each level from the highest priority
+        down to priority_flag with write, under a header for each level when
+        top_level.  The results with children are written after their
+        children, which are reasoned about at the highest priority only.
 
-        # create dict of the groups -> {level: [reasons]}
-        result = {
-            key: [v for v in valuesiter if v.value[0] != v.value[1]]
-            for key, valuesiter in itertools.groupby(groups_sorted, key=sort_fn)
-        }
+        Returns the results of the last level written, joined by newlines.
+        """
+        # failed results by weight, in the order of the groups
+        failed = defaultdict(list)
+        for res in groups:
+            if res.value[0] != res.value[1]:
+                failed[res.weight].append(res)
         priorities = self.checkers[check]._cc_display_headers
-
-        def process_table(res, check):
-            """Recursively calls reasoning_routine to parse out child reasons
-            from the parent reasons.
-            @param Result res: Result object
-            @param str check: checker name"""
-
-            issue = res.name
-            if not res.children:
-                reasons = res.msgs
-            else:
-                child_reasons = self.reasoning_routine(
-                    res.children, check, _top_level=False
-                )
-                # there shouldn't be messages if there are children
-                # is this a valid assumption?
-                reasons = child_reasons
-
-            return issue, reasons
+        width = 2 * self.col_width
 
         # iterate in reverse to the min priority requested;
         # the higher the limit, the more lenient the output
-        proc_strs = ""
+        proc_strs = []
         for level in range(3, priority_flag - 1, -1):
-            level_name = priorities.get(level, level)
-            # print headers
             proc_strs = []
-
-            # skip any levels that aren't in the result
-            if level not in result:
+            # skip any empty result levels
+            if not failed[level]:
                 continue
 
-            # skip any empty result levels
-            if len(result[level]) > 0:
-                # only print priority headers at top level, i.e. non-child
-                # datasets
-                if _top_level:
-                    width = 2 * self.col_width
-                    print("\n")
-                    print("{:^{width}}".format(level_name, width=width))
-                    print("-" * width)
-
-                data_issues = [process_table(res, check) for res in result[level]]
-
-                has_printed = False
-                for issue, reasons in data_issues:
-                    # if this isn't the first printed issue, add a newline
-                    # separating this and the previous level
-                    if has_printed:
-                        print("")
-                    # join alphabetized reasons together
-                    reason_str = "\n".join(
-                        "* {}".format(r) for r in sorted(reasons, key=lambda x: x[0])
-                    )
-                    proc_str = "{}\n{}".format(issue, reason_str)
-                    print(proc_str)
-                    proc_strs.append(proc_str)
-                    has_printed = True
+            # only print priority headers at top level, i.e. non-child
+            # datasets
+            if top_level:
+                level_name = priorities.get(level, level)
+                write("\n\n")
+                write("{:^{width}}\n".format(level_name, width=width))
+                write("-" * width + "\n")
+
+            # there shouldn't be messages if there are children, whose
+            # reasons are written before those of their parent
+            data_issues = [
+                (
+                    res.name,
+                    self._write_reasons(write, res.children, check, 3, False)
+                    if res.children
+                    else res.msgs,
+                )
+                for res in failed[level]
+            ]
+
+            for issue, reasons in data_issues:
+                # if this isn't the first printed issue, add a newline
+                # separating this and the previous level
+                if proc_strs:
+                    write("\n")
+                # join alphabetized reasons together
+                reason_str = "\n".join(
+                    map("* {}".format, sorted(reasons, key=itemgetter(0)))
+                )
+                proc_str = "{}\n{}".format(issue, reason_str)
+                write(proc_str)
+                write("\n")
+                proc_strs.append(proc_str)
         return "\n".join(proc_strs)
 
     def process_doc(self, doc):
@@ -763,6 +1286,28 @@ class CheckSuite(object):
                 sys.exit(1)
         return ds_str
 
+    def compile_dataset(self, cdl_path):
+        """
+        Compiles a .cdl file in-process into the cache of compiled CDL files,
+        so that CDL with the same content is only compiled once, without
+        running ncgen or writing next to the CDL file.  Falls back to
+        generate_dataset for CDL the in-process compiler does not support,
+        such as user defined types.
+
+        Returns the path to the compiled netCDF file.
+
+        :param str cdl_path: Path to the cdl file
+        """
+        try:
+            return ncgen.compile_cached(cdl_path)
+        except ncgen.CDLError as e:
+            warnings.warn(
+                "Could not compile {} in-process, falling back to ncgen: {}".format(
+                    cdl_path, e
+                )
+            )
+            return self.generate_dataset(cdl_path)
+
     def load_dataset(self, ds_str):
         """
         Returns an instantiated instance of either a netCDF file or an SOS
@@ -772,24 +1317,64 @@ class CheckSuite(object):
         """
         # If it's a remote URL load it as a remote resource, otherwise treat it
         # as a local resource.
-        pr = urlparse(ds_str)
-        if pr.netloc:
-            return self.load_remote_dataset(ds_str)
-        else:
-            return self.load_local_dataset(ds_str)
+        start = time.perf_counter()
+        with span("load_dataset", dataset=ds_str) as attributes:
+            pr = urlparse(ds_str)
+            if pr.netloc:
+                ds = self.load_remote_dataset(ds_str)
+            else:
+                ds = self.load_local_dataset(ds_str)
+            attributes["protocol"] = self.dataset_protocol(ds_str, ds)
+        metrics.DATASET_LOAD_SECONDS.observe(
+            time.perf_counter() - start, protocol=attributes["protocol"]
+        )
+        return ds
+
+    @staticmethod
+    def dataset_protocol(ds_str, ds):
+        """
+        Returns the protocol a dataset was loaded with, one of "local",
+        "erddap", "remote_netcdf", "opendap" or "sos"
+
+        :param str ds_str: Path or URL the dataset was loaded from
+        :param ds: Loaded dataset
+        """
+        if not urlparse(ds_str).netloc:
+            return "local"
+        if not isinstance(ds, Dataset):
+            return "sos"
+        if "tabledap" in ds_str:
+            return "erddap"
+        if isinstance(ds, MemoizedDataset) and not isinstance(ds, PlannedDataset):
+            return "remote_netcdf"
+        return "opendap"
 
     def check_remote_netcdf(self, ds_str):
-        if netcdf.is_remote_netcdf(ds_str):
-            response = requests.get(ds_str, allow_redirects=True, timeout=60)
-            try:
-                return MemoizedDataset(
-                    urlparse(response.url).path, memory=response.content
-                )
-            except OSError as e:
-                # handle case when netCDF C libs weren't compiled with
-                # in-memory support by using tempfile
-                with tempnc(response.content) as _nc:
-                    return MemoizedDataset(_nc)
+        with span("is_remote_netcdf", url=ds_str):
+            headers = netcdf.remote_headers(ds_str)
+            is_remote_netcdf = netcdf.is_remote_netcdf(ds_str, headers)
+        if is_remote_netcdf:
+            # read only the parts of static files the checks access with
+            # range requests, if the netCDF library supports it.  Responses
+            # to queries are generated on request, so are downloaded whole.
+            if netcdf.accepts_byte_ranges(headers) and not urlparse(ds_str).query:
+                try:
+                    with span("open_byte_range", url=ds_str), NETCDF_LOCK:
+                        return MemoizedDataset(netcdf.byte_range_url(ds_str))
+                except OSError:
+                    pass
+            with span("download", url=ds_str):
+                response = requests.get(ds_str, allow_redirects=True, timeout=60)
+            with NETCDF_LOCK:
+                try:
+                    return MemoizedDataset(
+                        urlparse(response.url).path, memory=response.content
+                    )
+                except OSError as e:
+                    # handle case when netCDF C libs weren't compiled with
+                    # in-memory support by using tempfile
+                    with tempnc(response.content) as _nc:
+                        return MemoizedDataset(_nc)
 
     def load_remote_dataset(self, ds_str):
         """
@@ -798,43 +1383,70 @@ class CheckSuite(object):
         :param str ds_str: URL to the remote resource
         """
 
-        url_parsed = urlparse(ds_str)
-        # ERDDAP TableDAP request
-
-        nc_remote_result = self.check_remote_netcdf(ds_str)
-        if nc_remote_result:
-            return nc_remote_result
-
-        # if application/x-netcdf wasn't detected in the Content-Type headers
-        # and this is some kind of erddap tabledap form, then try to get the
-        # .ncCF file from ERDDAP
-        elif "tabledap" in ds_str and not url_parsed.query:
-            # modify ds_str to contain the full variable request
-            variables_str = opendap.create_DAP_variable_str(ds_str)
-
-            # join to create a URL to an .ncCF resource
-            ds_str = "{}.ncCF?{}".format(ds_str, variables_str)
-
-        nc_remote_result = self.check_remote_netcdf(ds_str)
-        if nc_remote_result:
-            return nc_remote_result
+        with span("load_remote_dataset", url=ds_str):
+            url_parsed = urlparse(ds_str)
+            # ERDDAP TableDAP request
+
+            nc_remote_result = self.check_remote_netcdf(ds_str)
+            if nc_remote_result:
+                return nc_remote_result
+
+            # if application/x-netcdf wasn't detected in the Content-Type headers
+            # and this is some kind of erddap tabledap form, then try to get the
+            # .ncCF file from ERDDAP
+            elif "tabledap" in ds_str and not url_parsed.query:
+                # modify ds_str to contain the full variable request
+                with span("create_DAP_variable_str", url=ds_str):
+                    variables_str = opendap.create_DAP_variable_str(ds_str)
+
+                if self.header_only:
+                    with span("load_erddap_header", url=ds_str):
+                        return self.load_erddap_header(ds_str, variables_str)
+
+                # join to create a URL to an .ncCF resource
+                ds_str = "{}.ncCF?{}".format(ds_str, variables_str)
+
+            nc_remote_result = self.check_remote_netcdf(ds_str)
+            if nc_remote_result:
+                return nc_remote_result
+
+            # if it's just an OPeNDAP endpoint, use that
+            with span("is_opendap", url=ds_str):
+                is_opendap = opendap.is_opendap(ds_str)
+            if is_opendap:
+                with span("open_opendap", url=ds_str), NETCDF_LOCK:
+                    return PlannedDataset(ds_str)
+
+            # Check if the HTTP response is XML, if it is, it's likely SOS so
+            # we'll attempt to parse the response as SOS.
+            # Some SOS servers don't seem to support HEAD requests.
+            # Issue GET instead if we reach here and can't get the response
+            with span("download", url=ds_str):
+                response = requests.get(ds_str, allow_redirects=True, timeout=60)
+            content_type = response.headers.get("content-type")
+            if content_type == "text/xml":
+                return self.process_doc(response.content)
+            else:
+                raise ValueError(
+                    "Unknown service with content-type: {}".format(content_type)
+                )
 
-        # if it's just an OPeNDAP endpoint, use that
-        elif opendap.is_opendap(ds_str):
-            return Dataset(ds_str)
+    def load_erddap_header(self, ds_str, variables_str):
+        """
+        Returns a header-only dataset for an ERDDAP tabledap dataset, built
+        from the header of its .ncCF file without downloading any data
 
-        # Check if the HTTP response is XML, if it is, it's likely SOS so
-        # we'll attempt to parse the response as SOS.
-        # Some SOS servers don't seem to support HEAD requests.
-        # Issue GET instead if we reach here and can't get the response
-        response = requests.get(ds_str, allow_redirects=True, timeout=60)
-        content_type = response.headers.get("content-type")
-        if content_type == "text/xml":
-            return self.process_doc(response.content)
-        else:
-            raise ValueError(
-                "Unknown service with content-type: {}".format(content_type)
+        :param str ds_str: URL of the tabledap dataset
+        :param str variables_str: URL-encoded variables of the dataset
+        """
+        header = erddap.fetch_header(ds_str, variables_str)
+        with NETCDF_LOCK:
+            # netCDF-4 storage is only allocated as data is written, so the
+            # variables of large datasets take no memory
+            data = ncgen.compile_cdl_bytes(
+                erddap.header_to_cdl(header), format="NETCDF4_CLASSIC"
             )
+            return HeaderDataset(ds_str, memory=data)
 
     def load_local_dataset(self, ds_str):
         """
@@ -843,10 +1455,15 @@ class CheckSuite(object):
         :param ds_str: Path to the resource
         """
         if cdl.is_cdl(ds_str):
-            ds_str = self.generate_dataset(ds_str)
+            with span("compile_dataset", cdl_path=ds_str), NETCDF_LOCK:
+                ds_str = self.compile_dataset(ds_str)
+
+        if zarr.is_zarr(ds_str):
+            return ZarrDataset(ds_str)
 
         if netcdf.is_netcdf(ds_str):
-            return MemoizedDataset(ds_str)
+            with NETCDF_LOCK:
+                return open_dataset(ds_str, self.backend)
 
         # Assume this is just a Generic File if it exists
         if os.path.isfile(ds_str):
@@ -0,0 +1,438 @@
+"""
+Local HTTP servers serving files from a directory, either with support for
+range requests, over DAP2 or as ERDDAP tabledap datasets, which stand in for
+remote file hosting, OPeNDAP and ERDDAP servers in tests and record the
+requests made to them
+"""
+import os
+import re
+import socketserver
+import struct
+import threading
+import urllib.parse
+
+from contextlib import contextmanager
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+import netCDF4
+import numpy as np
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves files as application/x-netcdf, answering requests with a Range
+    header with the requested bytes only.  Each request is appended to the
+    server's `requests` list as a (method, path, range, bytes sent) tuple.
+    """
+
+    accept_ranges = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_file(self, include_body):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        byte_range = self.headers.get("Range") if self.accept_ranges else None
+        match = re.match(r"bytes=(\d+)-(\d*)$", byte_range or "")
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes {}-{}/{}".format(start, end, size))
+        else:
+            self.send_response(200)
+        length = end - start + 1
+        self.send_header("Content-Type", "application/x-netcdf")
+        self.send_header("Content-Length", str(length))
+        if self.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        # record the request before responding, so that a client which has
+        # received the response always finds its request recorded
+        sent = length if include_body else 0
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path, byte_range, sent))
+        self.end_headers()
+        if include_body:
+            with open(path, "rb") as f:
+                f.seek(start)
+                self.wfile.write(f.read(length))
+
+    def do_GET(self):
+        self._send_file(True)
+
+    def do_HEAD(self):
+        self._send_file(False)
+
+
+class NoRangeRequestHandler(RangeRequestHandler):
+    """
+    Serves whole files only, like servers without range request support
+    """
+
+    accept_ranges = False
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """
+    Handles each request in a new thread, like http.server.ThreadingHTTPServer
+    which is only available from Python 3.7
+    """
+
+    daemon_threads = True
+
+
+@contextmanager
+def serve_directory(directory, handler_class=RangeRequestHandler):
+    """
+    Serves the files in directory on a free local port within the block,
+    yielding the server.  The base URL is available from server.url.
+    """
+
+    class Handler(handler_class):
+        def translate_path(self, path):
+            # SimpleHTTPRequestHandler serves the working directory before
+            # Python 3.7, so map its paths into directory instead
+            path = super(Handler, self).translate_path(path)
+            return os.path.join(directory, os.path.relpath(path, os.getcwd()))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.url = "http://127.0.0.1:{}".format(server.server_port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bytes_sent(server):
+    """
+    Returns the total number of body bytes the server has sent
+    """
+    with server.lock:
+        return sum(request[3] for request in server.requests)
+
+
+# numpy dtype kind and size -> DAP2 type
+DAP_TYPE_NAMES = {
+    ("i", 1): "Byte",
+    ("u", 1): "Byte",
+    ("i", 2): "Int16",
+    ("u", 2): "UInt16",
+    ("i", 4): "Int32",
+    ("u", 4): "UInt32",
+    ("f", 4): "Float32",
+    ("f", 8): "Float64",
+}
+
+
+def _dap_type(dtype):
+    if dtype.kind in "SU" or dtype == str:
+        return "String"
+    return DAP_TYPE_NAMES.get((dtype.kind, dtype.itemsize))
+
+
+def _das_value(value):
+    if isinstance(value, str):
+        return "String", '"{}"'.format(value.replace("\\", "\\\\").replace('"', '\\"'))
+    values = np.atleast_1d(value)
+    return _dap_type(values.dtype), ", ".join(repr(v.item()) for v in values)
+
+
+def _encode_array(dap_type, values, shape):
+    """
+    Encodes values in the DAP2 XDR encoding of an array, or of a scalar if
+    shape is empty
+    """
+    chunks = []
+    count = int(np.prod(shape)) if shape else 1
+    if dap_type == "String":
+        if shape:
+            chunks.append(struct.pack(">I", count))
+        for string in values.ravel():
+            encoded = string.encode("utf-8")
+            chunks.append(struct.pack(">I", len(encoded)))
+            chunks.append(encoded + b"\0" * (-len(encoded) % 4))
+        return b"".join(chunks)
+    if shape:
+        chunks.append(struct.pack(">II", count, count))
+    if dap_type == "Byte":
+        data = values.astype("u1").tobytes()
+        if not shape:
+            data = data.rjust(4, b"\0")
+    else:
+        wire = {
+            "Int16": ">i4",
+            "UInt16": ">u4",
+            "Int32": ">i4",
+            "UInt32": ">u4",
+            "Float32": ">f4",
+            "Float64": ">f8",
+        }[dap_type]
+        data = values.astype(wire).tobytes()
+    chunks.append(data + b"\0" * (-len(data) % 4))
+    return b"".join(chunks)
+
+
+def _parse_projection(projection):
+    """
+    Parses a DAP2 projection such as "temp[0:1:9][2]" into the variable
+    name and a list of (start, stride, stop) hyperslabs
+    """
+    name, _, rest = projection.partition("[")
+    hyperslabs = []
+    if rest:
+        for part in ("[" + rest).strip("[]").split("]["):
+            values = [int(v) for v in part.split(":")]
+            if len(values) == 1:
+                values = [values[0], 1, values[0]]
+            elif len(values) == 2:
+                values = [values[0], 1, values[1]]
+            hyperslabs.append(tuple(values))
+    return name, hyperslabs
+
+
+class DAPRequestHandler(RangeRequestHandler):
+    """
+    Serves the netCDF files in the directory over DAP2, standing in for an
+    OPeNDAP server.  Variables are served as arrays, char variables as
+    strings, and variables of other types are left out.
+    """
+
+    def _variables(self, nc):
+        variables = []
+        for name, variable in nc.variables.items():
+            dap_type = _dap_type(variable.dtype)
+            if dap_type is None:
+                continue
+            dims = list(zip(variable.dimensions, variable.shape))
+            if variable.dtype.kind == "S":
+                dims = dims[:-1]
+            variables.append((name, variable, dap_type, dims))
+        return variables
+
+    def _dds(self, declarations, dataset_name):
+        lines = ["Dataset {"]
+        for dap_type, name, dims in declarations:
+            lines.append(
+                "    {} {}{};".format(
+                    dap_type,
+                    name,
+                    "".join("[{} = {}]".format(d, size) for d, size in dims),
+                )
+            )
+        lines.append("}} {};".format(dataset_name))
+        return "\n".join(lines) + "\n"
+
+    def _das(self, nc):
+        lines = ["Attributes {"]
+        targets = [(name, v) for name, v, _, _ in self._variables(nc)]
+        for name, target in targets + [("NC_GLOBAL", nc)]:
+            lines.append("    {} {{".format(name))
+            for attr in target.ncattrs():
+                dap_type, value = _das_value(target.getncattr(attr))
+                if dap_type is not None:
+                    lines.append("        {} {} {};".format(dap_type, attr, value))
+            lines.append("    }")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def _data(self, nc, constraint, dataset_name):
+        variables = {v[0]: v for v in self._variables(nc)}
+        if constraint:
+            projections = [
+                _parse_projection(p)
+                for p in urllib.parse.unquote(constraint).split(",")
+            ]
+        else:
+            projections = [(name, []) for name in variables]
+        declarations = []
+        chunks = []
+        for name, hyperslabs in projections:
+            _, variable, dap_type, dims = variables[name]
+            index = tuple(
+                slice(start, stop + 1, stride) for start, stride, stop in hyperslabs
+            )
+            variable.set_auto_maskandscale(False)
+            if variable.dtype.kind == "S":
+                values = netCDF4.chartostring(variable[...])[index]
+            else:
+                values = np.asarray(variable[...])[index]
+            values = np.asarray(values)
+            shape = values.shape
+            declarations.append(
+                (dap_type, name, [(d, size) for (d, _), size in zip(dims, shape)])
+            )
+            chunks.append(_encode_array(dap_type, values, shape))
+        dds = self._dds(declarations, dataset_name)
+        return dds.encode("utf-8") + b"\nData:\n" + b"".join(chunks)
+
+    def _send(self, body, content_type, include_body):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("XDODS-Server", "dods/3.2")
+        with self.server.lock:
+            self.server.requests.append(
+                (self.command, self.path, None, len(body) if include_body else 0)
+            )
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def _send_file(self, include_body):
+        path, _, constraint = self.path.partition("?")
+        base, extension = os.path.splitext(path)
+        nc_path = self.translate_path(base)
+        if extension not in {".dds", ".das", ".dods"} or not os.path.isfile(nc_path):
+            self.send_error(404)
+            return
+        dataset_name = os.path.basename(nc_path)
+        with netCDF4.Dataset(nc_path) as nc:
+            if extension == ".das":
+                body = self._das(nc).encode("utf-8")
+                content_type = "text/plain"
+            elif extension == ".dds":
+                declarations = [
+                    (dap_type, name, dims)
+                    for name, _, dap_type, dims in self._variables(nc)
+                ]
+                body = self._dds(declarations, dataset_name).encode("utf-8")
+                content_type = "text/plain"
+            else:
+                body = self._data(nc, constraint, dataset_name)
+                content_type = "application/octet-stream"
+        self._send(body, content_type, include_body)
+
+
+# numpy dtype kind and size -> CDL type suffix of attribute values
+CDL_SUFFIXES = {
+    ("i", 1): "b",
+    ("u", 1): "ub",
+    ("i", 2): "s",
+    ("u", 2): "us",
+    ("f", 4): "f",
+}
+
+
+# numpy dtype kind and size -> CDL type
+CDL_TYPES = {
+    ("S", 1): "char",
+    ("i", 1): "byte",
+    ("u", 1): "ubyte",
+    ("i", 2): "short",
+    ("u", 2): "ushort",
+    ("i", 4): "int",
+    ("u", 4): "uint",
+    ("i", 8): "int64",
+    ("u", 8): "uint64",
+    ("f", 4): "float",
+    ("f", 8): "double",
+}
+
+
+def _cdl_value(value):
+    if isinstance(value, str):
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        return '"{}"'.format(escaped.replace("\n", "\\n"))
+    values = np.atleast_1d(value)
+    suffix = CDL_SUFFIXES.get((values.dtype.kind, values.dtype.itemsize), "")
+    return ", ".join(
+        "{}{}".format(repr(v.item()).replace("nan", "NaN"), suffix) for v in values
+    )
+
+
+class ERDDAPRequestHandler(DAPRequestHandler):
+    """
+    Serves the netCDF files in the directory as ERDDAP tabledap datasets,
+    so that dataset.nc is served at /tabledap/dataset.  The .dds response
+    lists the variables in a sequence, .ncCFHeader responds with the header
+    of the file as dumped by NetCDF-Java and .ncCF responds with a file of
+    the requested variables, with every dimension limited to the number of
+    rows given by an orderByLimit constraint.
+    """
+
+    def _header(self, nc, nc_path):
+        lines = ["netcdf {} {{".format(nc_path), "  dimensions:"]
+        for name, dimension in nc.dimensions.items():
+            lines.append("    {} = {};".format(name, len(dimension)))
+        lines.append("  variables:")
+        for name, variable in nc.variables.items():
+            dimensions = ", ".join(
+                "{}={}".format(d, size)
+                for d, size in zip(variable.dimensions, variable.shape)
+            )
+            cdl_type = CDL_TYPES[(variable.dtype.kind, variable.dtype.itemsize)]
+            if dimensions:
+                name = "{}({})".format(name, dimensions)
+            lines.append("    {} {};".format(cdl_type, name))
+            for attr in variable.ncattrs():
+                value = _cdl_value(variable.getncattr(attr))
+                lines.append("      :{} = {};".format(attr, value))
+            lines.append("")
+        lines.append("  // global attributes:")
+        for attr in nc.ncattrs():
+            lines.append("  :{} = {};".format(attr, _cdl_value(nc.getncattr(attr))))
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def _nccf(self, nc, constraint):
+        query = urllib.parse.unquote(constraint)
+        names, _, limit = query.partition("&orderByLimit(")
+        max_rows = int(limit.strip('")')) if limit else None
+        out = netCDF4.Dataset("response.nc", "w", memory=1024)
+        out.setncatts({k: nc.getncattr(k) for k in nc.ncattrs()})
+        for name in names.split(","):
+            variable = nc.variables[name]
+            variable.set_auto_maskandscale(False)
+            for dimension, size in zip(variable.dimensions, variable.shape):
+                if dimension not in out.dimensions:
+                    out.createDimension(dimension, min(size, max_rows or size))
+            attributes = {k: variable.getncattr(k) for k in variable.ncattrs()}
+            copy = out.createVariable(
+                name,
+                variable.dtype,
+                variable.dimensions,
+                fill_value=attributes.pop("_FillValue", None),
+            )
+            copy.setncatts(attributes)
+            copy.set_auto_maskandscale(False)
+            copy[...] = variable[
+                tuple(slice(0, len(out.dimensions[d])) for d in variable.dimensions)
+            ]
+        return bytes(out.close())
+
+    def _send_file(self, include_body):
+        path, _, constraint = self.path.partition("?")
+        base, extension = os.path.splitext(path)
+        directory, name = os.path.split(base)
+        nc_path = self.translate_path("/{}.nc".format(name))
+        if directory != "/tabledap" or not os.path.isfile(nc_path):
+            self.send_error(404)
+            return
+        with netCDF4.Dataset(nc_path) as nc:
+            if extension == ".dds":
+                lines = ["Dataset {", "  Sequence {"]
+                for name, _, dap_type, _ in self._variables(nc):
+                    lines.append("    {} {};".format(dap_type, name))
+                lines += ["  } s;", "} s;"]
+                body = ("\n".join(lines) + "\n").encode("utf-8")
+                content_type = "text/plain"
+            elif extension == ".ncCFHeader":
+                body = self._header(nc, nc_path).encode("utf-8")
+                content_type = "text/plain"
+            elif extension == ".ncCF":
+                body = self._nccf(nc, constraint)
+                content_type = "application/x-netcdf"
+            else:
+                self.send_error(404)
+                return
+        self._send(body, content_type, include_body)
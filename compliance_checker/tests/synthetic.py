@@ -0,0 +1,904 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/synthetic.py
+
+Generates parameterized synthetic netCDF files for scale testing and
+benchmarking the checkers on inputs much larger than the bundled CDL
+examples: gridded datasets, every feature type recognized by
+cfutil.guess_feature_type, contiguous and indexed ragged array
+representations and many-group netCDF-4 files.
+
+Every generator takes a dict of dimension sizes, the number of data
+variables and an optional dict of chunk sizes by dimension name.  With
+write_data=False only the metadata is written, so files with very large
+coordinates stay small on disk when chunked.
+
+The generators can also be run from the command line, e.g.
+
+    python -m compliance_checker.tests.synthetic point out.nc --variables 10000
+    python -m compliance_checker.tests.synthetic ragged out.nc --size obs=100000000
+"""
+import argparse
+import math
+
+from collections import OrderedDict
+
+import numpy as np
+
+from netCDF4 import Dataset
+
+
+DEFAULT_SIZES = {
+    "instance": 10,
+    "obs": 100,
+    "profile": 5,
+    "level": 20,
+    "time": 24,
+    "z": 20,
+    "lat": 45,
+    "lon": 90,
+    "y": 45,
+    "x": 90,
+    "rgrid": 500,
+    "station": 10,
+    "trajectory": 10,
+}
+
+# maximum number of elements written at once, so large variables are
+# written in slabs along their first dimension
+SLAB_SIZE = 2**20
+
+COORDINATES = OrderedDict(
+    [
+        (
+            "t",
+            (
+                "time",
+                "f8",
+                {
+                    "standard_name": "time",
+                    "units": "seconds since 1970-01-01",
+                    "axis": "T",
+                },
+            ),
+        ),
+        (
+            "x",
+            (
+                "lon",
+                "f4",
+                {"standard_name": "longitude", "units": "degrees_east", "axis": "X"},
+            ),
+        ),
+        (
+            "y",
+            (
+                "lat",
+                "f4",
+                {"standard_name": "latitude", "units": "degrees_north", "axis": "Y"},
+            ),
+        ),
+        (
+            "z",
+            (
+                "z",
+                "f4",
+                {
+                    "standard_name": "depth",
+                    "units": "m",
+                    "positive": "down",
+                    "axis": "Z",
+                },
+            ),
+        ),
+    ]
+)
+
+# feature type: (featureType attribute, cf_role, coordinate dimensions,
+#                data variable dimensions)
+# The comments mirror the dimension notation used in cfutil
+FEATURE_TYPES = OrderedDict(
+    [
+        # x(o), y(o), z(o), t(o)
+        # X(o)
+        (
+            "point",
+            (
+                "point",
+                None,
+                {"x": ("obs",), "y": ("obs",), "z": ("obs",), "t": ("obs",)},
+                ("obs",),
+            ),
+        ),
+        # x, y, z, t(t)
+        # X(t)
+        (
+            "timeseries",
+            (
+                "timeSeries",
+                "timeseries_id",
+                {"x": (), "y": (), "z": (), "t": ("time",)},
+                ("time",),
+            ),
+        ),
+        # x(i), y(i), z(i), t(o)
+        # X(i, o)
+        (
+            "multi-timeseries-orthogonal",
+            (
+                "timeSeries",
+                "timeseries_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("instance",),
+                    "t": ("time",),
+                },
+                ("instance", "time"),
+            ),
+        ),
+        # x(i), y(i), z(i), t(i, o)
+        # X(i, o)
+        (
+            "multi-timeseries-incomplete",
+            (
+                "timeSeries",
+                "timeseries_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("instance",),
+                    "t": ("instance", "obs"),
+                },
+                ("instance", "obs"),
+            ),
+        ),
+        # x(i, o), y(i, o), z(i, o), t(i, o)
+        # X(i, o)
+        (
+            "cf-trajectory",
+            (
+                "trajectory",
+                "trajectory_id",
+                {
+                    "x": ("instance", "obs"),
+                    "y": ("instance", "obs"),
+                    "z": ("instance", "obs"),
+                    "t": ("instance", "obs"),
+                },
+                ("instance", "obs"),
+            ),
+        ),
+        # x(o), y(o), z(o), t(o)
+        # X(o)
+        (
+            "single-trajectory",
+            (
+                "trajectory",
+                "trajectory_id",
+                {"x": ("obs",), "y": ("obs",), "z": ("obs",), "t": ("obs",)},
+                ("obs",),
+            ),
+        ),
+        # x(i), y(i), z(j), t(i)
+        # X(i, j)
+        (
+            "profile-orthogonal",
+            (
+                "profile",
+                "profile_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("level",),
+                    "t": ("instance",),
+                },
+                ("instance", "level"),
+            ),
+        ),
+        # x(i), y(i), z(i, j), t(i)
+        # X(i, j)
+        (
+            "profile-incomplete",
+            (
+                "profile",
+                "profile_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("instance", "level"),
+                    "t": ("instance",),
+                },
+                ("instance", "level"),
+            ),
+        ),
+        # x, y, z(z), t(t)
+        # X(t, z)
+        (
+            "timeseries-profile-single-station",
+            (
+                "timeSeriesProfile",
+                "timeseries_id",
+                {"x": (), "y": (), "z": ("z",), "t": ("time",)},
+                ("time", "z"),
+            ),
+        ),
+        # x(i), y(i), z(z), t(t)
+        # X(i, t, z)
+        (
+            "timeseries-profile-multi-station",
+            (
+                "timeSeriesProfile",
+                "timeseries_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("z",),
+                    "t": ("time",),
+                },
+                ("instance", "time", "z"),
+            ),
+        ),
+        # x, y, z(t, j), t(t)
+        # X(t, j)
+        (
+            "timeseries-profile-single-ortho-time",
+            (
+                "timeSeriesProfile",
+                "timeseries_id",
+                {"x": (), "y": (), "z": ("time", "level"), "t": ("time",)},
+                ("time", "level"),
+            ),
+        ),
+        # x(i), y(i), z(i, t, j), t(t)
+        # X(i, t, j)
+        (
+            "timeseries-profile-multi-ortho-time",
+            (
+                "timeSeriesProfile",
+                "timeseries_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("instance", "time", "level"),
+                    "t": ("time",),
+                },
+                ("instance", "time", "level"),
+            ),
+        ),
+        # x(i), y(i), z(z), t(i, j)
+        # X(i, j, z)
+        (
+            "timeseries-profile-ortho-depth",
+            (
+                "timeSeriesProfile",
+                "timeseries_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("z",),
+                    "t": ("instance", "profile"),
+                },
+                ("instance", "profile", "z"),
+            ),
+        ),
+        # x(i), y(i), z(i, j, k), t(i, j)
+        # X(i, j, k)
+        (
+            "timeseries-profile-incomplete",
+            (
+                "timeSeriesProfile",
+                "timeseries_id",
+                {
+                    "x": ("instance",),
+                    "y": ("instance",),
+                    "z": ("instance", "profile", "level"),
+                    "t": ("instance", "profile"),
+                },
+                ("instance", "profile", "level"),
+            ),
+        ),
+        # x(i, o), y(i, o), z(z), t(i, o)
+        # X(i, o, z)
+        (
+            "trajectory-profile-orthogonal",
+            (
+                "trajectoryProfile",
+                "trajectory_id",
+                {
+                    "x": ("instance", "profile"),
+                    "y": ("instance", "profile"),
+                    "z": ("z",),
+                    "t": ("instance", "profile"),
+                },
+                ("instance", "profile", "z"),
+            ),
+        ),
+        # x(i, o), y(i, o), z(i, o, j), t(i, o)
+        # X(i, o, j)
+        (
+            "trajectory-profile-incomplete",
+            (
+                "trajectoryProfile",
+                "trajectory_id",
+                {
+                    "x": ("instance", "profile"),
+                    "y": ("instance", "profile"),
+                    "z": ("instance", "profile", "level"),
+                    "t": ("instance", "profile"),
+                },
+                ("instance", "profile", "level"),
+            ),
+        ),
+        # x(x), y(y), t(t)
+        # X(t, y, x)
+        (
+            "2d-regular-grid",
+            (
+                None,
+                None,
+                {"x": ("lon",), "y": ("lat",), "t": ("time",)},
+                ("time", "lat", "lon"),
+            ),
+        ),
+        # x(x), y(y)
+        # X(y, x)
+        (
+            "2d-static-grid",
+            (None, None, {"x": ("lon",), "y": ("lat",)}, ("lat", "lon")),
+        ),
+        # x(x), y(y), z(z), t(t)
+        # X(t, z, y, x)
+        (
+            "3d-regular-grid",
+            (
+                None,
+                None,
+                {"x": ("lon",), "y": ("lat",), "z": ("z",), "t": ("time",)},
+                ("time", "z", "lat", "lon"),
+            ),
+        ),
+        # x(x), y(y), z(z)
+        # X(z, y, x)
+        (
+            "3d-static-grid",
+            (
+                None,
+                None,
+                {"x": ("lon",), "y": ("lat",), "z": ("z",)},
+                ("z", "lat", "lon"),
+            ),
+        ),
+        # x(j, i), y(j, i), t(t)
+        # X(t, j, i)
+        (
+            "mapped-grid",
+            (
+                None,
+                None,
+                {"x": ("y", "x"), "y": ("y", "x"), "t": ("time",)},
+                ("time", "y", "x"),
+            ),
+        ),
+        # x(c), y(c), t(t), c(c) compressing the lat/lon index dimensions
+        # X(t, c)
+        (
+            "reduced-grid",
+            (
+                None,
+                None,
+                {"x": ("rgrid",), "y": ("rgrid",), "t": ("time",)},
+                ("time", "rgrid"),
+            ),
+        ),
+    ]
+)
+
+# feature type: list of (dimension, cf_role, coordinate axes) from the
+# outermost instance dimension down to the sample dimension.  Two level
+# types index profiles to their stations or trajectories and store the
+# observations of each profile contiguously, as in CF §H.5.3 and §H.6.3
+RAGGED_FEATURE_TYPES = OrderedDict(
+    [
+        ("timeSeries", [("station", "timeseries_id", "xyz"), ("obs", None, "t")]),
+        ("trajectory", [("trajectory", "trajectory_id", ""), ("obs", None, "txyz")]),
+        ("profile", [("profile", "profile_id", "txy"), ("obs", None, "z")]),
+        (
+            "timeSeriesProfile",
+            [
+                ("station", "timeseries_id", "xy"),
+                ("profile", None, "t"),
+                ("obs", None, "z"),
+            ],
+        ),
+        (
+            "trajectoryProfile",
+            [
+                ("trajectory", "trajectory_id", ""),
+                ("profile", None, "txy"),
+                ("obs", None, "z"),
+            ],
+        ),
+    ]
+)
+
+
+def _sizes(sizes):
+    """
+    Returns the default dimension sizes updated with sizes
+    """
+    merged = dict(DEFAULT_SIZES)
+    merged.update(sizes or {})
+    return merged
+
+
+def _coordinate_values(axis, index):
+    """
+    Returns plausible values for the coordinate axis at the flat indices in
+    index
+    """
+    if axis == "t":
+        return index * 60.0
+    if axis == "x":
+        return (index % 360) - 180.0
+    if axis == "y":
+        return (index % 160) - 80.0
+    return (index % 1000) * 1.0
+
+
+def _fill(var, values):
+    """
+    Writes values(flat_index) into var in slabs of at most SLAB_SIZE
+    elements along the first dimension, so that variables much larger than
+    memory can be written
+    """
+    shape = var.shape
+    if not shape:
+        var.assignValue(values(np.arange(1))[0])
+        return
+    row = int(np.prod(shape[1:], dtype=np.int64))
+    if row == 0:
+        return
+    step = max(1, SLAB_SIZE // row)
+    for start in range(0, shape[0], step):
+        stop = min(start + step, shape[0])
+        index = np.arange(start * row, stop * row, dtype=np.int64)
+        var[start:stop] = values(index).reshape((stop - start,) + shape[1:])
+
+
+def _create_variable(group, name, datatype, dims, sizes, chunksizes, **kwargs):
+    """
+    Creates a variable, chunked by the sizes in chunksizes where given.
+    Dimensions missing from chunksizes use a single chunk along their length.
+    """
+    if chunksizes and dims:
+        kwargs["chunksizes"] = [
+            max(1, min(chunksizes.get(dim, sizes[dim]), sizes[dim])) for dim in dims
+        ]
+    return group.createVariable(name, datatype, dims, **kwargs)
+
+
+def _create_dimensions(nc, dims, sizes):
+    for dim in dims:
+        if dim not in nc.dimensions:
+            nc.createDimension(dim, sizes[dim])
+
+
+def _set_global_attributes(nc, feature_type):
+    nc.Conventions = "CF-1.7, ACDD-1.3"
+    nc.title = "Synthetic {} dataset".format(feature_type)
+    nc.summary = "Generated by compliance_checker.tests.synthetic"
+    nc.naming_authority = "org.ioos"
+    nc.id = "synthetic-{}".format(feature_type)
+
+
+def _add_grid_mappings(group, n_grid_mappings):
+    """
+    Adds n_grid_mappings latitude_longitude grid mapping variables and
+    returns their names
+    """
+    names = []
+    for i in range(n_grid_mappings):
+        name = "crs_{}".format(i)
+        crs = group.createVariable(name, "i4")
+        crs.grid_mapping_name = "latitude_longitude"
+        crs.semi_major_axis = 6378137.0
+        crs.inverse_flattening = 298.257223563
+        names.append(name)
+    return names
+
+
+def _add_data_variables(
+    group,
+    dims,
+    n_variables,
+    sizes,
+    chunksizes,
+    write_data,
+    rng,
+    coordinates=None,
+    grid_mappings=None,
+):
+    """
+    Adds n_variables float data variables named temperature_<n> with the
+    given dimensions
+    """
+    # every variable is defined before any is written, which is much
+    # faster for files with many variables
+    variables = []
+    for i in range(n_variables):
+        var = _create_variable(
+            group,
+            "temperature_{}".format(i),
+            "f4",
+            dims,
+            sizes,
+            chunksizes,
+            fill_value=np.float32(-999.0),
+        )
+        var.standard_name = "sea_water_temperature"
+        var.long_name = "Sea water temperature {}".format(i)
+        var.units = "degree_C"
+        var.coverage_content_type = "physicalMeasurement"
+        if coordinates:
+            var.coordinates = " ".join(coordinates)
+        if grid_mappings:
+            var.grid_mapping = grid_mappings[i % len(grid_mappings)]
+        variables.append(var)
+    if write_data:
+        for var in variables:
+            _fill(var, lambda index: rng.random(index.size, dtype="f4") * 30)
+
+
+def _write_feature_type(
+    nc,
+    feature_type,
+    n_variables,
+    sizes,
+    chunksizes,
+    n_grid_mappings,
+    write_data,
+    rng,
+):
+    cf_feature_type, cf_role, coordinate_dims, data_dims = FEATURE_TYPES[feature_type]
+    _set_global_attributes(nc, feature_type)
+    if cf_feature_type is not None:
+        nc.featureType = cf_feature_type
+
+    for dims in list(coordinate_dims.values()) + [data_dims]:
+        _create_dimensions(nc, dims, sizes)
+
+    # variables which are not coordinate variables in the netCDF sense need
+    # to be referenced from the coordinates attribute
+    coordinates = []
+    for axis, dims in coordinate_dims.items():
+        name, datatype, attrs = COORDINATES[axis]
+        var = _create_variable(nc, name, datatype, dims, sizes, chunksizes)
+        var.setncatts(attrs)
+        if dims != (name,):
+            coordinates.append(name)
+        if write_data:
+            _fill(var, lambda index, axis=axis: _coordinate_values(axis, index))
+
+    if feature_type == "reduced-grid":
+        n_lat = int(math.ceil(math.sqrt(sizes["rgrid"] / 2.0)))
+        n_lon = int(math.ceil(sizes["rgrid"] / float(n_lat)))
+        nc.createDimension("lat_index", n_lat)
+        nc.createDimension("lon_index", n_lon)
+        rgrid = nc.createVariable("rgrid", "i4", ("rgrid",))
+        rgrid.compress = "lat_index lon_index"
+        if write_data:
+            _fill(rgrid, lambda index: index)
+
+    if cf_role is not None:
+        instance_dims = ("instance",) if "instance" in data_dims else ()
+        feature_id = nc.createVariable("feature_id", "i4", instance_dims)
+        feature_id.cf_role = cf_role
+        feature_id.long_name = "Feature identifier"
+        if write_data:
+            _fill(feature_id, lambda index: index)
+
+    grid_mappings = _add_grid_mappings(nc, n_grid_mappings)
+    _add_data_variables(
+        nc,
+        data_dims,
+        n_variables,
+        sizes,
+        chunksizes,
+        write_data,
+        rng,
+        coordinates,
+        grid_mappings,
+    )
+
+
+def write_feature_type(
+    path,
+    feature_type,
+    n_variables=1,
+    sizes=None,
+    chunksizes=None,
+    n_grid_mappings=0,
+    write_data=True,
+    seed=0,
+    format="NETCDF4",
+):
+    """
+    Writes a dataset whose data variables are recognized as feature_type by
+    cfutil.guess_feature_type and returns the path.
+
+    :param str path: Path of the netCDF file to write
+    :param str feature_type: One of the keys of FEATURE_TYPES
+    :param int n_variables: Number of data variables
+    :param dict sizes: Dimension sizes by name, overriding DEFAULT_SIZES
+    :param dict chunksizes: Chunk sizes by dimension name, or None for
+                            contiguous storage
+    :param int n_grid_mappings: Number of grid mapping variables, assigned
+                                to the data variables in turn
+    :param bool write_data: Whether to write values, or only the metadata
+    :param int seed: Seed for the generated data values
+    :param str format: netCDF file format
+    """
+    if feature_type not in FEATURE_TYPES:
+        raise ValueError("Unknown feature type {}".format(feature_type))
+    rng = np.random.default_rng(seed)
+    with Dataset(path, "w", format=format) as nc:
+        _write_feature_type(
+            nc,
+            feature_type,
+            n_variables,
+            _sizes(sizes),
+            chunksizes,
+            n_grid_mappings,
+            write_data,
+            rng,
+        )
+    return path
+
+
+def _ragged_counts(rng, total, n):
+    """
+    Returns n uneven counts summing to total
+    """
+    if n == 0:
+        return np.zeros(0, dtype="i4")
+    weights = rng.dirichlet(np.full(n, 0.5))
+    return rng.multinomial(total, weights).astype("i4")
+
+
+def write_ragged(
+    path,
+    feature_type="timeSeries",
+    representation="contiguous",
+    n_variables=1,
+    sizes=None,
+    chunksizes=None,
+    write_data=True,
+    seed=0,
+    format="NETCDF4",
+):
+    """
+    Writes a discrete sampling geometry dataset using a ragged array
+    representation and returns the path.  The number of elements of each
+    instance varies widely, and the sizes of the instance and "obs"
+    dimensions are taken from sizes.
+
+    :param str path: Path of the netCDF file to write
+    :param str feature_type: One of the keys of RAGGED_FEATURE_TYPES
+    :param str representation: "contiguous" for a row_size count variable,
+                               or "indexed" for an index variable.  Two
+                               level types are always contiguous.
+    :param int n_variables: Number of data variables
+    :param dict sizes: Dimension sizes by name, overriding DEFAULT_SIZES
+    :param dict chunksizes: Chunk sizes by dimension name, or None for
+                            contiguous storage
+    :param bool write_data: Whether to write values, or only the metadata
+    :param int seed: Seed for the generated data values
+    :param str format: netCDF file format
+    """
+    if feature_type not in RAGGED_FEATURE_TYPES:
+        raise ValueError("Unknown feature type {}".format(feature_type))
+    if representation not in ("contiguous", "indexed"):
+        raise ValueError("Unknown representation {}".format(representation))
+    levels = RAGGED_FEATURE_TYPES[feature_type]
+    if len(levels) > 2 and representation != "contiguous":
+        raise ValueError(
+            "{} only supports the contiguous representation".format(feature_type)
+        )
+
+    rng = np.random.default_rng(seed)
+    sizes = _sizes(sizes)
+    with Dataset(path, "w", format=format) as nc:
+        _set_global_attributes(nc, "{}-{}".format(feature_type, representation))
+        nc.featureType = feature_type
+        _create_dimensions(nc, [dim for dim, _, _ in levels], sizes)
+
+        coordinates = []
+        for dim, cf_role, axes in levels:
+            if cf_role is not None:
+                feature_id = nc.createVariable("{}_id".format(dim), "i4", (dim,))
+                feature_id.cf_role = cf_role
+                feature_id.long_name = "{} identifier".format(dim)
+                if write_data:
+                    _fill(feature_id, lambda index: index)
+            for axis in axes:
+                name, datatype, attrs = COORDINATES[axis]
+                var = _create_variable(nc, name, datatype, (dim,), sizes, chunksizes)
+                var.setncatts(attrs)
+                coordinates.append(name)
+                if write_data:
+                    _fill(var, lambda index, axis=axis: _coordinate_values(axis, index))
+
+        for (parent, _, _), (child, _, _) in zip(levels, levels[1:]):
+            # the instance dimension of the sample dimension is given by the
+            # requested representation, profiles are always indexed to their
+            # station or trajectory
+            if child == "obs" and representation == "contiguous":
+                var = nc.createVariable("row_size", "i4", (parent,))
+                var.long_name = "number of observations for this {}".format(parent)
+                var.sample_dimension = child
+                if write_data:
+                    var[:] = _ragged_counts(rng, sizes[child], sizes[parent])
+            else:
+                var = _create_variable(
+                    nc, "{}_index".format(parent), "i4", (child,), sizes, chunksizes
+                )
+                var.long_name = "which {} this {} is for".format(parent, child)
+                var.instance_dimension = parent
+                if write_data:
+                    counts = _ragged_counts(rng, sizes[child], sizes[parent])
+                    index = np.repeat(np.arange(sizes[parent], dtype="i4"), counts)
+                    if child == "obs":
+                        rng.shuffle(index)
+                    var[:] = index
+
+        _add_data_variables(
+            nc, ("obs",), n_variables, sizes, chunksizes, write_data, rng, coordinates
+        )
+    return path
+
+
+def write_groups(
+    path,
+    n_groups=10,
+    depth=1,
+    feature_type="2d-regular-grid",
+    n_variables=1,
+    sizes=None,
+    chunksizes=None,
+    write_data=True,
+    seed=0,
+):
+    """
+    Writes a netCDF-4 dataset for feature_type in the root group, plus
+    n_groups chains of nested groups depth levels deep.  Every group holds
+    n_variables data variables using the dimensions of the root group.
+    Returns the path.
+
+    :param str path: Path of the netCDF file to write
+    :param int n_groups: Number of groups below the root group
+    :param int depth: Nesting depth of each group
+    :param str feature_type: One of the keys of FEATURE_TYPES
+    :param int n_variables: Number of data variables in each group
+    :param dict sizes: Dimension sizes by name, overriding DEFAULT_SIZES
+    :param dict chunksizes: Chunk sizes by dimension name, or None for
+                            contiguous storage
+    :param bool write_data: Whether to write values, or only the metadata
+    :param int seed: Seed for the generated data values
+    """
+    if feature_type not in FEATURE_TYPES:
+        raise ValueError("Unknown feature type {}".format(feature_type))
+    rng = np.random.default_rng(seed)
+    sizes = _sizes(sizes)
+    data_dims = FEATURE_TYPES[feature_type][3]
+    with Dataset(path, "w", format="NETCDF4") as nc:
+        _write_feature_type(
+            nc, feature_type, n_variables, sizes, chunksizes, 0, write_data, rng
+        )
+        for i in range(n_groups):
+            group = nc
+            for level in range(depth):
+                group = group.createGroup("group_{}_{}".format(i, level))
+                _add_data_variables(
+                    group, data_dims, n_variables, sizes, chunksizes, write_data, rng
+                )
+    return path
+
+
+def _parse_sizes(values):
+    sizes = {}
+    for value in values or []:
+        dim, _, size = value.partition("=")
+        sizes[dim] = int(size)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generates synthetic netCDF datasets for scale testing"
+    )
+    parser.add_argument(
+        "kind",
+        choices=list(FEATURE_TYPES) + ["ragged", "groups"],
+        help="Feature type to generate, a ragged array dataset or a many-group dataset",
+    )
+    parser.add_argument("path", help="Path of the netCDF file to write")
+    parser.add_argument(
+        "--variables", type=int, default=1, help="Number of data variables"
+    )
+    parser.add_argument(
+        "--size",
+        action="append",
+        metavar="DIM=N",
+        help="Size of a dimension, may be given several times",
+    )
+    parser.add_argument(
+        "--chunk",
+        action="append",
+        metavar="DIM=N",
+        help="Chunk size along a dimension, may be given several times",
+    )
+    parser.add_argument(
+        "--grid-mappings", type=int, default=0, help="Number of grid mappings"
+    )
+    parser.add_argument(
+        "--ragged-feature-type",
+        choices=list(RAGGED_FEATURE_TYPES),
+        default="timeSeries",
+        help="Feature type of a ragged array dataset",
+    )
+    parser.add_argument(
+        "--representation",
+        choices=["contiguous", "indexed"],
+        default="contiguous",
+        help="Representation of a ragged array dataset",
+    )
+    parser.add_argument(
+        "--groups", type=int, default=10, help="Number of groups to generate"
+    )
+    parser.add_argument("--depth", type=int, default=1, help="Nesting depth of groups")
+    parser.add_argument(
+        "--no-data",
+        action="store_true",
+        help="Only write metadata, leaving variables unwritten",
+    )
+    args = parser.parse_args()
+
+    sizes = _parse_sizes(args.size)
+    chunksizes = _parse_sizes(args.chunk) or None
+    write_data = not args.no_data
+    if args.kind == "ragged":
+        write_ragged(
+            args.path,
+            args.ragged_feature_type,
+            args.representation,
+            args.variables,
+            sizes,
+            chunksizes,
+            write_data,
+        )
+    elif args.kind == "groups":
+        write_groups(
+            args.path,
+            args.groups,
+            args.depth,
+            n_variables=args.variables,
+            sizes=sizes,
+            chunksizes=chunksizes,
+            write_data=write_data,
+        )
+    else:
+        write_feature_type(
+            args.path,
+            args.kind,
+            args.variables,
+            sizes,
+            chunksizes,
+            args.grid_mappings,
+            write_data,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_backends.py
+"""
+import os
+import shutil
+import tempfile
+
+from functools import partial
+from types import SimpleNamespace
+from unittest import TestCase, mock, skipIf
+
+import numpy as np
+
+from netCDF4 import Dataset
+
+from compliance_checker import MemoizedDataset
+from compliance_checker.backends import hdf5, open_dataset, zarr_store
+from compliance_checker.backends.readonly import (
+    ReadOnlyDataset,
+    ReadOnlyDimension,
+    ReadOnlyVariable,
+    mask_and_scale,
+)
+from compliance_checker.concurrency import NETCDF_LOCK
+from compliance_checker.protocols.zarr import is_zarr
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests.resources import STATIC_FILES
+
+
+def _locked_read(var, key):
+    # checks of ReadOnlyDatasets don't hold NETCDF_LOCK, which reads from
+    # the netCDF library need
+    with NETCDF_LOCK:
+        return var[key]
+
+
+def read_only_copy(nc):
+    """
+    Returns a ReadOnlyDataset of the netCDF4 dataset nc, which reads the raw
+    data of its variables like a backend would
+    """
+    ds = ReadOnlyDataset(
+        nc.filepath(), [(k, nc.getncattr(k)) for k in nc.ncattrs()], nc.data_model
+    )
+    for name, dim in nc.dimensions.items():
+        ds.dimensions[name] = ReadOnlyDimension(name, len(dim), dim.isunlimited())
+    for name, var in nc.variables.items():
+        var.set_auto_maskandscale(False)
+        var.set_auto_chartostring(False)
+        ds.variables[name] = ReadOnlyVariable(
+            ds,
+            name,
+            var.dimensions,
+            var.dtype,
+            var.shape,
+            [(k, var.getncattr(k)) for k in var.ncattrs()],
+            partial(_locked_read, var),
+        )
+    return ds
+
+
+class TestReadOnlyDataset(TestCase):
+    """
+    Tests that datasets read by backends other than netCDF4 look like
+    netCDF4 datasets to the checkers
+    """
+
+    def setUp(self):
+        self.nc = Dataset(filename=os.devnull, mode="w", diskless=True)
+        self.addCleanup(self.nc.close)
+
+    def test_mask_and_scale(self):
+        """
+        Tests that raw data is masked and scaled like netCDF4 does
+        """
+        self.nc.createDimension("x", 6)
+        variables = {
+            "default_fill": ("f4", {}),
+            "fill": ("i2", {"_FillValue": -1}),
+            "nan_fill": ("f8", {"_FillValue": np.nan}),
+            "missing": ("i4", {"missing_value": np.array([3, 4], dtype="i4")}),
+            "valid_range": ("f4", {"valid_range": np.array([1, 4], dtype="f4")}),
+            "valid_min": ("i1", {"valid_min": np.int8(2)}),
+            "packed": ("i2", {"scale_factor": 0.5, "add_offset": 10.0}),
+            "unsigned": ("i1", {"_Unsigned": "true"}),
+        }
+        raw = np.array([-1, 0, 2, 3, 4, 5])
+        for name, (dtype, attributes) in variables.items():
+            fill_value = attributes.pop("_FillValue", None)
+            var = self.nc.createVariable(name, dtype, ("x",), fill_value=fill_value)
+            var.setncatts(attributes)
+            var.set_auto_maskandscale(False)
+            values = raw.astype(dtype)
+            if name == "nan_fill":
+                values[0] = np.nan
+            var[:] = values
+        self.nc.createVariable("unwritten", "f8", ("x",))
+        for name, var in self.nc.variables.items():
+            var.set_auto_maskandscale(False)
+            data = var[:]
+            attributes = {k: var.getncattr(k) for k in var.ncattrs()}
+            var.set_auto_maskandscale(True)
+            expected = var[:]
+            actual = mask_and_scale(data, attributes)
+            np.testing.assert_array_equal(
+                np.ma.getmaskarray(actual), np.ma.getmaskarray(expected), name
+            )
+            np.testing.assert_array_equal(actual.compressed(), expected.compressed())
+            assert actual.dtype == expected.dtype, name
+
+    def test_variables(self):
+        """
+        Tests reading variables and their attributes
+        """
+        self.nc.createDimension("time", None)
+        self.nc.createDimension("x", 2)
+        self.nc.title = "test"
+        temp = self.nc.createVariable("temp", "f4", ("time", "x"), fill_value=-9)
+        temp.standard_name = "sea_water_temperature"
+        temp[:] = [[1, -9]]
+        depth = self.nc.createVariable("depth", "f8", ())
+        depth.standard_name = "depth"
+        ds = read_only_copy(self.nc)
+
+        assert ds.title == ds.getncattr("title") == "test"
+        assert ds.ncattrs() == ["title"]
+        assert ds.dimensions["time"].isunlimited()
+        assert len(ds.dimensions["time"]) == 1
+        var = ds.variables["temp"]
+        assert var.group() is ds
+        assert (var.ndim, var.size, var.shape) == (2, 2, (1, 2))
+        assert var.standard_name == "sea_water_temperature"
+        with self.assertRaises(AttributeError):
+            var.units
+        assert var[0, 0] == 1
+        assert var[:].mask.tolist() == [[False, True]]
+        var.set_auto_mask(False)
+        assert var[0, 1] == -9
+        assert ds.variables["depth"][:] is np.ma.masked
+        assert ds.get_variables_by_attributes(standard_name="depth") == [
+            ds.variables["depth"]
+        ]
+        assert ds.get_variables_by_attributes(
+            standard_name=lambda v: v is not None
+        ) == [var, ds.variables["depth"]]
+
+    def test_checker_results(self):
+        """
+        Tests that checkers give the same results on a ReadOnlyDataset as on
+        the netCDF4 dataset it reads
+        """
+        CheckSuite.load_all_available_checkers()
+        cs = CheckSuite()
+        checkers = ["cf:1.6", "acdd:1.3", "ioos:1.2"]
+        for name in ("bad_data_type", "kibesillah", "string", "usgs_dem_saipan"):
+            with MemoizedDataset(STATIC_FILES[name]) as nc:
+                expected = cs.run(nc, [], *checkers)
+                with read_only_copy(nc) as ds:
+                    actual = cs.run(ds, [], *checkers)
+            for checker in checkers:
+                assert actual[checker][0] == expected[checker][0], "{} {}".format(
+                    name, checker
+                )
+                assert set(actual[checker][1]) == set(expected[checker][1])
+
+
+class TestOpenDataset(TestCase):
+    """
+    Tests opening local netCDF files with the dataset backends
+    """
+
+    def test_open_dataset(self):
+        classic = STATIC_FILES["kibesillah"]
+        with open_dataset(classic) as ds:
+            assert isinstance(ds, MemoizedDataset)
+        # h5netcdf only reads netCDF-4 files
+        with open_dataset(classic, "h5netcdf") as ds:
+            assert isinstance(ds, MemoizedDataset)
+        with self.assertRaises(ValueError):
+            open_dataset(classic, "netcdf3")
+
+    def test_h5netcdf_missing(self):
+        with mock.patch.object(hdf5, "h5netcdf", None):
+            with self.assertRaises(RuntimeError):
+                open_dataset(STATIC_FILES["string"], "h5netcdf")
+
+    @skipIf(hdf5.h5netcdf is None, "h5netcdf isn't installed")
+    def test_open_h5netcdf(self):
+        path = STATIC_FILES["string"]
+        with open_dataset(path, "h5netcdf") as ds, MemoizedDataset(path) as nc:
+            assert isinstance(ds, hdf5.H5NetCDFDataset)
+            assert ds.data_model == nc.data_model
+            assert ds.ncattrs() == nc.ncattrs()
+            assert list(ds.dimensions) == list(nc.dimensions)
+            assert list(ds.variables) == list(nc.variables)
+            for name, var in nc.variables.items():
+                assert ds.variables[name].dimensions == var.dimensions
+                np.testing.assert_array_equal(ds.variables[name][:], var[:])
+
+
+class TestZarrDataset(TestCase):
+    """
+    Tests reading Zarr stores as netCDF datasets
+    """
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp(suffix=".zarr")
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def test_is_zarr(self):
+        assert not is_zarr(self.path)
+        assert not is_zarr(STATIC_FILES["kibesillah"])
+        with open(os.path.join(self.path, ".zgroup"), "w") as f:
+            f.write('{"zarr_format": 2}')
+        assert is_zarr(self.path)
+
+    def test_attribute_value(self):
+        """
+        Tests that attributes decoded from JSON have the types netCDF4
+        attributes have
+        """
+        value = zarr_store._attribute_value
+        assert value("m") == "m"
+        assert value(["a"]) == "a"
+        assert value(["a", "b"]) == ["a", "b"]
+        assert isinstance(value(1), np.int64)
+        assert isinstance(value([1.5]), np.float64)
+        np.testing.assert_array_equal(value([0, 10]), np.array([0, 10]))
+        assert value(True) is True
+
+    def test_fill_value(self):
+        """
+        Tests that the fill value of an array is its _FillValue, unless it
+        is zarr's default of 0
+        """
+
+        def attributes(fill_value, dtype="i4", **attrs):
+            array = SimpleNamespace(
+                attrs=SimpleNamespace(asdict=lambda: attrs),
+                dtype=np.dtype(dtype),
+                fill_value=fill_value,
+            )
+            return dict(zarr_store._attributes(array))
+
+        assert attributes(-9)["_FillValue"] == -9
+        assert np.isnan(attributes(np.nan, "f8")["_FillValue"])
+        assert "_FillValue" not in attributes(0)
+        assert "_FillValue" not in attributes(0.0, "f4")
+        assert "_FillValue" not in attributes(None)
+        assert attributes(-9, _FillValue=0)["_FillValue"] == 0
+
+    def test_zarr_missing(self):
+        with open(os.path.join(self.path, ".zgroup"), "w") as f:
+            f.write('{"zarr_format": 2}')
+        with mock.patch.object(zarr_store, "zarr", None):
+            with self.assertRaises(RuntimeError):
+                CheckSuite().load_dataset(self.path)
+
+    @skipIf(zarr_store.zarr is None, "zarr isn't installed")
+    def test_load_dataset(self):
+        zarr = zarr_store.zarr
+        group = zarr.open_group(self.path, mode="w")
+        group.attrs["title"] = "test"
+        temp = group.create_dataset(
+            "temp", shape=(5, 2), chunks=(2, 2), dtype="f4", fill_value=-9
+        )
+        temp.attrs.update(_ARRAY_DIMENSIONS=["time", "x"], units="degree_C")
+        temp[:] = [[1, 2], [3, 4], [5, 6], [7, 8], [9, -9]]
+        ds = CheckSuite().load_dataset(self.path)
+        assert isinstance(ds, zarr_store.ZarrDataset)
+        assert ds.title == "test"
+        assert [(name, len(dim)) for name, dim in ds.dimensions.items()] == [
+            ("time", 5),
+            ("x", 2),
+        ]
+        var = ds.variables["temp"]
+        assert var.dimensions == ("time", "x")
+        assert var.units == "degree_C"
+        assert var._FillValue == -9
+        data = var[:]
+        assert data.mask.sum() == 1
+        assert data.compressed().tolist() == list(range(1, 10))
+        assert var[1:3, 0].tolist() == [3, 5]
+        assert var[[0, 4], 1].tolist() == [2, None]
@@ -3,12 +3,14 @@
 """Tests for base compliance checker class"""
 
 import os
+import re
 
 from unittest import TestCase
 
+from lxml import etree
 from netCDF4 import Dataset
 
-from compliance_checker import base
+from compliance_checker import base, util
 
 
 class TestBase(TestCase):
@@ -94,6 +96,65 @@ class TestBase(TestCase):
         base.attr_check(attr, self.ds, priority, rv3)
         assert rv3[0] == base.Result(priority, True, "dummy", [])
 
+    def test_compile_requirement(self):
+        """Tests that requirements compile to the evaluator for their kind"""
+        priority = base.BaseCheck.MEDIUM
+        for other, requirement_type in (
+            (None, base.PresenceRequirement),
+            (["a", "b"], base.AllowedValuesRequirement),
+            (etree.XPath("/a"), base.XPathRequirement),
+            (base.EmailValidator(), base.ValidatorRequirement),
+            (re.compile("^[0-9]+$"), base.RegexRequirement),
+            (lambda ds: None, base.FunctionRequirement),
+        ):
+            requirement = base.compile_requirement(("test", other), priority)
+            assert type(requirement) is requirement_type
+        with self.assertRaises(TypeError):
+            base.compile_requirement(("test", 1), priority)
+
+        self.ds.test = "abc"
+        ret_val = []
+        requirement = base.compile_requirement(
+            ("test", re.compile("^[0-9]+$")), priority
+        )
+        requirement(self.ds, ret_val)
+        assert ret_val == [
+            base.Result(
+                priority,
+                False,
+                "test",
+                ["test must match regular expression re.compile('^[0-9]+$')"],
+            )
+        ]
+
+    def test_check_has_plan(self):
+        """
+        Tests that the requirements of check_has are compiled once per
+        checker class for as long as equal requirements are returned
+        """
+
+        class PlanCheck(base.BaseCheck):
+            atts = ["test", ("other", ["a", "b"])]
+
+            @base.check_has(base.BaseCheck.HIGH)
+            def check_atts(self, ds):
+                return self.atts
+
+        checker = PlanCheck()
+        self.ds.test = "abc"
+        first = checker.check_atts(self.ds)
+        plans = PlanCheck.check_atts._cc_requirement_plans
+        (plan,) = plans.values()
+        # a new checker, as built for each dataset, reuses the plan
+        assert PlanCheck().check_atts(self.ds) == first
+        assert list(plans.values()) == [plan]
+        assert [r.value for r in first] == [True, (0, 2)]
+
+        # changing the list in place compiles the requirements again
+        PlanCheck.atts.append("missing")
+        assert [r.value for r in checker.check_atts(self.ds)] == [True, (0, 2), False]
+        assert list(plans.values()) != [plan]
+
     def test_get_test_ctx(self):
         # acdd refers to a BaseCheck instance here -- perhaps the variable name
         # should reflect that?
@@ -156,12 +217,101 @@ class TestBase(TestCase):
         self.assertFalse(bad_result[0])
         self.assertEqual(bad_result[1], ["test must be a valid URL"])
 
+    def test_walk_variables(self):
+        """
+        Test that visitors see every variable once, and only the attributes
+        they ask for, until a callback raises
+        """
+        self.ds.createDimension("x", 2)
+        for name in ("a", "b", "c"):
+            var = self.ds.createVariable(name, "f4", ("x",))
+            var.units = "m"
+            var.long_name = name
+        variables, attributes = [], []
+        names = base.VariableVisitor(
+            lambda: variables,
+            lambda name, var, attrs: variables.append((name, attrs)),
+            lambda name, var, attr: attributes.append((name, attr)),
+            attributes={"units"},
+        )
+
+        def fail(name, var, attrs):
+            if name == "b":
+                raise ValueError(name)
+            variables.append(name)
+
+        failing = base.VariableVisitor(lambda: [], fail)
+        base.walk_variables(self.ds, [names, failing])
+        assert names.finish() == [
+            ("a", ["units", "long_name"]),
+            "a",
+            ("b", ["units", "long_name"]),
+            ("c", ["units", "long_name"]),
+        ]
+        assert attributes == [("a", "units"), ("b", "units"), ("c", "units")]
+        with self.assertRaises(ValueError):
+            failing.finish()
+
+    def test_visits_variables(self):
+        """
+        Test that checks returning visitors can be called like other checks
+        """
+
+        class VisitingCheck(base.BaseCheck):
+            @base.visits_variables
+            def check_count(self, ds):
+                count = []
+                return base.VariableVisitor(
+                    lambda: base.Result(base.BaseCheck.HIGH, len(count), "count"),
+                    lambda name, var, attrs: count.append(name),
+                )
+
+        self.ds.createDimension("x", 2)
+        self.ds.createVariable("a", "f4", ("x",))
+        self.ds.createVariable("b", "f4", ("x",))
+        checker = VisitingCheck()
+        assert checker.check_count(self.ds).value
+        assert checker.check_count._cc_visitor(checker, self.ds).result().value is False
+
 
 class TestGenericFile(TestCase):
     """
     Tests the GenericFile class.
     """
 
+    def test_result_to_primitive(self):
+        """
+        Tests that the direct Result conversion matches the generic
+        serialization of Result.serialize()
+        """
+        child = base.Result(base.BaseCheck.LOW, True, ("group", "child"), ["msg"])
+        res = base.Result(
+            base.BaseCheck.HIGH, (1, 2), "parent", ["a", "b"], children=[child]
+        )
+        expected = {
+            "name": "parent",
+            "weight": base.BaseCheck.HIGH,
+            "value": [1, 2],
+            "msgs": ["a", "b"],
+            "children": [
+                {
+                    "name": ["group", "child"],
+                    "weight": base.BaseCheck.LOW,
+                    "value": True,
+                    "msgs": ["msg"],
+                    "children": [],
+                }
+            ],
+        }
+        assert res.to_primitive() == expected
+
+        # non-finite floats are marked to be written as NaN rather than null
+        res = base.Result(base.BaseCheck.HIGH, (float("nan"), 2), "nan")
+        assert type(res.to_primitive()["value"][0]) is util.NonFiniteFloat
+        assert util.json_dumps(res.to_primitive()).startswith(
+            '{"name":"nan","weight":3,"value":[NaN,2]'
+        )
+
     def test_create_GenericFile_success(self):
         path = "/tmp/test.txt"
         gf = base.GenericFile(path)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_batch.py
+"""
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from netCDF4 import Dataset
+
+from compliance_checker.base import BaseCheck, BaseNCCheck, check_has, ratable_result
+from compliance_checker.batch import (
+    MISSING,
+    AttributeTable,
+    attribute_checks,
+    evaluate_attribute_checks,
+)
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests import synthetic
+from compliance_checker.tests.resources import STATIC_FILES
+
+
+class CountingCheck(BaseNCCheck, BaseCheck):
+    """
+    Checker with an attribute rule which counts its calls
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def verify_title(self, ds):
+        self.calls += 1
+        if getattr(ds, "title", "") == "special":
+            return ratable_result(getattr(ds, "summary", "") == "ok", "title", [])
+        return ratable_result(True, "title", [])
+
+    @check_has(BaseCheck.MEDIUM)
+    def check_title(self, ds):
+        return [("title", self.verify_title)]
+
+
+class TestBatch(TestCase):
+    """
+    Tests evaluating attribute rules on tables of the attributes of many
+    datasets
+    """
+
+    def setUp(self):
+        CheckSuite.checkers.clear()
+        CheckSuite.load_all_available_checkers()
+        self.cs = CheckSuite()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _granule(self, index, **attributes):
+        path = synthetic.write_feature_type(
+            os.path.join(self.tmpdir, "granule{}.nc".format(index)),
+            "2d-regular-grid",
+            sizes={"time": 2, "lat": 3, "lon": 4},
+            seed=index,
+        )
+        with Dataset(path, "a") as ds:
+            for name, value in attributes.items():
+                if value is None:
+                    ds.delncattr(name)
+                else:
+                    ds.setncattr(name, value)
+        return path
+
+    def _paths(self):
+        return [
+            self._granule(0),
+            self._granule(1, title="   ", creator_sector="academic"),
+            self._granule(2, title=None, creator_sector="unlisted"),
+            self._granule(3, standard_name_vocabulary="CF Standard Name Table v72"),
+            self._granule(4, standard_name_vocabulary=np.int32(72)),
+            self._granule(5, creator_email="nobody", date_created="yesterday"),
+            self._granule(6, Conventions="CF-1.6, ACDD-1.3", keywords=[1.5, 2.5]),
+        ]
+
+    def test_attribute_table(self):
+        """
+        Checks the rows and columns of an attribute table
+        """
+        paths = self._paths()
+        table = AttributeTable.from_paths(paths)
+        assert table.locations == paths
+        assert table.n_datasets == len(paths)
+        with Dataset(paths[0]) as ds:
+            n_rows = len(ds.ncattrs()) + sum(
+                len(var.ncattrs()) for var in ds.variables.values()
+            )
+            lat_units = ds.variables["lat"].units
+        assert (table.dataset == 0).sum() == n_rows
+
+        titles = table.column("title")
+        assert titles[2] == MISSING
+        assert table.values[titles[1]] == "   "
+        assert titles[0] == titles[3]
+        assert (table.column("missing") == MISSING).all()
+        assert table.values[table.column("units", "lat")[0]] == lat_units
+        assert (table.column("title", "missing") == MISSING).all()
+
+        # equal values of different types are told apart
+        vocabulary = table.column("standard_name_vocabulary")
+        assert table.values[vocabulary[4]] == np.int32(72)
+        assert vocabulary[3] != vocabulary[4]
+
+        attributes = table.global_attributes(6)
+        with Dataset(paths[6]) as ds:
+            assert list(attributes) == ds.ncattrs()
+        np.testing.assert_array_equal(attributes["keywords"], [1.5, 2.5])
+
+    def _check_results(self, ds, checker):
+        checks = {}
+        for check_name, method in attribute_checks(checker).items():
+            try:
+                checks[check_name] = self.cs._run_check(method, ds, None), None
+            except Exception as e:
+                checks[check_name] = [], e
+        return checks
+
+    def test_check_has_results(self):
+        """
+        Checks that the results of the ACDD and IOOS attribute checks
+        evaluated on a table are the same as when run on each dataset
+        """
+        paths = self._paths()
+        paths += [STATIC_FILES[name] for name in ("conv_bad", "ncei_gold_point_1")]
+        datasets = [self.cs.load_dataset(path) for path in paths]
+        for ds in datasets:
+            self.addCleanup(ds.close)
+        table = AttributeTable.from_datasets(datasets, paths)
+        for name in ("acdd:1.1", "acdd:1.3", "ioos:1.1", "ioos:1.2"):
+            checker_class = self.cs.checkers[name]
+            checker = checker_class()
+            evaluation = evaluate_attribute_checks(table, checker)
+            scored, possible = evaluation.scores()
+            for index, ds in enumerate(datasets):
+                checks = evaluation.results(index)
+                expected = self._check_results(ds, checker_class())
+                assert set(checks) == set(expected)
+                points = [0, 0]
+                for check_name, (results, error) in checks.items():
+                    expected_results, expected_error = expected[check_name]
+                    assert results == expected_results, (name, paths[index])
+                    assert (error is None) == (expected_error is None)
+                    for result in results:
+                        assert result.checker is checker
+                        assert result.check_method == getattr(checker, check_name)
+                        value = result.value
+                        if not isinstance(value, tuple):
+                            value = int(value), 1
+                        points = [p + v for p, v in zip(points, value)]
+                assert [scored[index], possible[index]] == points
+
+    def test_function_rules(self):
+        """
+        Checks that rules given as functions are called once per distinct
+        combination of the values of the attributes they read
+        """
+        paths = [
+            self._granule(0, title="a"),
+            self._granule(1, title="special", summary="ok"),
+            self._granule(2, title="a", summary="ok"),
+            self._granule(3, title="special", summary="not ok"),
+            self._granule(4, title="special", summary="ok"),
+            self._granule(5, title=None),
+        ]
+        table = AttributeTable.from_paths(paths)
+        checker = CountingCheck()
+        evaluation = evaluate_attribute_checks(table, checker)
+        assert checker.calls == 4
+        values = [
+            evaluation.results(index)["check_title"][0][0].value
+            for index in range(len(paths))
+        ]
+        assert values == [True, True, True, False, True, True]
+        assert evaluation.scores()[0].tolist() == [1, 1, 1, 0, 1, 1]
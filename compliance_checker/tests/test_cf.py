@@ -27,6 +27,7 @@ from compliance_checker.cf.util import (
     download_cf_standard_name_table,
     is_time_variable,
     is_vertical_coordinate,
+    parse_cell_methods,
     units_convertible,
     units_temporal,
 )
@@ -1458,6 +1459,33 @@ class TestCF1_6(BaseTestCase):
         self.assertFalse(units_temporal("hours"))
         self.assertFalse(units_temporal("days since the big bang"))
 
+    def test_parse_cell_methods(self):
+        cell_methods = parse_cell_methods(
+            "lat: lon: mean where sea_ice over sea time: point "
+            "(interval: 1 hour comment: sampled) depth: sum (deep)"
+        )
+        assert cell_methods.valid
+        area, time, depth = cell_methods.methods
+        assert area.names == ("lat", "lon")
+        assert (area.method, area.where, area.over) == ("mean", "sea_ice", "sea")
+        assert area.paren_contents is None
+        assert time.names == ("time",)
+        assert time.info == (
+            ("interval:", "1 hour", ("1", "hour")),
+            ("comment:", "sampled", None),
+        )
+        assert time.well_formed
+        # plain comments have no keywords
+        assert depth.paren_contents == "deep" and depth.info is None
+
+        malformed = parse_cell_methods("time: mean (interval 1 hour interval: x)")
+        (time,) = malformed.methods
+        assert time.info == (("interval:", "x", None),)
+        assert not time.well_formed
+        assert not parse_cell_methods("INVALID").valid
+        # the parse is shared between calls with the same string
+        assert parse_cell_methods("INVALID") is parse_cell_methods("INVALID")
+
 
 class TestCF1_7(BaseTestCase):
     """Extends the CF 1.6 tests. Most of the tests remain the same."""
@@ -7,6 +7,8 @@ Tests for command line output and parsing
 import io
 import json
 import os
+import pstats
+import shutil
 import sys
 import tempfile
 
@@ -153,6 +155,98 @@ class TestCLI(TestCase):
             assert "cf" in r
             assert "acdd" in r
 
+    def test_jsonl_output(self):
+        """
+        Tests that a suite can produce JSON Lines output with one record per
+        dataset and checker
+        """
+        return_value, errors = ComplianceChecker.run_checker(
+            ds_loc=[STATIC_FILES["conv_bad"], STATIC_FILES["2dim"]],
+            verbose=0,
+            criteria="strict",
+            checker_names=["acdd", "cf"],
+            output_filename=self.path,
+            output_format="jsonl",
+        )
+
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 4
+        assert [r["source_name"] for r in records].count(STATIC_FILES["2dim"]) == 2
+        assert {r["testname"].split(":")[0] for r in records} == {"acdd", "cf"}
+
+    def test_timings_output(self):
+        """
+        Tests that timings are added to the JSON output and a timings table to
+        the text output when requested
+        """
+        return_value, errors = ComplianceChecker.run_checker(
+            ds_loc=STATIC_FILES["conv_bad"],
+            verbose=0,
+            criteria="strict",
+            checker_names=["cf"],
+            output_filename=self.path,
+            output_format="json_new",
+            timings=True,
+        )
+        with open(self.path) as f:
+            r = json.load(f)[STATIC_FILES["conv_bad"]]
+        timings = r["cf"]["timings"]
+        assert set(timings) == {"load", "setup", "checks", "total"}
+        assert timings["checks"]["check_units"]["wall_time"] >= 0
+
+        return_value, errors = ComplianceChecker.run_checker(
+            ds_loc=STATIC_FILES["conv_bad"],
+            verbose=0,
+            criteria="strict",
+            checker_names=["cf"],
+            output_filename=self.path,
+            output_format="text",
+            timings=True,
+        )
+        with open(self.path) as f:
+            text = f.read()
+        assert "Check Timings" in text
+        assert "(dataset load)" in text
+
+    def test_profile(self):
+        """
+        Tests that a profile is written for each dataset in the requested
+        format, and that profiling can be restricted to selected checkers
+        """
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        return_value, errors = ComplianceChecker.run_checker(
+            ds_loc=[STATIC_FILES["conv_bad"], STATIC_FILES["2dim"]],
+            verbose=0,
+            criteria="strict",
+            checker_names=["cf"],
+            output_filename=self.path,
+            output_format="text",
+            profile=profile_dir,
+        )
+        assert sorted(os.listdir(profile_dir)) == [
+            "0-conv_bad.nc.pstats",
+            "1-2dim-grid.nc.pstats",
+        ]
+        stats = pstats.Stats(os.path.join(profile_dir, "0-conv_bad.nc.pstats"))
+        assert any(func[2] == "check_units" for func in stats.stats)
+
+        return_value, errors = ComplianceChecker.run_checker(
+            ds_loc=STATIC_FILES["conv_bad"],
+            verbose=0,
+            criteria="strict",
+            checker_names=["acdd", "cf"],
+            output_filename=self.path,
+            output_format="text",
+            profile=profile_dir,
+            profile_format="collapsed",
+            profile_checkers=["acdd"],
+        )
+        with open(os.path.join(profile_dir, "conv_bad.nc.collapsed")) as f:
+            stacks = f.read()
+        assert "cf.py" not in stacks
+
     def test_multiple_json_output_stdout(self):
         """
         Tests that a suite can produce JSON output to stdout
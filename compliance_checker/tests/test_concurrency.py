@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_concurrency.py
+"""
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from compliance_checker.base import BaseCheck, GenericFile, Result
+from compliance_checker.concurrency import (
+    NETCDF_LOCK,
+    CheckCancelled,
+    raise_if_cancelled,
+    run_cancellable,
+)
+from compliance_checker.runner import ComplianceChecker
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests import synthetic
+from compliance_checker.tests.http_server import NoRangeRequestHandler, serve_directory
+from compliance_checker.tests.resources import STATIC_FILES
+
+
+def run_until_complete(coroutine):
+    """
+    Runs a coroutine in a new event loop, like asyncio.run, which is only
+    available from Python 3.7
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+class TestAsync(TestCase):
+    """
+    Tests running checks from asyncio code
+    """
+
+    def setUp(self):
+        CheckSuite.checkers.clear()
+        CheckSuite.load_all_available_checkers()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _report(self, path):
+        with open(path) as f:
+            report = json.load(f)
+        for checker_report in report.values():
+            del checker_report["report_timestamp"]
+        return report
+
+    def test_run_async(self):
+        """
+        Checks that CheckSuite.run_async has the same results as run
+        """
+        cs = CheckSuite()
+        ds = cs.load_dataset(STATIC_FILES["conv_bad"])
+        self.addCleanup(ds.close)
+        expected = cs.run(ds, [], "cf")
+        results = run_until_complete(cs.run_async(ds, [], "cf"))
+        assert list(results) == ["cf"]
+        assert results["cf"][0] == expected["cf"][0]
+
+    def test_run_checker_async(self):
+        """
+        Checks that concurrent asynchronous runs of the same dataset, local
+        and remote, write the same reports
+        """
+        path = synthetic.write_feature_type(
+            os.path.join(self.tmpdir, "grid.nc"),
+            "2d-regular-grid",
+            sizes={"time": 5, "lat": 10, "lon": 10},
+        )
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            locations = [path, server.url + "/grid.nc"]
+            outputs = [os.path.join(self.tmpdir, "{}.json".format(i)) for i in range(2)]
+
+            async def run_all():
+                limiter = asyncio.Semaphore(1)
+                return await asyncio.gather(
+                    *(
+                        ComplianceChecker.run_checker_async(
+                            location,
+                            ["acdd"],
+                            0,
+                            "normal",
+                            limiter=limiter,
+                            output_filename=output,
+                            output_format="json",
+                        )
+                        for location, output in zip(locations, outputs)
+                    )
+                )
+
+            results = run_until_complete(run_all())
+            with server.lock:
+                assert [r[0] for r in server.requests].count("GET") == 1
+
+        assert results[0] == results[1]
+        local, remote = [self._report(output) for output in outputs]
+        assert local["acdd"]["source_name"] == path
+        assert remote["acdd"]["source_name"] == locations[1]
+        del local["acdd"]["source_name"]
+        del remote["acdd"]["source_name"]
+        assert local == remote
+
+    def test_run_checker_async_budget(self):
+        """
+        Checks that asynchronous runs of many remote files download them
+        ahead within the disk budget, one at a time by default
+        """
+        for index in range(3):
+            path = synthetic.write_feature_type(
+                os.path.join(self.tmpdir, "grid{}.nc".format(index)),
+                "2d-regular-grid",
+                sizes={"time": 5, "lat": 10, "lon": 10},
+                seed=index,
+            )
+        size = os.path.getsize(path)
+        output = os.path.join(self.tmpdir, "report.json")
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            locations = [server.url + "/grid{}.nc".format(i) for i in range(3)]
+            passed, errors = run_until_complete(
+                ComplianceChecker.run_checker_async(
+                    locations,
+                    ["acdd"],
+                    0,
+                    "normal",
+                    prefetch_budget=size,
+                    output_filename=output,
+                    output_format="json_new",
+                )
+            )
+            with server.lock:
+                assert [r[0] for r in server.requests].count("GET") == 3
+        assert not errors
+        with open(output) as f:
+            assert sorted(json.load(f)) == sorted(locations)
+
+    def test_run_checker_async_download(self):
+        """
+        Checks that asynchronous runs download remote files outside of the
+        check executor, while it is busy with other runs
+        """
+        synthetic.write_feature_type(
+            os.path.join(self.tmpdir, "grid.nc"),
+            "2d-regular-grid",
+            sizes={"time": 5, "lat": 10, "lon": 10},
+        )
+        output = os.path.join(self.tmpdir, "report.json")
+        executor = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+        executor.submit(release.wait, 10)
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+
+            def downloaded():
+                with server.lock:
+                    return "GET" in [r[0] for r in server.requests]
+
+            async def run():
+                task = asyncio.ensure_future(
+                    ComplianceChecker.run_checker_async(
+                        server.url + "/grid.nc",
+                        ["acdd"],
+                        0,
+                        "normal",
+                        executor=executor,
+                        output_filename=output,
+                        output_format="json",
+                    )
+                )
+                for _ in range(100):
+                    if downloaded():
+                        break
+                    await asyncio.sleep(0.05)
+                downloaded_before_check = downloaded()
+                release.set()
+                return downloaded_before_check, await task
+
+            try:
+                downloaded_before_check, (passed, errors) = run_until_complete(run())
+            finally:
+                release.set()
+                executor.shutdown()
+        assert downloaded_before_check
+        assert not errors
+
+    def test_cancel(self):
+        """
+        Checks that cancelling the task awaiting a run stops the run at its
+        next cancellation check
+        """
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def work():
+            started.set()
+            try:
+                while True:
+                    raise_if_cancelled()
+                    time.sleep(0.01)
+            except CheckCancelled:
+                stopped.set()
+                raise
+
+        async def cancel():
+            task = asyncio.ensure_future(run_cancellable(work))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # the executor is free to run the next function
+            return await run_cancellable(lambda: "next")
+
+        assert run_until_complete(cancel()) == "next"
+        assert stopped.is_set()
+
+
+class TestThreadSafety(TestCase):
+    """
+    Tests running checks from many threads in one process
+    """
+
+    def setUp(self):
+        CheckSuite.checkers.clear()
+        CheckSuite.load_all_available_checkers()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _text_report(self, path):
+        with open(path) as f:
+            return [line for line in f if "Report generated" not in line]
+
+    def test_concurrent_run_checker(self):
+        """
+        Checks that text reports written from a thread pool are the same as
+        when written one at a time, without writing to sys.stdout
+        """
+        locations = [STATIC_FILES[name] for name in ("conv_bad", "ncei_gold_point_1")]
+        locations *= 3
+
+        def run(index, location):
+            output = os.path.join(self.tmpdir, "{}.txt".format(index))
+            ComplianceChecker.run_checker(
+                location, ["cf", "acdd"], 1, "normal", output_filename=output
+            )
+            return self._text_report(output)
+
+        expected = [run(index, location) for index, location in enumerate(locations)]
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), ThreadPoolExecutor(4) as executor:
+            reports = list(executor.map(run, range(len(locations)), locations))
+        assert reports == expected
+        assert stdout.getvalue() == ""
+
+    def test_stdout_output_stream(self):
+        """
+        Checks that text reports are written to the given stream
+        """
+        cs = CheckSuite()
+        ds = cs.load_dataset(STATIC_FILES["conv_bad"])
+        self.addCleanup(ds.close)
+        score_dict = {STATIC_FILES["conv_bad"]: cs.run(ds, [], "cf")}
+        stream = io.StringIO()
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            ComplianceChecker.stdout_output(cs, score_dict, 0, 2, stream=stream)
+        assert stdout.getvalue() == ""
+        with redirect_stdout(stdout):
+            ComplianceChecker.stdout_output(cs, score_dict, 0, 2)
+        report, expected = stream.getvalue(), stdout.getvalue()
+        assert "IOOS Compliance Checker Report" in report
+        strip = lambda text: [
+            l for l in text.splitlines() if "Report generated" not in l
+        ]
+        assert strip(report) == strip(expected)
+
+    def test_html_json_output_stream(self):
+        """
+        Checks that HTML and JSON reports are written to the given stream
+        """
+        cs = CheckSuite()
+        ds = cs.load_dataset(STATIC_FILES["conv_bad"])
+        self.addCleanup(ds.close)
+        score_dict = {STATIC_FILES["conv_bad"]: cs.run(ds, [], "cf")}
+        stdout = io.StringIO()
+        html, json_stream = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout):
+            ComplianceChecker.html_output(cs, score_dict, "-", None, 2, stream=html)
+            ComplianceChecker.json_output(
+                cs, score_dict, "-", None, 2, stream=json_stream
+            )
+        assert stdout.getvalue() == ""
+        assert "</html>" in html.getvalue()
+        assert "cf" in json.loads(json_stream.getvalue())
+
+    def test_lock_netcdf_only(self):
+        """
+        Checks that NETCDF_LOCK is only held while checking netCDF datasets
+        """
+
+        def lock_free():
+            acquired = NETCDF_LOCK.acquire(blocking=False)
+            if acquired:
+                NETCDF_LOCK.release()
+            return acquired
+
+        class LockCheck(BaseCheck):
+            supported_ds = [GenericFile]
+
+            def check_lock(self, ds):
+                # the lock is reentrant, so try it from another thread
+                with ThreadPoolExecutor(1) as executor:
+                    free = executor.submit(lock_free).result()
+                return Result(BaseCheck.HIGH, free, "lock")
+
+        cs = CheckSuite(checkers={"lock": LockCheck})
+        groups, errors = cs.run(GenericFile(os.devnull), [], "lock")["lock"]
+        assert not errors
+        assert groups[0].value == (1, 1)
+
+    def test_load_checkers(self):
+        """
+        Checks that the checkers can be read while they are loaded in other
+        threads, and that suites given their own checkers keep them
+        """
+        cf = CheckSuite.checkers["cf"]
+        own = CheckSuite(checkers={"cf": cf})
+        names = set(CheckSuite.checkers)
+        stop = threading.Event()
+
+        def load():
+            while not stop.is_set():
+                CheckSuite.load_all_available_checkers()
+
+        def read():
+            for _ in range(200):
+                assert set(CheckSuite.checkers.items()) >= {("cf", cf)}
+                assert set(CheckSuite().checkers) == names
+
+        with ThreadPoolExecutor(4) as executor:
+            loaders = [executor.submit(load) for _ in range(2)]
+            readers = [executor.submit(read) for _ in range(2)]
+            try:
+                for reader in readers:
+                    reader.result()
+            finally:
+                stop.set()
+            for loader in loaders:
+                loader.result()
+        assert own.checkers == {"cf": cf}
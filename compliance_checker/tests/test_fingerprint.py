@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_fingerprint.py
+"""
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from netCDF4 import Dataset
+
+from compliance_checker import MemoizedDataset, metrics
+from compliance_checker.fingerprint import (
+    MetadataResultCache,
+    header_fingerprint,
+    recording_attribute_reads,
+)
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests import synthetic
+
+
+class TestFingerprint(TestCase):
+    """
+    Tests reusing the results of metadata checks between datasets with the
+    same header
+    """
+
+    def setUp(self):
+        CheckSuite.checkers.clear()
+        CheckSuite.load_all_available_checkers()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _granule(self, index, date_created="2020-01-01T00:00:00Z", **attributes):
+        """
+        Writes a granule of a product, with data depending on index
+        """
+        path = synthetic.write_feature_type(
+            os.path.join(self.tmpdir, "granule{}.nc".format(index)),
+            "2d-regular-grid",
+            sizes={"time": 3, "lat": 4, "lon": 5},
+            seed=index,
+        )
+        with Dataset(path, "a") as ds:
+            ds.date_created = date_created
+            ds.history = "granule {}".format(index)
+            ds.setncatts(attributes)
+        return path
+
+    def _fingerprint(self, path, **kwargs):
+        with Dataset(path) as ds:
+            return header_fingerprint(ds, **kwargs)
+
+    def test_header_fingerprint(self):
+        """
+        Checks that fingerprints only ignore the data and the values of the
+        volatile attributes
+        """
+        fingerprint = self._fingerprint(self._granule(0))
+        assert self._fingerprint(self._granule(1, "2021-02-03")) == fingerprint
+        assert self._fingerprint(self._granule(2, title="other")) != fingerprint
+        assert (
+            self._fingerprint(self._granule(3), volatile_attributes=()) != fingerprint
+        )
+        # the names of volatile attributes are part of the header
+        assert self._fingerprint(self._granule(4, uuid="granule")) != fingerprint
+
+        path = self._granule(5)
+        with Dataset(path, "a") as ds:
+            ds.variables["lat"].units = "degree_north"
+        assert self._fingerprint(path) != fingerprint
+
+    def test_recording_attribute_reads(self):
+        """
+        Checks that global attribute reads are recorded within the block
+        """
+        ds = MemoizedDataset(self._granule(0))
+        self.addCleanup(ds.close)
+        with recording_attribute_reads(ds) as reads:
+            ds.history
+            ds.getncattr("date_created")
+            hasattr(ds, "missing")
+            ds.variables["lat"].units
+        assert reads == {"history", "date_created", "missing"}
+        ds.title
+        assert reads == {"history", "date_created", "missing"}
+
+    def _results(self, cs, path):
+        ds = cs.load_dataset(path)
+        results = cs.run(ds, [], "cf", "acdd")
+        ds.close()
+        return {
+            checker: cs.dict_output(checker, groups, path, 1)
+            for checker, (groups, errors) in results.items()
+        }
+
+    def _value(self, report, name):
+        for priority in ("high_priorities", "medium_priorities", "low_priorities"):
+            for result in report[priority]:
+                if result["name"] == name:
+                    return result["value"]
+
+    def test_reuse(self):
+        """
+        Checks that reports are the same with and without reusing metadata
+        check results, including the checks which read data or volatile
+        attributes, which run for every granule
+        """
+        paths = [self._granule(i) for i in range(3)]
+        paths.append(self._granule(3, date_created="not a date"))
+        hits = metrics.METADATA_RESULT_LOOKUPS.get(result="hit")
+
+        expected = [self._results(CheckSuite(), path) for path in paths]
+        cs = CheckSuite(metadata_cache=MetadataResultCache())
+        reports = [self._results(cs, path) for path in paths]
+        for report in expected + reports:
+            for checker_report in report.values():
+                del checker_report["report_timestamp"]
+        assert reports == expected
+        assert metrics.METADATA_RESULT_LOOKUPS.get(result="hit") > hits
+
+        # the ACDD date check reads date_created, so isn't reused
+        assert self._value(reports[2]["acdd"], "date_created_is_iso") == [2, 2]
+        assert self._value(reports[3]["acdd"], "date_created_is_iso") == [1, 2]
+        # the ACDD extent checks read the data, so aren't reused
+        assert reports[1]["acdd"] != reports[0]["acdd"]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_metrics.py
+"""
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+from urllib.request import urlopen
+
+from netCDF4 import Dataset
+
+from compliance_checker import metrics
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests.resources import STATIC_FILES
+
+
+class TestMetrics(TestCase):
+    """
+    Tests the OpenMetrics metrics collected during check runs
+    """
+
+    def setUp(self):
+        CheckSuite.checkers.clear()
+        CheckSuite.load_all_available_checkers()
+
+    def test_render(self):
+        """
+        Ensures counters and histograms render in the OpenMetrics text format
+        """
+        registry = metrics.Registry()
+        counter = registry.register(metrics.Counter("things", "Things seen", ["kind"]))
+        histogram = registry.register(
+            metrics.Histogram(
+                "wait_seconds",
+                "Waiting",
+                unit="seconds",
+                buckets=(0.5, 1.0, float("inf")),
+            )
+        )
+        counter.inc(kind='a "quoted" kind')
+        counter.inc(2, kind='a "quoted" kind')
+        histogram.observe(0.25)
+        histogram.observe(0.75)
+        histogram.observe(5)
+        with self.assertRaises(ValueError):
+            counter.inc(colour="red")
+
+        text = registry.render()
+        assert text.splitlines() == [
+            "# TYPE things counter",
+            "# HELP things Things seen",
+            'things_total{kind="a \\"quoted\\" kind"} 3',
+            "# TYPE wait_seconds histogram",
+            "# UNIT wait_seconds seconds",
+            "# HELP wait_seconds Waiting",
+            'wait_seconds_bucket{le="0.5"} 1',
+            'wait_seconds_bucket{le="1.0"} 2',
+            'wait_seconds_bucket{le="+Inf"} 3',
+            "wait_seconds_count 3",
+            "wait_seconds_sum 6.0",
+            "# TYPE compliance_checker_cache_hits counter",
+            "# HELP compliance_checker_cache_hits Cache hits",
+            "# TYPE compliance_checker_cache_misses counter",
+            "# HELP compliance_checker_cache_misses Cache misses",
+            "# EOF",
+        ]
+
+    def test_check_run(self):
+        """
+        Ensures loading and checking a dataset updates the metrics, and that
+        they can be written to a file and served over HTTP
+        """
+        metrics.REGISTRY.clear()
+        cs = CheckSuite()
+        ds = cs.load_dataset(STATIC_FILES["conv_bad"])
+        cs.run(ds, [], "cf")
+        ds.close()
+
+        assert metrics.DATASETS_CHECKED.get() == 1
+        assert metrics.DATASET_LOAD_SECONDS.get_count(protocol="local") == 1
+        assert metrics.CHECKER_SECONDS.get_count(checker="cf") == 1
+        assert metrics.CHECK_SECONDS.get_count(checker="cf", check="check_units") == 1
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, "metrics.txt")
+        metrics.write_metrics(path)
+        with open(path) as f:
+            text = f.read()
+        assert "compliance_checker_datasets_checked_total 1" in text
+        assert (
+            'compliance_checker_cache_hits_total{cache="cfutil.get_axis_map"}' in text
+        )
+        assert text.endswith("# EOF\n")
+
+        server = metrics.start_http_server(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        response = urlopen("http://127.0.0.1:{}/metrics".format(server.server_port))
+        assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+        assert response.read().decode("utf-8") == text
+
+    def test_dataset_protocol(self):
+        """
+        Ensures datasets are labelled with the protocol they were loaded with
+        """
+        cs = CheckSuite()
+        ds = cs.load_dataset(STATIC_FILES["conv_bad"])
+        ds.close()
+        assert cs.dataset_protocol(STATIC_FILES["conv_bad"], ds) == "local"
+        assert (
+            cs.dataset_protocol("http://example.com/erddap/tabledap/data.ncCF", ds)
+            == "erddap"
+        )
+        assert cs.dataset_protocol("http://example.com/data.nc", ds) == "remote_netcdf"
+        with Dataset(STATIC_FILES["conv_bad"]) as nc:
+            assert cs.dataset_protocol("http://example.com/dodsC/data", nc) == "opendap"
+        assert cs.dataset_protocol("http://example.com/sos", object()) == "sos"
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_ncgen.py
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+
+from unittest import TestCase, mock
+
+import numpy as np
+
+from netCDF4 import Dataset
+
+from compliance_checker import metrics, ncgen
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests.test_suite import static_files
+
+
+CDL = """
+netcdf example {
+dimensions:
+    time = UNLIMITED ; // (3 currently)
+    name_strlen = 5 ;
+variables:
+    double time(time) ;
+        time:units = "seconds since 1970-01-01" ;
+        time:valid_range = 0., 1.e9 ;
+    short temp(time) ;
+        temp:_FillValue = -999s ;
+    char name(name_strlen) ;
+
+// global attributes:
+    :Conventions = "CF-1.6" ;
+    :id = 7 ;
+data:
+
+ time = 0, 60, 120 ;
+
+ temp = 10, _, 12 ;
+
+ name = "abc" ;
+}
+"""
+
+
+class TestNcgen(TestCase):
+    """
+    Tests in-process compilation of CDL and the compiled CDL cache
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_compile_cdl(self):
+        """
+        Ensures dimensions, attributes and data are compiled as ncgen would
+        """
+        with ncgen.compile_cdl(CDL, "example.nc", diskless=True) as nc:
+            # like ncgen -k nc4, which compiled CDL before
+            assert nc.data_model == "NETCDF4"
+            assert nc.dimensions["time"].isunlimited()
+            assert len(nc.dimensions["time"]) == 3
+            assert nc.Conventions == "CF-1.6"
+            assert nc.id == 7
+            assert nc.variables["time"].dtype == np.float64
+            np.testing.assert_array_equal(
+                nc.variables["time"].valid_range, [0.0, 1.0e9]
+            )
+            temp = nc.variables["temp"]
+            assert temp.dtype == np.int16
+            assert temp._FillValue == -999
+            assert temp[:].mask.tolist() == [False, True, False]
+            assert nc.variables["name"][:].tobytes().rstrip(b"\0") == b"abc"
+
+        with self.assertRaises(ncgen.CDLError):
+            ncgen.compile_cdl_bytes("netcdf bad { dimensions: x = y ; }")
+
+    def test_compile_cached(self):
+        """
+        Ensures a CDL file is only compiled once into the cache
+        """
+        cdl_path = os.path.join(self.tmpdir, "example.cdl")
+        with open(cdl_path, "w") as f:
+            f.write(CDL)
+        cache_dir = os.path.join(self.tmpdir, "cache")
+        metrics.CDL_CACHE_LOOKUPS.clear()
+
+        nc_path = ncgen.compile_cached(cdl_path, cache_dir)
+        assert os.path.dirname(nc_path) == cache_dir
+        assert os.listdir(cache_dir) == [os.path.basename(nc_path)]
+        mtime = os.stat(nc_path).st_mtime_ns
+        assert ncgen.compile_cached(cdl_path, cache_dir) == nc_path
+        assert os.stat(nc_path).st_mtime_ns == mtime
+        assert metrics.CDL_CACHE_LOOKUPS.get(result="miss") == 1
+        assert metrics.CDL_CACHE_LOOKUPS.get(result="hit") == 1
+        with Dataset(nc_path) as nc:
+            assert len(nc.dimensions["time"]) == 3
+
+        with open(cdl_path, "a") as f:
+            f.write("\n")
+        assert ncgen.compile_cached(cdl_path, cache_dir) != nc_path
+
+    def test_compile_cached_ncgen(self):
+        """
+        Ensures compiled CDL has its variables in declaration order, as ncgen
+        writes them, so checks give the same results as on ncgen's output
+        """
+        CheckSuite.load_all_available_checkers()
+        cs = CheckSuite()
+        cache_dir = os.path.join(self.tmpdir, "cache")
+        data_dir = os.path.dirname(static_files["test_cdl"])
+        for name in ("test_cdl", "duplicate_axis"):
+            cdl_path = os.path.join(data_dir, "{}.cdl".format(name))
+            ncgen_path = os.path.join(self.tmpdir, "{}.nc".format(name))
+            subprocess.check_call(["ncgen", "-k", "nc4", "-o", ncgen_path, cdl_path])
+            results = []
+            for path in (ncgen_path, ncgen.compile_cached(cdl_path, cache_dir)):
+                with Dataset(path) as nc:
+                    groups, errors = cs.run(nc, [], "cf:1.7")["cf:1.7"]
+                    results.append(
+                        (
+                            list(nc.variables),
+                            [(r.name, r.value, r.msgs) for r in groups],
+                        )
+                    )
+            assert results[1] == results[0], name
+
+        data = ncgen.compile_cdl_bytes(CDL)
+        with Dataset("example.nc", memory=data) as nc:
+            assert list(nc.variables) == ["time", "temp", "name"]
+
+    def test_compile_cached_encoding(self):
+        """
+        Ensures CDL which isn't UTF-8 raises a CDLError, so that
+        CheckSuite.compile_dataset falls back to ncgen
+        """
+        cdl_path = os.path.join(self.tmpdir, "latin1.cdl")
+        with open(cdl_path, "wb") as f:
+            f.write(CDL.replace("CF-1.6", "CF-1.6 \u00b0C").encode("latin-1"))
+        with self.assertRaises(ncgen.CDLError):
+            ncgen.compile_cached(cdl_path, os.path.join(self.tmpdir, "cache"))
+
+    def test_load_cdl(self):
+        """
+        Ensures loading a CDL dataset compiles it into the cache without
+        writing next to the CDL file
+        """
+        cdl_path = os.path.join(self.tmpdir, "netCDF4.cdl")
+        shutil.copy(static_files["netCDF4"], cdl_path)
+        cache_home = os.path.join(self.tmpdir, "cache")
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+            ds = CheckSuite().load_dataset(cdl_path)
+            cache_dir = ncgen.cache_directory()
+        self.addCleanup(ds.close)
+        assert ds.data_model == "NETCDF4"
+        assert os.path.dirname(ds.filepath()) == cache_dir
+        assert sorted(os.listdir(self.tmpdir)) == ["cache", "netCDF4.cdl"]
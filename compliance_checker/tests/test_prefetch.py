@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_prefetch.py
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from contextlib import redirect_stdout
+from unittest import TestCase
+
+from compliance_checker.prefetch import Prefetcher
+from compliance_checker.runner import ComplianceChecker
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests import synthetic
+from compliance_checker.tests.http_server import NoRangeRequestHandler, serve_directory
+
+
+class TestPrefetcher(TestCase):
+    """
+    Tests downloading remote datasets ahead of checking them
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.names = []
+        for i in range(4):
+            name = "grid{}.nc".format(i)
+            synthetic.write_feature_type(
+                os.path.join(self.tmpdir, name),
+                "2d-regular-grid",
+                sizes={"time": 5 + i, "lat": 10, "lon": 10},
+            )
+            self.names.append(name)
+
+    def _read(self, name):
+        with open(os.path.join(self.tmpdir, name), "rb") as f:
+            return f.read()
+
+    def test_prefetch(self):
+        """
+        Checks that remote files are downloaded in order, and deleted once
+        the next one is requested
+        """
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            locations = [server.url + "/" + name for name in self.names]
+            locations.append(os.path.join(self.tmpdir, self.names[0]))
+            with Prefetcher(locations, max_in_flight=2) as prefetcher:
+                previous = None
+                results = []
+                for location, path in prefetcher:
+                    assert previous is None or not os.path.exists(previous)
+                    if path is not None:
+                        with open(path, "rb") as f:
+                            results.append((location, f.read()))
+                    else:
+                        results.append((location, None))
+                    previous = path
+                tmpdir = prefetcher._tmpdir
+            assert not os.path.exists(tmpdir)
+
+        expected = [(l, self._read(n)) for l, n in zip(locations, self.names)]
+        # local files are loaded as usual
+        assert results == expected + [(locations[-1], None)]
+
+    def test_disk_budget(self):
+        """
+        Checks that the downloads waiting to be checked stay within the disk
+        budget, and files larger than it are left to be loaded as usual
+        """
+        sizes = [len(self._read(name)) for name in self.names]
+        budget = sizes[2] + sizes[3] - 1
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            locations = [server.url + "/" + name for name in self.names]
+            prefetcher = Prefetcher(locations, max_in_flight=4, disk_budget=budget)
+            with prefetcher:
+                paths = []
+                for location, path in prefetcher:
+                    downloaded = [
+                        os.path.getsize(os.path.join(prefetcher._tmpdir, f))
+                        for f in os.listdir(prefetcher._tmpdir)
+                    ]
+                    assert sum(downloaded) <= budget
+                    paths.append(path)
+        assert all(path is not None for path in paths)
+
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            locations = [server.url + "/" + name for name in self.names]
+            with Prefetcher(locations, disk_budget=sizes[0]) as prefetcher:
+                paths = [path for _, path in prefetcher]
+        assert paths[0] is not None
+        assert paths[1:] == [None, None, None]
+
+    def test_bad_location(self):
+        """
+        Checks that a location which fails to be prefetched is left to be
+        loaded as usual, without stopping the others from being downloaded
+        """
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            locations = [server.url + "/" + name for name in self.names]
+            locations.insert(1, "http://[invalid/grid.nc")
+            with Prefetcher(locations, max_in_flight=2) as prefetcher:
+                results = [(location, path is None) for location, path in prefetcher]
+        assert results == [
+            (location, location == locations[1]) for location in locations
+        ]
+
+    def test_byte_range(self):
+        """
+        Checks that files which can be read with range requests aren't
+        downloaded ahead
+        """
+        with serve_directory(self.tmpdir) as server:
+            locations = [server.url + "/" + name for name in self.names]
+            with Prefetcher(locations) as prefetcher:
+                assert [path for _, path in prefetcher] == [None] * 4
+            with server.lock:
+                assert {request[0] for request in server.requests} == {"HEAD"}
+
+    def test_run_checker(self):
+        """
+        Checks that results are the same with and without downloading ahead
+        """
+        CheckSuite.load_all_available_checkers()
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            locations = [server.url + "/" + name for name in self.names]
+            outputs = []
+            for prefetch in (0, 2):
+                output = io.StringIO()
+                with redirect_stdout(output):
+                    ComplianceChecker.run_checker(
+                        locations,
+                        ["cf"],
+                        0,
+                        "normal",
+                        output_format="jsonl",
+                        prefetch=prefetch,
+                    )
+                reports = [json.loads(line) for line in output.getvalue().splitlines()]
+                for report in reports:
+                    del report["report_timestamp"]
+                outputs.append(reports)
+        assert [report["source_name"] for report in outputs[1]] == locations
+        assert outputs[0] == outputs[1]
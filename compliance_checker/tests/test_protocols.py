@@ -4,11 +4,27 @@ compliance_checker/tests/test_protocols.py
 
 Unit tests that ensure the compliance checker can successfully identify protocol endpoints
 """
-from unittest import TestCase
+import os
+import shutil
+import tempfile
 
+from unittest import TestCase, mock
+
+import netCDF4
+import numpy as np
 import pytest
 
+from compliance_checker import planner
+from compliance_checker.protocols import erddap, opendap
 from compliance_checker.suite import CheckSuite
+from compliance_checker.tests import synthetic
+from compliance_checker.tests.http_server import (
+    DAPRequestHandler,
+    ERDDAPRequestHandler,
+    NoRangeRequestHandler,
+    bytes_sent,
+    serve_directory,
+)
 
 
 @pytest.mark.integration
@@ -61,3 +77,277 @@ class TestProtocols(TestCase):
         cs = CheckSuite()
         ds = cs.load_dataset(url)
         assert ds is not None
+
+
+class TestRemoteNetCDF(TestCase):
+    """
+    Tests reading remote netCDF files from a local HTTP server
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.size = os.path.getsize(
+            synthetic.write_feature_type(
+                os.path.join(self.tmpdir, "grid.nc"),
+                "2d-regular-grid",
+                sizes={"time": 100, "lat": 100, "lon": 100},
+            )
+        )
+        CheckSuite.load_all_available_checkers()
+
+    def test_byte_range(self):
+        """
+        Checks that remote netCDF files on servers supporting range requests
+        are read in parts rather than downloaded
+        """
+        with serve_directory(self.tmpdir) as server:
+            cs = CheckSuite()
+            ds = cs.load_dataset(server.url + "/grid.nc")
+            assert ds.filepath().endswith("#mode=bytes")
+            cs.run(ds, [], "cf", "acdd")
+            ds.close()
+            assert bytes_sent(server) < self.size / 100
+
+    def test_download(self):
+        """
+        Checks that remote netCDF files are downloaded from servers which
+        don't support range requests
+        """
+        with serve_directory(self.tmpdir, NoRangeRequestHandler) as server:
+            ds = CheckSuite().load_dataset(server.url + "/grid.nc")
+            assert "mode=bytes" not in ds.filepath()
+            ds.close()
+            assert bytes_sent(server) == self.size
+
+
+class TestOPeNDAP(TestCase):
+    """
+    Tests planned reads of OPeNDAP datasets from a local DAP server
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        path = synthetic.write_feature_type(
+            os.path.join(self.tmpdir, "trajectory.nc"),
+            "single-trajectory",
+            sizes={"obs": 20000},
+        )
+        with netCDF4.Dataset(path, "a") as nc:
+            nc.time_coverage_start = "1970-01-01T00:00:00Z"
+            nc.time_coverage_end = "1970-01-02T00:00:00Z"
+            nc.geospatial_lat_min = -90.0
+            nc.geospatial_lat_max = 90.0
+            nc.variables["lat"].actual_range = [-90.0, 90.0]
+        CheckSuite.load_all_available_checkers()
+
+    def _run(self, server):
+        cs = CheckSuite()
+        ds = cs.load_dataset(server.url + "/trajectory.nc")
+        assert isinstance(ds, planner.PlannedDataset)
+        results = cs.run(ds, [], "acdd", "cf")
+        ds.close()
+        return {
+            checker: [(r.name, r.value, sorted(r.msgs)) for r in result[0]]
+            for checker, result in results.items()
+        }
+
+    def _data_requests(self, server):
+        with server.lock:
+            return [r[1] for r in server.requests if ".dods" in r[1]]
+
+    def test_decode_dods(self):
+        """
+        Checks decoding of DAP2 data responses with arrays, scalars, strings
+        and grids
+        """
+        dds = (
+            "Dataset {\n"
+            "    Int16 flag[x = 3];\n"
+            "    Byte b;\n"
+            "    String name[n = 2];\n"
+            "    Grid {\n"
+            "      ARRAY:\n"
+            "        Float32 sst[time = 1][lat = 2];\n"
+            "      MAPS:\n"
+            "        Float64 time[time = 1];\n"
+            "        Float64 lat[lat = 2];\n"
+            "    } sst;\n"
+            "} test;\n"
+        )
+        data = b"".join(
+            [
+                np.array([3, 3, 1, -2, 3], ">i4").tobytes(),
+                b"\x07\0\0\0",
+                np.array([2, 2], ">u4").tobytes() + b"ab\0\0",
+                np.array([2], ">u4").tobytes() + b"cd\0\0",
+                np.array([2, 2], ">u4").tobytes(),
+                np.array([20.5, 21.5], ">f4").tobytes(),
+                np.array([1, 1], ">u4").tobytes() + np.array([0.0], ">f8").tobytes(),
+                np.array([2, 2], ">u4").tobytes(),
+                np.array([-10.0, 10.0], ">f8").tobytes(),
+            ]
+        )
+        values = opendap.decode_dods(dds.encode("utf-8") + b"\nData:\n" + data)
+        assert list(values) == ["flag", "b", "name", "sst", "time", "lat"]
+        np.testing.assert_array_equal(values["flag"], [1, -2, 3])
+        assert values["b"] == 7
+        assert values["name"].tolist() == ["ab", "cd"]
+        np.testing.assert_array_equal(values["sst"], [[20.5, 21.5]])
+        np.testing.assert_array_equal(values["lat"], [-10.0, 10.0])
+
+        with self.assertRaises(ValueError):
+            opendap.decode_dods(b"Dataset { Structure { Int32 a; } s; } t;\nData:\n")
+        with self.assertRaises(ValueError):
+            opendap.decode_dods(b"Dataset { Grid { Int32 a; } g; } t;\nData:\n")
+        with self.assertRaises(ValueError):
+            opendap.decode_dods(b"Dataset { Int32 a[x = 2];\nData:\n")
+
+    def test_prefetch(self):
+        """
+        Checks that the data the ACDD and CF checks read is fetched in a
+        single DAP request, with the same results as reading it on access
+        """
+        with serve_directory(self.tmpdir, DAPRequestHandler) as server:
+            results = self._run(server)
+            requests = self._data_requests(server)
+            assert len(requests) == 1
+            assert "lat" in requests[0]
+            assert "time%5B0:19999:19999%5D" in requests[0]
+
+            with server.lock:
+                del server.requests[:]
+            with mock.patch.object(planner.PlannedDataset, "prefetch"):
+                assert self._run(server) == results
+            assert len(self._data_requests(server)) > 1
+
+    def test_endpoints(self):
+        """
+        Checks that variables past the prefetch budget have their first and
+        last values prefetched, and are otherwise read from the server
+        """
+        with serve_directory(self.tmpdir, DAPRequestHandler) as server:
+            ds = planner.PlannedDataset(server.url + "/trajectory.nc")
+            self.addCleanup(ds.close)
+            ds.prefetch({"lat": planner.WHOLE, "time": planner.ENDPOINTS}, 0)
+            assert len(self._data_requests(server)) == 1
+            time = ds.variables["time"]
+            lat = ds.variables["lat"]
+            assert isinstance(time, planner._EndpointsVariable)
+            assert time.units == "seconds since 1970-01-01"
+            assert len(self._data_requests(server)) == 1
+            assert time[0] == 0.0
+            assert time[-1] == time[19999]
+            assert len(self._data_requests(server)) == 1
+            assert time[1:3].shape == (2,)
+            assert lat[0] == ds.variables["lat"][-20000]
+            assert ds.get_variables_by_attributes(standard_name="time") == [time]
+
+
+class TestERDDAP(TestCase):
+    """
+    Tests header-only loading of tabledap datasets from a local ERDDAP server
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        path = synthetic.write_feature_type(
+            os.path.join(self.tmpdir, "trajectory.nc"),
+            "single-trajectory",
+            sizes={"obs": 2000},
+        )
+        with netCDF4.Dataset(path, "a") as nc:
+            nc.geospatial_lat_min = -90.0
+            nc.geospatial_lat_max = 90.0
+            nc.variables["lat"].actual_range = [-90.0, 90.0]
+        CheckSuite.load_all_available_checkers()
+
+    def _run(self, server, header_only):
+        cs = CheckSuite(header_only=header_only)
+        ds = cs.load_dataset(server.url + "/tabledap/trajectory")
+        results = cs.run(ds, [], "acdd", "cf")
+        ds.close()
+        return {
+            checker: [(r.name, r.value, sorted(r.msgs)) for r in result[0]]
+            for checker, result in results.items()
+        }
+
+    def test_header_to_cdl(self):
+        """
+        Checks conversion of headers dumped by NetCDF-Java into CDL
+        """
+        header = (
+            "netcdf /erddap/cache/trajectory_1a2b.nc {\n"
+            "  dimensions:\n"
+            "    obs = 3;\n"
+            "  variables:\n"
+            "    int feature_id;\n"
+            '      :cf_role = "trajectory_id";\n'
+            "\n"
+            "    double time(obs=3);\n"
+            "      :actual_range = 0.0, 60.0; // double\n"
+            '      :units = "seconds since 1970-01-01";\n'
+            "\n"
+            "  // global attributes:\n"
+            '  :featureType = "trajectory";\n'
+            "}\n"
+        )
+        cdl = erddap.header_to_cdl(header)
+        assert cdl.splitlines()[0] == "netcdf header {"
+        assert "    int feature_id;" in cdl
+        assert '      feature_id:cf_role = "trajectory_id";' in cdl
+        assert "    double time(obs);" in cdl
+        assert "      time:actual_range = 0.0, 60.0; // double" in cdl
+        assert '  :featureType = "trajectory";' in cdl
+
+    def test_header_only(self):
+        """
+        Checks that header-only datasets are loaded without downloading the
+        data, with the same results as the full .ncCF file when the row
+        limit covers the dataset
+        """
+        with serve_directory(self.tmpdir, ERDDAPRequestHandler) as server:
+            results = self._run(server, False)
+            with server.lock:
+                del server.requests[:]
+            assert self._run(server, True) == results
+            with server.lock:
+                paths = [r[1] for r in server.requests]
+        assert any(".ncCFHeader?" in path for path in paths)
+        nccf = [path for path in paths if ".ncCF?" in path]
+        assert len(nccf) == 1
+        assert "orderByLimit" in nccf[0]
+
+    def test_header_only_unplanned(self):
+        """
+        Checks that checkers without a read plan, whose checks would read
+        missing data, are skipped on header-only datasets with a warning
+        """
+        with serve_directory(self.tmpdir, ERDDAPRequestHandler) as server:
+            cs = CheckSuite(header_only=True)
+            ds = cs.load_dataset(server.url + "/tabledap/trajectory")
+            self.addCleanup(ds.close)
+            with pytest.warns(UserWarning, match="Skipping checkers ioos"):
+                results = cs.run(ds, [], "ioos", "acdd")
+        assert list(results) == ["acdd"]
+
+    def test_row_limit(self):
+        """
+        Checks that only the first rows of the planned variables are fetched,
+        with a warning if the dataset has more
+        """
+        with serve_directory(self.tmpdir, ERDDAPRequestHandler) as server:
+            cs = CheckSuite(header_only=True)
+            ds = cs.load_dataset(server.url + "/tabledap/trajectory")
+            self.addCleanup(ds.close)
+            assert isinstance(ds, planner.HeaderDataset)
+            assert len(ds.dimensions["obs"]) == 2000
+            assert ds.variables["lat"][:].mask.all()
+            with pytest.warns(UserWarning, match="first 10 rows"):
+                ds.prefetch({"lat": planner.WHOLE}, max_rows=10)
+            lat = ds.variables["lat"]
+            assert lat.shape == (10,)
+            assert lat.units == "degrees_north"
+            assert not lat[:].mask.any()
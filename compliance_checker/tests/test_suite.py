@@ -1,13 +1,24 @@
 # coding=utf-8
+import inspect
+import io
 import os
+import time
 import unittest
 
 import numpy as np
+import pytest
 
+from netCDF4 import Dataset
 from pkg_resources import resource_filename
 
-from compliance_checker.base import BaseCheck, GenericFile, Result
-from compliance_checker.suite import CheckSuite
+from compliance_checker.base import (
+    BaseCheck,
+    GenericFile,
+    Result,
+    VariableVisitor,
+    visits_variables,
+)
+from compliance_checker.suite import CheckSuite, get_check_registry
 
 
 static_files = {
@@ -132,6 +143,79 @@ class TestSuite(unittest.TestCase):
         standard_name_hdr = u"§3.3 Standard Name"
         self.assertTrue(standard_name_hdr in name_set)
 
+    def test_instance_supported_ds(self):
+        """
+        Checks that checkers which set supported_ds when instantiated, as
+        some plug-ins do, are still chosen for the datasets they support
+        """
+
+        class PluginCheck(BaseCheck):
+            def __init__(self):
+                self.supported_ds = [GenericFile]
+
+            def check_plugin(self, ds):
+                return Result(BaseCheck.HIGH, True, "plugin")
+
+        cs = CheckSuite(checkers={"plugin": PluginCheck})
+        assert cs._get_valid_checkers(GenericFile(os.devnull), ["plugin"]) == [
+            ("plugin", PluginCheck)
+        ]
+        ds = cs.load_dataset(static_files["bad_region"])
+        assert cs._get_valid_checkers(ds, ["plugin"]) == []
+
+    def test_supported_ds_exact_type(self):
+        """
+        Checks that checkers are only chosen for datasets whose exact type
+        they support, and not for subclasses of those types
+        """
+
+        class DatasetCheck(BaseCheck):
+            supported_ds = [Dataset]
+
+        cs = CheckSuite(checkers={"dataset": DatasetCheck})
+        ds = cs.load_dataset(static_files["bad_region"])
+        assert isinstance(ds, Dataset) and type(ds) is not Dataset
+        assert cs._get_valid_checkers(ds, ["dataset"]) == []
+        with Dataset(static_files["bad_region"]) as nc:
+            assert cs._get_valid_checkers(nc, ["dataset"]) == [
+                ("dataset", DatasetCheck)
+            ]
+
+    def test_check_registry(self):
+        """
+        Checks that the registry of a checker class lists its check methods
+        and their metadata, and that skipped checks are looked up in it
+        """
+        cf = self.cs.checkers["cf"]
+        registry = get_check_registry(cf)
+        assert registry is get_check_registry(cf)
+        assert [check.name for check in registry] == sorted(
+            name
+            for name, method in inspect.getmembers(cf, inspect.isroutine)
+            if name.startswith("check_")
+        )
+        checks = {check.name: check for check in registry}
+        assert checks["check_actual_range"].reads_data
+        assert not checks["check_units"].reads_data
+        assert checks["check_units"].visits_variables
+        assert checks["check_units"].summary.startswith("  Check the units")
+        assert checks["check_units"].priority is None
+        acdd_checks = {
+            check.name: check for check in get_check_registry(self.cs.checkers["acdd"])
+        }
+        assert acdd_checks["check_high"].priority == BaseCheck.HIGH
+
+        checker = cf()
+        skip_checks = self.cs._process_skip_checks(["check_units", "check_flags:M"])
+        checks = dict(
+            (method.__name__, (method, level))
+            for method, level in self.cs._get_checks(checker, skip_checks)
+        )
+        assert "check_units" not in checks
+        assert checks["check_flags"][1] == BaseCheck.MEDIUM
+        assert checks["check_flags"][0].__self__ is checker
+        assert len(checks) == len(registry) - 1
+
     def test_group_func(self):
         # This is checking for issue #183, where group_func results in
         # IndexError: list index out of range
@@ -198,8 +282,9 @@ class TestSuite(unittest.TestCase):
             )
         ds.close()
 
+        # the cdl file is compiled into the cache, not next to the cdl file
         nc_file_path = static_files["test_cdl"].replace(".cdl", ".nc")
-        self.addCleanup(os.remove, nc_file_path)
+        assert not os.path.exists(nc_file_path)
 
         # Ok the scores should be equal!
         self.assertEqual(nc_points, cdl_points)
@@ -223,6 +308,158 @@ class TestSuite(unittest.TestCase):
         )
         assert all_passed < out_of
 
+    def test_html_output_streaming(self):
+        """
+        Check that streamed HTML output matches the rendered string and that
+        the Jinja2 environment is reused between reports
+        """
+        ds = self.cs.load_dataset(static_files["bad_region"])
+        score_groups = self.cs.run(ds, [], "cf")
+        groups, errors = score_groups["cf"]
+        checker_html = self.cs.checker_html_output("cf", groups, "bad_region", 2)
+        assert self.cs.j2 is CheckSuite().j2
+
+        stream = io.StringIO()
+        self.cs.write_html_output(iter([checker_html, checker_html]), stream)
+        assert stream.getvalue() == self.cs.html_output([checker_html, checker_html])
+
+    def test_checker_text_output(self):
+        """
+        Check that the buffered text report is the same as the report printed
+        by standard_output, standard_output_generation and timings_output
+        """
+        ds = self.cs.load_dataset(static_files["bad_region"])
+        groups, errors = self.cs.run(ds, [], "cf")["cf"]
+        # results with children are reported after their failed children
+        children = [
+            Result(BaseCheck.HIGH, (0, 1), "child", ["b reason", "a reason"]),
+            Result(BaseCheck.LOW, (0, 1), "low child", ["not reported"]),
+        ]
+        groups = groups + [Result(BaseCheck.HIGH, (0, 2), "parent", [], children)]
+        timing = {
+            "wall_time": 1.5,
+            "cpu_time": 1.0,
+            "read_calls": None,
+            "read_bytes": 2048,
+            "peak_memory": None,
+        }
+        checker_timings = {
+            "setup": timing,
+            "checks": {"check_a": timing},
+            "total": timing,
+        }
+
+        def strip_timestamp(report):
+            return [l for l in report.splitlines() if "Report generated" not in l]
+
+        for limit in (1, 2, 3):
+            stream = io.StringIO()
+            _, points, out_of = self.cs.standard_output(
+                "bad_region.nc", limit, "cf", groups, stream=stream
+            )
+            self.cs.standard_output_generation(
+                groups, limit, points, out_of, "cf", stream=stream
+            )
+            self.cs.timings_output(checker_timings, timing, stream=stream)
+            report = self.cs.checker_text_output(
+                "bad_region.nc", limit, "cf", groups, checker_timings, timing
+            )
+            assert report.endswith("\n")
+            assert strip_timestamp(report) == strip_timestamp(stream.getvalue())
+            assert "child\n* a reason\n* b reason\n" in report
+            assert "not reported" not in report
+
+    def test_timings(self):
+        """
+        Check that timings are recorded for the setup and each check of every
+        checker run when enabled, and not otherwise
+        """
+        ds = self.cs.load_dataset(static_files["bad_region"])
+        self.cs.run(ds, [], "cf")
+        assert self.cs.timings == {}
+
+        cs = CheckSuite(timings=True)
+        score_groups = cs.run(ds, [], "cf", "acdd")
+        assert set(cs.timings) == {"cf", "acdd"}
+        cf_timings = cs.timings["cf"]
+        checks = cf_timings["checks"]
+        assert "check_units" in checks
+        assert checks["check_units"]["peak_memory"] > 0
+        total = cf_timings["total"]
+        assert total["wall_time"] == pytest.approx(
+            cf_timings["setup"]["wall_time"]
+            + sum(t["wall_time"] for t in checks.values())
+        )
+        # the setup includes the traversal shared by the visiting checks
+        assert total["peak_memory"] == max(
+            t["peak_memory"] for t in [cf_timings["setup"]] + list(checks.values())
+        )
+
+    def test_visiting_checks(self):
+        """
+        Check that the checks visiting each variable have the same results
+        when run together in one traversal, and that an error in one of them
+        is only reported for that check
+        """
+        cf = self.cs.checkers["cf"]
+        visiting = sorted(
+            name
+            for name, method in inspect.getmembers(cf, inspect.isroutine)
+            if hasattr(method, "_cc_visitor")
+        )
+        assert "check_units" in visiting and "check_data_types" in visiting
+
+        def check_failing(self, ds):
+            def visit_variable(name, variable, attributes):
+                raise ValueError(name)
+
+            return VariableVisitor(lambda: [], visit_variable)
+
+        failing = type(
+            "FailingCheck",
+            (cf,),
+            {"check_failing": visits_variables(check_failing)},
+        )
+        cs = CheckSuite(checkers={"cf": failing})
+        ds = cs.load_dataset(static_files["bad_region"])
+        groups, errors = cs.run(ds, [], "cf")["cf"]
+        assert set(errors) == {"check_failing"}
+        assert isinstance(errors["check_failing"][0], ValueError)
+
+        checker = cf()
+        checker.setup(ds)
+        for name in visiting:
+            expected = cs._run_check(getattr(checker, name), ds, None)
+            names = {r.name for r in expected}
+            assert names <= {g.name for g in groups}, name
+        assert groups == CheckSuite().run(ds, [], "cf")["cf"][0]
+
+    def test_visitor_timings(self):
+        """
+        Check that the time spent visiting the variables is counted in the
+        timings of the visiting checks rather than in the setup
+        """
+        cf = self.cs.checkers["cf"]
+
+        def check_slow(self, ds):
+            def visit_variable(name, variable, attributes):
+                time.sleep(0.01)
+
+            return VariableVisitor(lambda: [], visit_variable)
+
+        slow = type("SlowCheck", (cf,), {"check_slow": visits_variables(check_slow)})
+        cs = CheckSuite(checkers={"cf": slow}, timings=True)
+        ds = cs.load_dataset(static_files["bad_region"])
+        cs.run(ds, [], "cf")
+        timings = cs.timings["cf"]
+        slow_time = timings["checks"]["check_slow"]["wall_time"]
+        assert slow_time >= 0.01 * len(ds.variables)
+        assert timings["setup"]["wall_time"] < slow_time
+        assert timings["total"]["wall_time"] == pytest.approx(
+            timings["setup"]["wall_time"]
+            + sum(t["wall_time"] for t in timings["checks"].values())
+        )
+
     def test_netCDF4_features(self):
         """
         Check if a proper netCDF4 file with netCDF4-datatypes is created.
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_synthetic.py
+"""
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from netCDF4 import Dataset
+
+from compliance_checker import cfutil as util
+from compliance_checker.tests import synthetic
+
+
+class TestSynthetic(TestCase):
+    """
+    Tests the synthetic dataset generators used for scale testing
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name + ".nc")
+
+    def test_feature_types(self):
+        """
+        Ensures every generated feature type is detected as that feature type
+        """
+        for feature_type in synthetic.FEATURE_TYPES:
+            path = synthetic.write_feature_type(
+                self.path(feature_type), feature_type, n_variables=2
+            )
+            with Dataset(path) as nc:
+                for variable in ("temperature_0", "temperature_1"):
+                    assert (
+                        util.guess_feature_type(nc, variable) == feature_type
+                    ), "{} is {}".format(variable, feature_type)
+
+    def test_sizes_and_chunking(self):
+        """
+        Ensures dimension sizes, chunk sizes and grid mappings are applied,
+        and that no data is written with write_data=False
+        """
+        path = synthetic.write_feature_type(
+            self.path("point"),
+            "point",
+            n_variables=3,
+            sizes={"obs": 1000},
+            chunksizes={"obs": 100},
+            n_grid_mappings=2,
+            write_data=False,
+        )
+        with Dataset(path) as nc:
+            assert nc.dimensions["obs"].size == 1000
+            assert nc.variables["lat"].chunking() == [100]
+            assert nc.variables["temperature_2"].grid_mapping == "crs_0"
+            assert nc.variables["temperature_0"][:].mask.all()
+
+    def test_ragged(self):
+        """
+        Ensures ragged array representations account for every observation
+        """
+        sizes = {"station": 7, "trajectory": 7, "profile": 20, "obs": 500}
+        for feature_type, levels in synthetic.RAGGED_FEATURE_TYPES.items():
+            path = synthetic.write_ragged(
+                self.path(feature_type), feature_type, "contiguous", sizes=sizes
+            )
+            instance = levels[0][0]
+            with Dataset(path) as nc:
+                assert nc.featureType == feature_type
+                assert nc.variables["row_size"].sample_dimension == "obs"
+                assert np.sum(nc.variables["row_size"][:]) == 500
+                assert nc.variables["{}_id".format(instance)].cf_role == levels[0][1]
+
+            if len(levels) == 2:
+                path = synthetic.write_ragged(
+                    self.path(feature_type), feature_type, "indexed", sizes=sizes
+                )
+                with Dataset(path) as nc:
+                    index = nc.variables["{}_index".format(instance)]
+                    assert index.instance_dimension == instance
+                    assert index[:].max() < sizes[instance]
+            else:
+                with self.assertRaises(ValueError):
+                    synthetic.write_ragged(
+                        self.path(feature_type), feature_type, "indexed"
+                    )
+
+    def test_groups(self):
+        """
+        Ensures nested groups are generated with their data variables
+        """
+        path = synthetic.write_groups(
+            self.path("groups"), n_groups=3, depth=2, n_variables=2
+        )
+        with Dataset(path) as nc:
+            assert sorted(nc.groups) == ["group_0_0", "group_1_0", "group_2_0"]
+            group = nc.groups["group_1_0"].groups["group_1_1"]
+            assert group.variables["temperature_1"].dimensions == (
+                "time",
+                "lat",
+                "lon",
+            )
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compliance_checker/tests/test_tracing.py
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from compliance_checker.runner import ComplianceChecker
+from compliance_checker.suite import CheckSuite
+from compliance_checker.tests.resources import STATIC_FILES
+from compliance_checker.tracing import Tracer, span, tracing
+
+
+class TestTracing(TestCase):
+    """
+    Tests the spans recorded around dataset loading, checks and output
+    """
+
+    def setUp(self):
+        CheckSuite.checkers.clear()
+        CheckSuite.load_all_available_checkers()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_span(self):
+        """
+        Ensures spans record their attributes and errors, and do nothing
+        without an active tracer
+        """
+        with span("untraced") as attributes:
+            attributes["ignored"] = True
+
+        with tracing() as tracer:
+            with span("outer", dataset="a.nc"):
+                with self.assertRaises(ValueError):
+                    with span("inner") as attributes:
+                        attributes["count"] = 1
+                        raise ValueError("bad")
+
+        inner, outer = tracer.events
+        assert [outer["name"], inner["name"]] == ["outer", "inner"]
+        assert outer["ph"] == "X"
+        assert outer["args"] == {"dataset": "a.nc"}
+        assert inner["args"] == {"count": "1", "error": "ValueError: bad"}
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+    def test_run_checker(self):
+        """
+        Ensures a check run records spans for loading, setup, each check and
+        the output writer, and that the trace can be written as JSON
+        """
+        tracer = Tracer()
+        with tracing(tracer):
+            ComplianceChecker.run_checker(
+                ds_loc=STATIC_FILES["conv_bad"],
+                verbose=0,
+                criteria="strict",
+                checker_names=["cf"],
+                output_filename=os.path.join(self.tmpdir, "out.json"),
+                output_format="json",
+            )
+        path = os.path.join(self.tmpdir, "trace.json")
+        tracer.dump(path)
+        with open(path) as f:
+            events = {event["name"]: event for event in json.load(f)["traceEvents"]}
+
+        assert events["load_dataset"]["args"]["protocol"] == "local"
+        assert events["setup"]["args"]["checker"] == "cf"
+        assert events["check_units"]["cat"] == "check"
+        assert "json_output" in events
+        run = events["run"]
+        check = events["check_units"]
+        assert run["ts"] <= check["ts"] <= run["ts"] + run["dur"]
@@ -3,8 +3,13 @@
 """
 compliance_checker/tests/test_util.py
 """
+import json
 import unittest
 
+from unittest import mock
+
+import numpy as np
+
 from compliance_checker import util
 
 
@@ -52,3 +57,44 @@ class TestUtils(unittest.TestCase):
 
         bad_date = "09192017"
         self.assertFalse(util.datetime_is_iso(bad_datetime)[0])
+
+    def test_json_dumps(self):
+        """
+        Test that json_dumps matches the standard library json output
+        regardless of which encoder is used
+        """
+        obj = {"name": "§2.6.1", "value": [1, 2], "nested": {"a": None, "b": 1.5}}
+        self.assertEqual(
+            util.json_dumps(obj),
+            json.dumps(obj, ensure_ascii=False, separators=(",", ":")),
+        )
+        self.assertEqual(
+            util.json_dumps(obj, indent=2),
+            json.dumps(obj, indent=2, ensure_ascii=False),
+        )
+        self.assertEqual(util.json_dumps([], indent=4), "[]")
+
+    def test_json_dumps_encoders(self):
+        """
+        Test that objects with non-finite floats or numpy values are
+        serialized like the standard library json module does, with and
+        without orjson
+        """
+        nan = util.json_float(float("nan"))
+        self.assertIsInstance(nan, util.NonFiniteFloat)
+        self.assertIs(type(util.json_float(1.0)), float)
+        obj = {"nan": [nan, 1.0], "inf": {"a": util.json_float(float("-inf"))}}
+        expected = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        self.assertIn("NaN", expected)
+        for orjson in (util.orjson, None):
+            with mock.patch.object(util, "orjson", orjson):
+                self.assertEqual(util.json_dumps(obj), expected)
+                self.assertEqual(
+                    util.json_dumps(obj, indent=2),
+                    json.dumps(obj, indent=2, ensure_ascii=False),
+                )
+                self.assertEqual(util.json_dumps([np.float64(0.5)]), "[0.5]")
+                with self.assertRaises(TypeError):
+                    util.json_dumps([np.int64(1)])
+                with self.assertRaises(TypeError):
+                    util.json_dumps({"values": np.arange(2)})
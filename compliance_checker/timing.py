@@ -0,0 +1,152 @@
+"""
+Timing and resource usage measurements for checks and dataset loading
+"""
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def io_counters():
+    """
+    Returns a 2-tuple of the number of read calls and the number of bytes read
+    by this process so far, or (None, None) if they can't be determined on
+    this platform.
+
+    The counts come from /proc/self/io where available, falling back to
+    psutil if it is installed.  netCDF variable reads show up here as the
+    reads the netCDF/HDF5 libraries make on the underlying file.
+    """
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["syscr"]), int(counters["rchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+        except (psutil.Error, AttributeError):
+            pass
+        else:
+            return (
+                counters.read_count,
+                getattr(counters, "read_chars", counters.read_bytes),
+            )
+    return None, None
+
+
+def _io_counters_overhead():
+    """
+    Returns the read calls and bytes read by io_counters() itself, which are
+    subtracted from the measurements
+    """
+    start_reads, start_bytes = io_counters()
+    if start_reads is None:
+        return 0, 0
+    end_reads, end_bytes = io_counters()
+    return end_reads - start_reads, end_bytes - start_bytes
+
+
+_IO_OVERHEAD = None
+
+
+@contextmanager
+def trace_memory(enabled=True):
+    """
+    Traces memory allocations with tracemalloc within the block so that
+    Timers measure peak memory, unless already tracing
+    """
+    start = enabled and not tracemalloc.is_tracing()
+    if start:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if start:
+            tracemalloc.stop()
+
+
+class Timer(object):
+    """
+    Context manager which measures the wall time, CPU time, read calls,
+    bytes read and peak memory allocated while the block runs.  The
+    measurements are available from `result` once the block exits.
+
+    Peak memory is only measured while tracemalloc is tracing.  Timers should
+    not be nested, as each one resets the traced memory peak.
+
+    Disabled timers do nothing and leave `result` as None.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.result = None
+
+    def __enter__(self):
+        global _IO_OVERHEAD
+        if self.enabled:
+            if _IO_OVERHEAD is None:
+                _IO_OVERHEAD = _io_counters_overhead()
+            if tracemalloc.is_tracing():
+                if hasattr(tracemalloc, "reset_peak"):
+                    tracemalloc.reset_peak()
+                else:
+                    tracemalloc.clear_traces()
+                self._start_memory = tracemalloc.get_traced_memory()[0]
+            self._start_reads, self._start_bytes = io_counters()
+            self._start_cpu = time.process_time()
+            self._start_wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.enabled:
+            return False
+        wall_time = time.perf_counter() - self._start_wall
+        cpu_time = time.process_time() - self._start_cpu
+        reads, read_bytes = io_counters()
+        if reads is not None and self._start_reads is not None:
+            reads = max(reads - self._start_reads - _IO_OVERHEAD[0], 0)
+            read_bytes = max(read_bytes - self._start_bytes - _IO_OVERHEAD[1], 0)
+        peak_memory = None
+        if tracemalloc.is_tracing():
+            peak_memory = max(
+                tracemalloc.get_traced_memory()[1] - self._start_memory, 0
+            )
+        self.result = {
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "read_calls": reads,
+            "read_bytes": read_bytes,
+            "peak_memory": peak_memory,
+        }
+        return False
+
+
+def total_timings(timings):
+    """
+    Combines several timing results into one, summing the times and reads
+    and taking the largest peak memory
+    """
+    total = {
+        "wall_time": 0.0,
+        "cpu_time": 0.0,
+        "read_calls": None,
+        "read_bytes": None,
+        "peak_memory": None,
+    }
+    for timing in timings:
+        total["wall_time"] += timing["wall_time"]
+        total["cpu_time"] += timing["cpu_time"]
+        for key in ("read_calls", "read_bytes"):
+            if timing[key] is not None:
+                total[key] = (total[key] or 0) + timing[key]
+        if timing["peak_memory"] is not None:
+            total["peak_memory"] = max(total["peak_memory"] or 0, timing["peak_memory"])
+    return total
@@ -0,0 +1,124 @@
+"""
+Lightweight tracing of check runs as nested spans, exported as JSON in the
+Chrome trace-event format which can be opened in chrome://tracing, Perfetto
+or speedscope
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+
+
+class Tracer(object):
+    """
+    Records spans as complete ("X") trace events with their start time,
+    duration, thread and attributes.  Spans on the same thread nest by time,
+    so no parent bookkeeping is needed.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+
+    def _now(self):
+        # trace event timestamps are in microseconds
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name, category="compliance_checker", **attributes):
+        """
+        Records a span covering the block, with any attributes added to the
+        event's args.  The attributes are yielded so that the block can add
+        to them, and an exception raised in the block is recorded as the
+        "error" attribute.
+        """
+        start = self._now()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = "{}: {}".format(type(e).__name__, e)
+            raise
+        finally:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": self._now() - start,
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+                "args": {k: str(v) for k, v in attributes.items()},
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def to_dict(self):
+        with self._lock:
+            events = sorted(self.events, key=lambda e: (e["tid"], e["ts"]))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, filename):
+        """
+        Writes the trace in the Chrome trace-event JSON format to filename
+        """
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+_tracer = None
+
+
+@contextmanager
+def tracing(tracer=None, enabled=True):
+    """
+    Makes tracer, or a new Tracer, the active tracer within the block and
+    yields it.  Yields None and leaves the active tracer alone if enabled is
+    False.
+    """
+    global _tracer
+    if not enabled:
+        yield None
+        return
+    previous = _tracer
+    _tracer = tracer if tracer is not None else Tracer()
+    try:
+        yield _tracer
+    finally:
+        _tracer = previous
+
+
+@contextmanager
+def _no_span(attributes):
+    yield attributes
+
+
+def span(name, **attributes):
+    """
+    Returns a context manager recording a span on the active tracer, which
+    does nothing when tracing isn't enabled
+    """
+    if _tracer is None:
+        return _no_span(attributes)
+    return _tracer.span(name, **attributes)
+
+
+def traced(name):
+    """
+    Decorator recording a span named name around each call of the function
+    on the active tracer
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,12 +1,22 @@
 """
 General purpose utility functions to aid in compliance checking tasks
 """
+import json
+import math
+
 from collections import OrderedDict
 
 import isodate
 import pendulum
 
 
+# orjson is an optional, faster JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
 def datetime_is_iso(date_str):
     """Attempts to parse a date formatted in ISO 8601 format"""
     try:
@@ -45,3 +55,57 @@ def kvp_convert(input_coll):
         return OrderedDict(
             (l, None) if not isinstance(l, tuple) else (l[0], l[1]) for l in input_coll
         )
+
+
+class NonFiniteFloat(float):
+    """
+    A NaN or infinite float, which json_dumps writes as NaN, Infinity or
+    -Infinity like the json module does.  orjson writes plain non-finite
+    floats as null, but refuses float subclasses, so json_dumps serializes
+    objects holding these with json.
+    """
+
+
+def json_float(value):
+    """
+    Returns value, as a NonFiniteFloat if it is a NaN or infinite float
+
+    :param value: Value to be serialized to JSON
+    """
+    if type(value) is float and not math.isfinite(value):
+        return NonFiniteFloat(value)
+    return value
+
+
+def json_dumps(obj, indent=None):
+    """
+    Serializes an object of JSON-compatible primitives to a JSON string,
+    using orjson if it is installed and falling back to the standard library
+    json module otherwise.  Non-ASCII characters are written as-is.
+
+    Both encoders give the same JSON, apart from the formatting of floats,
+    which orjson may write in a different but equal form, e.g. 1e16 rather
+    than 1e+16.  Objects orjson refuses, such as those holding numpy values
+    or NonFiniteFloats, are serialized with json.  NaN and infinite floats
+    must be converted with json_float, as CheckSuite.serialize does, to be
+    written as NaN and Infinity rather than null.
+
+    :param obj: Object to serialize
+    :param int indent: Number of spaces to indent by, or None for compact
+                       output.  orjson only supports an indent of 2, other
+                       values always use the json module.
+    :rtype: str
+    """
+    if orjson is not None and indent in {None, 2}:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option).decode("utf-8")
+        # e.g. integers too large for orjson, or unsupported types, such as
+        # numpy values and NonFiniteFloats
+        except TypeError:
+            pass
+    if indent is None:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(obj, indent=indent, ensure_ascii=False)
@@ -28,7 +28,7 @@ setup(
     author="Dave Foster",
     author_email="dave@axiomdatascience.com",
     url="https://github.com/ioos/compliance-checker",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=pip_requirements(),
     python_requires="~=3.5",
     tests_require=["pytest"],